@@ -1,21 +1,10 @@
+import os
 import sys
 from weather_analysis import (
     WeatherDataset,
-    filter_by_rainfall_threshold,
-    filter_high_temperature_days,
-    filter_windy_days,
-    calculate_total_rainfall,
-    find_max_temperature,
-    find_min_temperature,
-    count_rainy_days,
-    analyze_rain_patterns,
-    extract_temperature_range,
-    plot_temperature_distribution,
-    plot_rainfall_patterns,
-    plot_temperature_vs_humidity,
-    plot_wind_speed_distribution,
-    plot_pressure_vs_rain,
-    plot_temperature_range_trends
+    weather_report,
+    render_report_plots,
+    PlotCache
 )
 from weather_analysis.logger_config import setup_logger
 
@@ -29,76 +18,75 @@ def main():
         logger.info("Starting weather analysis application")
 
         # Create WeatherDataset object to handle loading its own data
+        # cache=True keeps a binary copy next to the CSV so later runs skip parsing
         logger.info(f"Loading dataset from: {file_name}")
-        dataset = WeatherDataset(file_name)
+        dataset = WeatherDataset(file_name, cache=True)
 
         print("=" * 60)
         print("WEATHER DATA ANALYSIS - Module 6")
         print("Data Patterns, Trends, and Visualization")
         print("=" * 60)
 
-        row_count = dataset.get_row_count()
+        # every aggregate and plot input below comes from this one pass over the columns
+        report = weather_report()
+        results = report.run(dataset)
+
+        row_count = results['row_count']
         print(f"\nTotal rows in dataset: {row_count:,}")
         logger.info(f"Dataset contains {row_count} rows")
 
-        # Get the data for analysis
-        data = dataset.get_data()
-
         # Pattern Analysis
         print("\n" + "=" * 60)
-        print("PATTERN ANALYSIS (using map, filter, lambda, reduce)")
+        print("PATTERN ANALYSIS (single pass report)")
         print("=" * 60)
 
         # Rain patterns
         print("\n-- Rain Pattern Analysis --")
-        rain_patterns = analyze_rain_patterns(data)
+        rain_patterns = results['rain_patterns']
         print(f"Days with rain today:     {rain_patterns['rain_today']:,}")
         print(f"Days with rain tomorrow:  {rain_patterns['rain_tomorrow']:,}")
         print(f"Consecutive rainy days:   {rain_patterns['consecutive_rain']:,}")
         print(f"Rain today percentage:    {rain_patterns['rain_today']/rain_patterns['total_days']*100:.1f}%")
 
-        # Temp extremes using reduce
-        print("\n-- Temperature Extremes (using reduce) --")
-        max_temp = find_max_temperature(data)
-        min_temp = find_min_temperature(data)
+        # Temp extremes
+        print("\n-- Temperature Extremes --")
+        max_temp = results['max_temp'].max
+        min_temp = results['min_temp'].min
         print(f"Highest recorded temp:    {max_temp:.1f}°C")
         print(f"Lowest recorded temp:     {min_temp:.1f}°C")
         print(f"Overall range:            {max_temp - min_temp:.1f}°C")
 
-        # Total rainfall using reduce
-        print("\n-- Total Rainfall (using reduce) --")
-        total_rainfall = calculate_total_rainfall(data)
+        # Total rainfall
+        print("\n-- Total Rainfall --")
+        total_rainfall = results['rainfall'].total
         print(f"Total rainfall:           {total_rainfall:,.1f} mm")
         print(f"Average per day:          {total_rainfall/row_count:.2f} mm")
 
-        # Filter high temp days with filter and lambda
-        print("\n-- High Temperature Days (using filter/lambda) --")
-        hot_days = filter_high_temperature_days(data, 35.0)
-        print(f"Days with MaxTemp >= 35°C: {len(hot_days):,}")
-        print(f"Percentage of dataset:     {len(hot_days)/row_count*100:.2f}%")
-
-        # Filter heavy rainfall days with filter and lambda
-        print("\n-- Heavy Rainfall Days (using filter/lambda) --")
-        heavy_rain_days = filter_by_rainfall_threshold(data, 10.0)
-        print(f"Days with Rainfall >= 10mm: {len(heavy_rain_days):,}")
-        print(f"Percentage of dataset:      {len(heavy_rain_days)/row_count*100:.2f}%")
-
-        # Filter windy days with filter and lambda
-        print("\n-- Windy Days (using filter/lambda) --")
-        windy_days = filter_windy_days(data, 60.0)
-        print(f"Days with WindGust >= 60 km/h: {len(windy_days):,}")
-        print(f"Percentage of dataset:         {len(windy_days)/row_count*100:.2f}%")
-
-        # Tempe range analysis with map and lambda
-        print("\n-- Daily Temperature Range (using map/lambda) --")
-        temp_ranges = extract_temperature_range(data)
-        if temp_ranges:
-            avg_range = sum(temp_ranges) / len(temp_ranges)
-            max_range = max(temp_ranges)
-            min_range = min(temp_ranges)
-            print(f"Average daily range:  {avg_range:.2f}°C")
-            print(f"Largest daily range:  {max_range:.2f}°C")
-            print(f"Smallest daily range: {min_range:.2f}°C")
+        # High temp days
+        print("\n-- High Temperature Days --")
+        hot_days = results['hot_days']
+        print(f"Days with MaxTemp >= 35°C: {hot_days:,}")
+        print(f"Percentage of dataset:     {hot_days/row_count*100:.2f}%")
+
+        # Heavy rainfall days
+        print("\n-- Heavy Rainfall Days --")
+        heavy_rain_days = results['heavy_rain_days']
+        print(f"Days with Rainfall >= 10mm: {heavy_rain_days:,}")
+        print(f"Percentage of dataset:      {heavy_rain_days/row_count*100:.2f}%")
+
+        # Windy days
+        print("\n-- Windy Days --")
+        windy_days = results['windy_days']
+        print(f"Days with WindGust >= 60 km/h: {windy_days:,}")
+        print(f"Percentage of dataset:         {windy_days/row_count*100:.2f}%")
+
+        # Temp range analysis
+        print("\n-- Daily Temperature Range --")
+        temp_range = results['temp_range']
+        if temp_range.count:
+            print(f"Average daily range:  {temp_range.mean:.2f}°C")
+            print(f"Largest daily range:  {temp_range.max:.2f}°C")
+            print(f"Smallest daily range: {temp_range.min:.2f}°C")
 
         # Data Visualization
         print("\n" + "=" * 60)
@@ -107,24 +95,10 @@ def main():
 
         print("\nCreating charts...")
 
-        # Generate visualizations
-        plot_temperature_distribution(data, 'temperature_distribution.png')
-        print("✓ Temperature distirbution histogram saved")
-
-        plot_rainfall_patterns(data, 'rainfall_patterns.png')
-        print("✓ Rainfall patterns histogram saved")
-
-        plot_temperature_vs_humidity(data, 'temp_vs_humidity.png')
-        print("✓ Temperature vs Humidity scatter plot saved")
-
-        plot_wind_speed_distribution(data, 'wind_speed_distribution.png')
-        print("✓ Wind speed distribution histogram saved")
-
-        plot_pressure_vs_rain(data, 'pressure_vs_rain.png')
-        print("✓ Pressure vs Rain comparison box plot saved")
-
-        plot_temperature_range_trends(data, 'temperature_range_trends.png')
-        print("✓ Temperature range trends histogram saved")
+        # plots are drawn from the histograms and arrays the report pass collected, one worker process per core,
+        # figures whose inputs didn't change since the last run are copied from the plot cache
+        for path in render_report_plots(report, workers=os.cpu_count() or 1, cache=PlotCache()):
+            print(f"✓ {path} saved")
 
         print("\n" + "=" * 60)
         print("ANAYLSIS COMPLETE")
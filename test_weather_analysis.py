@@ -11,6 +11,20 @@ Run pytest with doctests (4 doctests: basic calculate_mean, calculate_median (ev
 import pytest
 import tempfile
 import os
+import bz2
+import gzip
+import lzma
+import shutil
+import pickle
+import random
+import subprocess
+import sys
+from array import array
+from weather_analysis import data_loader, visualization
+from weather_analysis.report import CollectPairs, CountWhere, RainPatterns, ReportTask
+from weather_analysis.timeseries import rolling, ewma
+from weather_analysis.histogram import Histogram2D, ScatterPoints
+from weather_analysis.visualization import save_histogram
 from weather_analysis import (
     calculate_mean,
     calculate_median,
@@ -33,7 +47,32 @@ from weather_analysis import (
     find_max_temperature,
     find_min_temperature,
     count_rainy_days,
-    analyze_rain_patterns
+    analyze_rain_patterns,
+    ColumnarTable,
+    load_weather_columns,
+    infer_csv_schema,
+    load_cache,
+    csv_column_batches,
+    ColumnPredicate,
+    infer_schema,
+    calculate_percentiles,
+    KLLSketch,
+    calculate_quantiles,
+    select_order_statistics,
+    StreamingAccumulator,
+    WeatherReport,
+    weather_report,
+    render_report_plots,
+    NumericColumn,
+    CategoricalColumn,
+    calculate_exceedance,
+    Histogram,
+    plot_temperature_distribution,
+    plot_temperature_range_trends,
+    plot_temperature_vs_humidity,
+    PlotJob,
+    render_plots,
+    PlotCache
 )
 
 # -- Analytics --
@@ -145,6 +184,226 @@ class TestCalculateStatisticsStreaming:
             calculate_statistics_streaming(iter([]))
 
 
+class TestStreamingAccumulator:
+    """StreamingAccumulator tests"""
+
+    def test_matches_two_pass(self):
+        """Mean and variance match the textbook two pass results"""
+        values = [2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0]
+        accumulator = StreamingAccumulator()
+        for value in values:
+            accumulator.push(value)
+        result = accumulator.result()
+        assert result['mean'] == 5.0
+        assert result['variance'] == pytest.approx(32 / 7)
+        assert result['std'] == pytest.approx((32 / 7) ** 0.5)
+        assert (result['min'], result['max'], result['count']) == (2.0, 9.0, 8)
+
+    def test_merge_matches_single_pass(self):
+        """Merging partial accumulators gives the same answer as one pass over everything"""
+        rng = random.Random(7)
+        values = [rng.gauss(15, 5) for _ in range(10000)]
+        whole = StreamingAccumulator()
+        whole.push_many(values)
+
+        merged = StreamingAccumulator()
+        for start in range(0, len(values), 3000):
+            part = StreamingAccumulator()
+            part.push_many(values[start:start + 3000])
+            merged.merge(part)
+
+        assert merged.count == whole.count
+        assert merged.result()['mean'] == pytest.approx(whole.result()['mean'])
+        assert merged.variance() == pytest.approx(whole.variance())
+        assert (merged.min, merged.max) == (min(values), max(values))
+
+    def test_large_offset_is_stable(self):
+        """Variance stays accurate for values far from zero"""
+        accumulator = StreamingAccumulator()
+        accumulator.push_many([1e9 + value for value in (4.0, 7.0, 13.0, 16.0)])
+        assert accumulator.variance() == pytest.approx(30.0)
+
+    def test_float_buffer_matches_list(self):
+        """array('d') buffers (numpy summarized when installed) give the same answer as lists"""
+        rng = random.Random(3)
+        values = [rng.uniform(-10, 40) for _ in range(5000)]
+        from_list, from_buffer = StreamingAccumulator(), StreamingAccumulator()
+        from_list.push_many(values)
+        from_buffer.push_many(array('d', values))
+        assert from_buffer.count == from_list.count
+        assert from_buffer.total == pytest.approx(from_list.total)
+        assert from_buffer.variance() == pytest.approx(from_list.variance())
+        assert (from_buffer.min, from_buffer.max) == (from_list.min, from_list.max)
+
+    def test_pickle_round_trip(self):
+        """Partial states survive being sent between processes"""
+        accumulator = StreamingAccumulator()
+        accumulator.push_many([1.0, 2.0, 3.0])
+        restored = pickle.loads(pickle.dumps(accumulator))
+        assert restored.result() == accumulator.result()
+
+    def test_empty(self):
+        """An accumulator without values raises ValueError"""
+        with pytest.raises(ValueError, match="empty"):
+            StreamingAccumulator().result()
+
+
+class TestCalculatePercentiles:
+    """calculate_percentiles tests"""
+
+    def test_percentiles_interpolate(self):
+        """Percentiles interpolate between neighbours, 50 matches the median"""
+        result = calculate_percentiles([4, 1, 3, 2], [0, 25, 50, 100])
+        assert result == {0: 1, 25: 1.75, 50: 2.5, 100: 4}
+        assert result[50] == calculate_median([4, 1, 3, 2])
+
+    def test_percentiles_empty(self):
+        """Empty input raises ValueError"""
+        with pytest.raises(ValueError, match="empty"):
+            calculate_percentiles([], [50])
+
+
+class TestSelection:
+    """Selection based quantile tests"""
+
+    @pytest.fixture
+    def values(self):
+        """shuffled floats with duplicates"""
+        values = [float(i // 3) for i in range(9000)]
+        random.Random(3).shuffle(values)
+        return values
+
+    def test_select_matches_sort(self, values):
+        """Selected ranks match a full sort, the input order is untouched"""
+        before = list(values)
+        ranks = [0, 17, 4500, 8999, 4500]
+        ordered = sorted(values)
+        assert select_order_statistics(values, ranks) == [ordered[rank] for rank in ranks]
+        assert values == before
+
+    def test_many_ranks(self, values):
+        """Median, quartiles and deciles are selected in one descent, no rank cap"""
+        ranks = sorted({int(q * 8999) for q in (0.1, 0.2, 0.25, 0.3, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.9)})
+        ordered = sorted(values)
+        assert len(ranks) == 11
+        assert select_order_statistics(values, ranks) == [ordered[rank] for rank in ranks]
+        assert select_order_statistics(array('d', values), ranks) == [ordered[rank] for rank in ranks]
+
+        # big lists are bucketed around sampled pivots in one pass, duplicates included
+        rng = random.Random(12)
+        big = [float(rng.randint(0, 500)) + i % 7 / 8 for i in range(120000)]
+        ordered = sorted(big)
+        ranks = [0, 1, 60000, 59999, 119999] + [int(q * 119999) for q in (0.1, 0.25, 0.75, 0.9)]
+        assert select_order_statistics(big, ranks) == [ordered[rank] for rank in ranks]
+
+    def test_inplace_buffer(self, values):
+        """Float buffers are only reordered when inplace is asked for"""
+        buffer = array('d', values)
+        ranks = [0, 4500, 8999]
+        expected = select_order_statistics(buffer, ranks)
+        assert buffer == array('d', values)
+        assert select_order_statistics(buffer, ranks, inplace=True) == expected
+        assert sorted(buffer) == sorted(values)
+        assert calculate_median(array('d', values), inplace=True) == calculate_median(values)
+
+    def test_float_buffer_matches_list(self, values):
+        """array('d') buffers (numpy path when installed) give the same quantiles as lists"""
+        qs = [0.1, 0.25, 0.5, 0.75, 0.9]
+        assert calculate_quantiles(array('d', values), qs) == calculate_quantiles(values, qs)
+
+    def test_quantiles_interpolate(self):
+        """Quantiles interpolate between neighbours"""
+        assert calculate_quantiles([10, 40, 20, 30], [0, 0.5, 1]) == [10, 25.0, 40]
+
+    def test_sorted_input(self):
+        """Already sorted input doesn't break selection"""
+        values = list(range(20001))
+        assert calculate_median(values) == 10000
+        assert calculate_median(reversed(values)) == 10000
+
+    def test_rank_out_of_range(self):
+        """Out of range ranks raise IndexError"""
+        with pytest.raises(IndexError):
+            select_order_statistics([1, 2, 3], [3])
+
+    def test_dataset_quantiles(self):
+        """WeatherDataset answers several quantiles from its column buffer"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp\n')
+            # every tenth value is missing
+            f.write(''.join(f'X,{i}\n' if i % 10 else 'X,\n' for i in range(1, 101)))
+            temp_path = f.name
+
+        try:
+            result = WeatherDataset(temp_path).get_column_quantiles('MaxTemp', [0, 0.5, 1])
+            assert result == {0: 1.0, 0.5: 50.0, 1: 99.0}
+        finally:
+            os.unlink(temp_path)
+
+
+class TestKLLSketch:
+    """KLL quantile sketch tests"""
+
+    @pytest.fixture
+    def values(self):
+        """shuffled 0..49999"""
+        values = list(range(50000))
+        random.Random(7).shuffle(values)
+        return values
+
+    def test_rank_error_within_bound(self, values):
+        """Estimates land within the documented rank error"""
+        sketch = KLLSketch(seed=1)
+        sketch.push_many(values)
+        for q, estimate in zip([0.05, 0.5, 0.95, 0.99], sketch.quantiles([0.05, 0.5, 0.95, 0.99])):
+            assert abs(estimate / len(values) - q) < 0.0165
+        assert sketch.quantiles([0, 1]) == [0, 49999]
+        assert sketch.count == 50000
+
+    def test_fixed_memory(self, values):
+        """Retained values stay bounded no matter how many are pushed"""
+        sketch = KLLSketch(k=100, seed=1)
+        for value in values:
+            sketch.push(value)
+        assert sum(len(compactor) for compactor in sketch.compactors) < 500
+
+    def test_merge_pickled_parts(self, values):
+        """Sketches from separate chunks merge (after a pickle round trip) into one estimate"""
+        parts = [KLLSketch(seed=i) for i in range(4)]
+        for i, part in enumerate(parts):
+            part.push_many(values[i::4])
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(pickle.loads(pickle.dumps(part)))
+        assert merged.count == 50000
+        assert abs(merged.quantile(0.5) / 50000 - 0.5) < 0.0165
+
+    def test_empty_sketch(self):
+        """Empty sketches raise ValueError"""
+        with pytest.raises(ValueError, match="empty"):
+            KLLSketch().quantile(0.5)
+
+    def test_exact_until_compaction(self):
+        """Small inputs interpolate like calculate_quantiles"""
+        sketch = KLLSketch()
+        sketch.push_many([4.0, 1.0, 3.0, 2.0])
+        assert sketch.quantile(0.5) == calculate_median([1.0, 2.0, 3.0, 4.0]) == 2.5
+        assert sketch.quantiles([0.25, 0.9]) == calculate_quantiles([1.0, 2.0, 3.0, 4.0], [0.25, 0.9])
+
+    def test_lazy_matches_eager_small_file(self):
+        """Below k values, lazy streaming statistics equal the exact loaded ones"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as f:
+            f.write('MaxTemp\n3.0\n1.0\n4.0\n2.0\n')
+            temp_path = f.name
+        try:
+            eager = WeatherDataset(temp_path).get_column_statistics_streaming('MaxTemp')
+            lazy = WeatherDataset(temp_path, lazy_load=True).get_column_statistics_streaming('MaxTemp')
+            assert lazy['median'] == eager['median'] == 2.5
+            assert lazy['percentiles'] == pytest.approx(eager['percentiles'])
+        finally:
+            os.unlink(temp_path)
+
+
 # -- Data Cleaning ---
 
 class TestValidNumericValuesGenerator:
@@ -316,6 +575,386 @@ class TestLoadWeatherData:
             load_weather_data('missing_file.csv')
 
 
+class TestColumnProjection:
+    """Column projection tests"""
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """small csv with a few columns"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,MinTemp,Rainfall\n')
+            f.write('Sydney,28.5,18.0,5.2\n')
+            f.write('Melbourne,22.0,12.5,\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_generator_keeps_requested_columns(self, sample_csv_file):
+        """Only requested columns are returned, in requested order"""
+        rows = list(csv_row_generator(sample_csv_file, columns=['Rainfall', 'Location']))
+        assert rows == [{'Rainfall': 5.2, 'Location': 'Sydney'}, {'Rainfall': None, 'Location': 'Melbourne'}]
+
+    def test_unknown_column(self, sample_csv_file):
+        """Unknown columns raise ValueError before any rows are read"""
+        with pytest.raises(ValueError, match="not found"):
+            list(csv_row_generator(sample_csv_file, columns=['Humidity3pm']))
+
+    def test_column_batches(self, sample_csv_file):
+        """Column batches hold one list per projected column"""
+        batches = list(csv_column_batches(sample_csv_file, columns=['MaxTemp']))
+        assert batches == [(['MaxTemp'], [[28.5, 22.0]])]
+
+    def test_dataset_projection(self, sample_csv_file):
+        """Projected datasets only hold the requested columns"""
+        dataset = WeatherDataset(sample_csv_file, columns=['MaxTemp', 'MinTemp'])
+        assert dataset._data.column_names == ['MaxTemp', 'MinTemp']
+        assert dataset.get_column_statistics('MaxTemp')['mean'] == pytest.approx(25.25)
+        with pytest.raises(ValueError, match="not found"):
+            dataset.get_column('Location')
+
+    def test_projected_cache_not_used_for_full_load(self, sample_csv_file):
+        """A cache written for a projection doesn't serve loads needing other columns"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            WeatherDataset(sample_csv_file, columns=['MaxTemp'], cache=True, cache_dir=cache_dir)
+            assert load_cache(sample_csv_file, cache_dir, columns=['MaxTemp']) is not None
+            assert load_cache(sample_csv_file, cache_dir) is None
+            full = WeatherDataset(sample_csv_file, cache=True, cache_dir=cache_dir)
+            assert full.get_column('Location').categories == ['Sydney', 'Melbourne']
+
+
+class TestParallelLoad:
+    """Parallel byte range loading tests"""
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """csv big enough to split into several ranges"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,Rainfall\n')
+            for i in range(200):
+                f.write(f'Station{i % 7},{20 + i % 15}.5,{"" if i % 9 == 0 else i % 4}\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_ranges_align_to_lines(self, sample_csv_file):
+        """Every range starts right after a newline"""
+        with open(sample_csv_file, 'rb') as f:
+            content = f.read()
+        header_end = content.index(b'\n') + 1
+        ranges = data_loader.split_byte_ranges(sample_csv_file, header_end, 4, min_chunk_bytes=100)
+        assert len(ranges) == 4
+        assert ranges[0][0] == header_end
+        assert ranges[-1][1] == len(content)
+        assert all(content[start - 1:start] == b'\n' for start, _ in ranges)
+
+    def test_parallel_matches_serial(self, sample_csv_file, monkeypatch):
+        """Parallel load gives the same rows in the same order"""
+        monkeypatch.setattr(data_loader, 'MIN_CHUNK_BYTES', 100)
+        assert load_weather_data(sample_csv_file, workers=3) == load_weather_data(sample_csv_file)
+
+    def test_parallel_columns_match_serial(self, sample_csv_file, monkeypatch):
+        """Parallel columnar load stitches chunks back in order"""
+        monkeypatch.setattr(data_loader, 'MIN_CHUNK_BYTES', 100)
+        dataset = WeatherDataset(sample_csv_file, workers=3)
+        assert dataset.get_data() == load_weather_data(sample_csv_file)
+
+    def test_parallel_column_statistics(self, sample_csv_file, monkeypatch):
+        """Byte ranges summarized in workers give the same statistics as the serial pass"""
+        monkeypatch.setattr(data_loader, 'MIN_CHUNK_BYTES', 100)
+        accumulator, sketch = data_loader.accumulate_column(sample_csv_file, 'MaxTemp', workers=3)
+        serial = calculate_statistics_streaming(WeatherDataset(sample_csv_file).get_column('MaxTemp').valid_values())
+        assert accumulator.count == serial['count'] == len(sketch)
+        assert accumulator.result()['mean'] == pytest.approx(serial['mean'])
+        assert accumulator.variance() == pytest.approx(serial['variance'])
+
+    def test_parallel_empty_file(self):
+        """Parallel load raises ValueError for a header only file"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('name,temp\n')
+            temp_path = f.name
+
+        try:
+            with pytest.raises(ValueError, match="empty"):
+                load_weather_data(temp_path, workers=2)
+        finally:
+            os.unlink(temp_path)
+
+
+class TestSchema:
+    """Schema inference and per column converter tests"""
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """csv with a numeric, a categorical, and a mostly numeric column"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,Cloud9am\n')
+            f.write('Sydney,28.5,7\n')
+            f.write('Melbourne,,3\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_infer_schema(self, sample_csv_file):
+        """Types are inferred from a sample"""
+        schema = infer_csv_schema(sample_csv_file)
+        assert schema == {'Location': 'categorical', 'MaxTemp': 'numeric', 'Cloud9am': 'numeric'}
+
+    def test_declared_schema_keeps_text(self, sample_csv_file):
+        """Categorical columns keep numeric looking text as strings"""
+        schema = {'Location': 'categorical', 'MaxTemp': 'numeric', 'Cloud9am': 'categorical'}
+        rows = list(csv_row_generator(sample_csv_file, schema=schema))
+        assert rows[0] == {'Location': 'Sydney', 'MaxTemp': 28.5, 'Cloud9am': '7'}
+        assert rows[1]['MaxTemp'] is None
+
+    def test_bad_numeric_cell_falls_back(self, sample_csv_file):
+        """A cell that doesn't fit its declared type is kept as text instead of dropping the row"""
+        schema = {'Location': 'numeric', 'MaxTemp': 'numeric', 'Cloud9am': 'numeric'}
+        rows = list(csv_row_generator(sample_csv_file, schema=schema))
+        assert len(rows) == 2
+        assert rows[0]['Location'] == 'Sydney'
+        assert rows[0]['Cloud9am'] == 7.0
+
+    def test_unknown_type(self, sample_csv_file):
+        """Unknown column types raise ValueError"""
+        with pytest.raises(ValueError, match="Unknown type"):
+            list(csv_row_generator(sample_csv_file, schema={'MaxTemp': 'date'}))
+
+    def test_short_row_padded(self):
+        """Rows with missing trailing cells get None like csv.DictReader"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('a,b,c\n1,2\n')
+            temp_path = f.name
+
+        try:
+            rows = list(csv_row_generator(temp_path))
+            assert rows == [{'a': 1.0, 'b': 2.0, 'c': None}]
+        finally:
+            os.unlink(temp_path)
+
+
+class TestCategoricalColumns:
+    """Dictionary encoded / interned categorical column tests"""
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """csv with repeated station and rain flags"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,WindGustDir,RainToday,RainTomorrow\n')
+            f.write('Albury,,Yes,Yes\n')
+            f.write('Albury,,No,Yes\n')
+            f.write('Sydney,,Yes,No\n')
+            f.write('Sydney,NW,Yes,Yes\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_row_strings_are_shared(self, sample_csv_file):
+        """Repeated categorical values are the same str object in every row"""
+        rows = list(csv_row_generator(sample_csv_file))
+        assert rows[0]['Location'] is rows[1]['Location']
+        assert rows[0]['RainToday'] is rows[2]['RainToday'] is rows[3]['RainToday']
+
+    def test_known_columns_always_categorical(self):
+        """Known categorical columns aren't guessed numeric from an all empty sample"""
+        schema = infer_schema(['WindGustDir', 'MaxTemp'], [['', '20.0'], ['', '']])
+        assert schema == {'WindGustDir': 'categorical', 'MaxTemp': 'numeric'}
+
+    def test_dataset_rain_patterns_match_rows(self, sample_csv_file):
+        """Code based rain counts on a dataset match the row based counts"""
+        dataset = WeatherDataset(sample_csv_file)
+        rows = load_weather_data(sample_csv_file)
+        assert analyze_rain_patterns(dataset) == analyze_rain_patterns(rows)
+        assert analyze_rain_patterns(dataset) == {'rain_today': 3, 'rain_tomorrow': 3, 'consecutive_rain': 2,
+                                                  'total_days': 4}
+        assert count_rainy_days(dataset) == count_rainy_days(rows) == 3
+
+    def test_value_never_seen(self, sample_csv_file):
+        """A value missing from the dictionary matches no rows"""
+        dataset = WeatherDataset(sample_csv_file, columns=['RainToday', 'RainTomorrow'],
+                                 predicates=[ColumnPredicate('RainToday', '==', 'No')])
+        assert analyze_rain_patterns(dataset)['consecutive_rain'] == 0
+
+
+    def test_lazy_dataset_streams_rain_columns(self, sample_csv_file):
+        """A lazy dataset is counted from the streamed columns and stays unloaded"""
+        dataset = WeatherDataset(sample_csv_file, lazy_load=True)
+        rows = load_weather_data(sample_csv_file)
+        assert count_rainy_days(dataset) == count_rainy_days(rows) == 3
+        assert analyze_rain_patterns(dataset) == analyze_rain_patterns(rows)
+        assert not dataset.is_loaded()
+
+    def test_missing_rain_columns_match_nothing(self, sample_csv_file):
+        """A dataset without the rain columns counts zero rainy days, like its rows"""
+        for lazy_load in (False, True):
+            dataset = WeatherDataset(sample_csv_file, columns=['Location'], lazy_load=lazy_load)
+            assert count_rainy_days(dataset) == count_rainy_days(dataset.get_data()) == 0
+            assert analyze_rain_patterns(dataset) == analyze_rain_patterns(dataset.get_data())
+
+
+class TestCompressedInput:
+    """Compressed CSV input tests"""
+
+    CONTENT = 'Location,MaxTemp,Rainfall\nSydney,28.5,5.2\nAlbury,22.0,\nSydney,31.0,12.0\n'
+
+    @pytest.fixture(params=[('gzip', gzip.open), ('bz2', bz2.open), ('xz', lzma.open)])
+    def compressed_csv_file(self, request):
+        """same csv written with each compressor"""
+        compression, opener = request.param
+        fd, temp_path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        with opener(temp_path, 'wt', encoding='utf-8', newline='') as f:
+            f.write(self.CONTENT)
+
+        yield compression, temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_detect_compression(self, compressed_csv_file):
+        """Compression is detected from the magic bytes, not the file name"""
+        compression, path = compressed_csv_file
+        assert data_loader.detect_compression(path) == compression
+
+    def test_rows_match_plain_file(self, compressed_csv_file, sample_csv_file):
+        """Compressed files read the same rows as the plain file"""
+        _, path = compressed_csv_file
+        assert list(csv_row_generator(path)) == list(csv_row_generator(sample_csv_file))
+
+    def test_lazy_streaming_statistics(self, compressed_csv_file):
+        """Streaming stats work straight off a compressed file"""
+        _, path = compressed_csv_file
+        result = WeatherDataset(path, lazy_load=True).get_column_statistics_streaming('MaxTemp')
+        assert result['count'] == 3
+        assert result['max'] == 31.0
+
+    def test_parallel_falls_back_to_serial(self, compressed_csv_file):
+        """Asking for workers on a compressed file still loads every row"""
+        _, path = compressed_csv_file
+        assert len(load_weather_data(path, workers=2)) == 3
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """uncompressed copy of the same csv"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write(self.CONTENT)
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+class TestPredicatePushdown:
+    """Predicate pushdown tests"""
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """csv with a couple of stations"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,Rainfall\n')
+            f.write('Sydney,28.5,5.2\n')
+            f.write('Albury,22.0,\n')
+            f.write('Sydney,31.0,12.0\n')
+            f.write('Albury,35.5,0.0\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_raw_checks(self):
+        """Raw text checks treat empty and non numeric cells as missing"""
+        predicate = ColumnPredicate('Rainfall', '>=', 10)
+        assert predicate.matches_raw('12.5')
+        assert not predicate.matches_raw('2')
+        assert not predicate.matches_raw('')
+        assert not predicate.matches_raw('NA')
+        assert predicate({'Rainfall': 10.0})
+        assert not predicate({'Rainfall': None})
+
+    def test_batch_checks_match_single(self):
+        """matches_many agrees with matches value by value"""
+        values = [12.5, 2.0, None, float('nan'), '15', 'NA', 10]
+        for predicate in (ColumnPredicate('Rainfall', '>=', 10), ColumnPredicate('Rainfall', '==', 'NA')):
+            assert predicate.matches_many(values) == [predicate.matches(value) for value in values]
+
+    def test_numeric_predicate_skips_text(self, sample_csv_file):
+        """Numeric predicates never match text values, so datasets agree with the row filters"""
+        predicate = ColumnPredicate('Rainfall', '>=', 1.0)
+        assert not predicate.matches('15')
+        assert predicate.matches_many(['15', 15.0]) == [False, True]
+        schema = {'Location': 'categorical', 'MaxTemp': 'numeric', 'Rainfall': 'categorical'}
+        for lazy_load in (False, True):
+            dataset = WeatherDataset(sample_csv_file, schema=schema, lazy_load=lazy_load)
+            assert filter_by_rainfall_threshold(dataset, 1.0) == filter_by_rainfall_threshold(dataset.get_data(), 1.0) == []
+
+    def test_unknown_operator(self):
+        """Unknown operators raise ValueError"""
+        with pytest.raises(ValueError, match="Unknown operator"):
+            ColumnPredicate('Rainfall', '=>', 1.0)
+
+    def test_generator_filters_rows(self, sample_csv_file):
+        """Only matching rows are yielded, projections still apply"""
+        rows = list(csv_row_generator(sample_csv_file, columns=['MaxTemp'],
+                                      predicates=[ColumnPredicate('Location', '==', 'Sydney')]))
+        assert rows == [{'MaxTemp': 28.5}, {'MaxTemp': 31.0}]
+
+    def test_no_matches_is_not_an_error(self, sample_csv_file):
+        """A filter matching nothing yields nothing instead of raising"""
+        rows = list(csv_row_generator(sample_csv_file, predicates=[ColumnPredicate('Location', '==', 'Perth')]))
+        assert rows == []
+
+    def test_unknown_predicate_column(self, sample_csv_file):
+        """Predicates on unknown columns raise ValueError"""
+        with pytest.raises(ValueError, match="not found"):
+            list(csv_row_generator(sample_csv_file, predicates=[ColumnPredicate('Humidity', '>', 1.0)]))
+
+    def test_parallel_matches_serial(self, sample_csv_file, monkeypatch):
+        """Workers apply predicates the same way as the serial reader"""
+        monkeypatch.setattr(data_loader, 'MIN_CHUNK_BYTES', 10)
+        predicates = [ColumnPredicate('MaxTemp', '>', 25.0)]
+        assert (load_weather_data(sample_csv_file, workers=2, predicates=predicates)
+                == load_weather_data(sample_csv_file, predicates=predicates))
+
+    def test_lazy_and_eager_filter_rows_agree(self, sample_csv_file):
+        """filter_rows gives the same rows from the raw CSV and from loaded columns"""
+        predicates = (ColumnPredicate('Location', '==', 'Albury'), ColumnPredicate('MaxTemp', '>=', 30))
+        lazy = WeatherDataset(sample_csv_file, lazy_load=True).filter_rows(*predicates)
+        eager = WeatherDataset(sample_csv_file).filter_rows(*predicates)
+        assert lazy == eager
+        assert [row['MaxTemp'] for row in eager] == [35.5]
+
+    def test_filter_functions_accept_dataset(self, sample_csv_file):
+        """Filter functions push down into a dataset and match the list results"""
+        dataset = WeatherDataset(sample_csv_file, lazy_load=True)
+        rows = load_weather_data(sample_csv_file)
+        assert filter_by_location(dataset, 'Sydney') == filter_by_location(rows, 'Sydney')
+        assert filter_by_rainfall_threshold(dataset, 10.0) == filter_by_rainfall_threshold(rows, 10.0)
+
+    def test_filtered_dataset_cache(self, sample_csv_file):
+        """A cache built with predicates only serves the same predicates"""
+        predicates = [ColumnPredicate('Location', '==', 'Sydney')]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            dataset = WeatherDataset(sample_csv_file, cache=True, cache_dir=cache_dir, predicates=predicates)
+            assert dataset.get_row_count() == 2
+            assert load_cache(sample_csv_file, cache_dir) is None
+            assert load_cache(sample_csv_file, cache_dir, predicates=predicates).row_count == 2
+
+
 # -- WeatherDataset Tests --
 
 class TestWeatherDataset:
@@ -402,6 +1041,870 @@ class TestWeatherDataset:
         assert dataset._data is not None
         assert count == 3
 
+    def test_lazy_streaming_has_percentiles(self, sample_csv_file):
+        """Pure streaming estimates median and percentiles instead of returning None"""
+        lazy = WeatherDataset(sample_csv_file, lazy_load=True).get_column_statistics_streaming('MaxTemp')
+        eager = WeatherDataset(sample_csv_file).get_column_statistics_streaming('MaxTemp')
+        assert lazy['median'] == 28.5
+        assert eager['median'] == 28.5
+        assert set(lazy['percentiles']) == set(eager['percentiles']) == {5, 25, 50, 75, 95, 99}
+        # the few values fit in the sketch, so the estimates are the exact interpolated percentiles
+        assert lazy['percentiles'] == pytest.approx(eager['percentiles'])
+
+    def test_describe_numeric_columns(self, sample_csv_file):
+        """describe profiles every numeric column, categorical ones are left out"""
+        result = WeatherDataset(sample_csv_file).describe()
+        assert set(result) == {'MaxTemp', 'MinTemp', 'Rainfall'}
+        assert result['Rainfall']['count'] == 2
+        assert result['Rainfall']['nulls'] == 1
+        assert result['MaxTemp']['min'] == 22.0
+        assert result['MaxTemp']['max'] == 30.0
+        assert result['MaxTemp']['mean'] == pytest.approx(80.5 / 3)
+        assert result['MaxTemp']['percentiles'][50] == 28.5
+
+    def test_describe_lazy_matches_eager(self, sample_csv_file, monkeypatch):
+        """Lazy describe reads the file once and agrees with the loaded profile"""
+        eager = WeatherDataset(sample_csv_file).describe()
+        dataset = WeatherDataset(sample_csv_file, lazy_load=True)
+        opened = []
+        original = data_loader._parse_byte_range
+        monkeypatch.setattr(data_loader, '_parse_byte_range',
+                            lambda *args, **kwargs: opened.append(args[0]) or original(*args, **kwargs))
+        lazy = dataset.describe()
+        assert len(opened) == 1
+        assert dataset._data is None
+        for name, stats in eager.items():
+            assert lazy[name]['count'] == stats['count']
+            assert lazy[name]['nulls'] == stats['nulls']
+            assert lazy[name]['mean'] == pytest.approx(stats['mean'])
+            assert lazy[name]['std'] == pytest.approx(stats['std'])
+            assert (lazy[name]['min'], lazy[name]['max']) == (stats['min'], stats['max'])
+
+    def test_describe_same_columns_and_values_both_modes(self, monkeypatch):
+        """A numeric column holding text is left out in both modes, small columns get the same exact percentiles"""
+        monkeypatch.setattr(data_loader, 'MIN_CHUNK_BYTES', 10)
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('MaxTemp,Cloud\n1.0,1\n2.0,2\n3.0,x\n4.0,4\n')
+            temp_path = f.name
+        try:
+            schema = {'MaxTemp': 'numeric', 'Cloud': 'numeric'}
+            eager = WeatherDataset(temp_path, schema=schema).describe()
+            assert set(eager) == {'MaxTemp'}
+            assert eager['MaxTemp']['percentiles'] == {25: 1.75, 50: 2.5, 75: 3.25}
+            assert WeatherDataset(temp_path, schema=schema, lazy_load=True).describe() == eager
+            assert WeatherDataset(temp_path, schema=schema, lazy_load=True, workers=2).describe() == eager
+        finally:
+            os.unlink(temp_path)
+
+    def test_describe_empty_column(self):
+        """A numeric column without valid values gets None statistics"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,Rainfall\nSydney,\nPerth,\n')
+            temp_path = f.name
+        try:
+            result = WeatherDataset(temp_path, schema={'Location': 'categorical', 'Rainfall': 'numeric'}).describe()
+            assert result['Rainfall'] == {'count': 0, 'nulls': 2, 'mean': None, 'std': None, 'min': None,
+                                          'max': None, 'percentiles': {}}
+        finally:
+            os.unlink(temp_path)
+
+
+# -- Columnar Store Tests --
+
+class TestColumnarTable:
+    """ColumnarTable tests"""
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """small csv with a missing numeric value"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,RainToday\n')
+            f.write('Sydney,28.5,Yes\n')
+            f.write('Melbourne,,No\n')
+            f.write('Sydney,30.0,Yes\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_numeric_column_is_typed(self, sample_csv_file):
+        """Numeric columns are array('d') with a validity mask"""
+        table = load_weather_columns(sample_csv_file)
+        column = table.get_column('MaxTemp')
+        assert column.kind == 'numeric'
+        assert column.values.typecode == 'd'
+        assert list(column.valid) == [1, 0, 1]
+        assert list(column.valid_values()) == [28.5, 30.0]
+
+    def test_string_column_is_dictionary_encoded(self, sample_csv_file):
+        """String columns store codes and one copy of each distinct value"""
+        table = load_weather_columns(sample_csv_file)
+        column = table.get_column('Location')
+        assert column.kind == 'categorical'
+        assert column.categories == ['Sydney', 'Melbourne']
+        assert list(column.codes) == [0, 1, 0]
+
+    def test_rows_round_trip(self, sample_csv_file):
+        """Compatibility view matches the row generator"""
+        table = load_weather_columns(sample_csv_file)
+        assert table.to_rows() == list(csv_row_generator(sample_csv_file))
+
+    def test_mixed_column_promoted(self):
+        """A string in a numeric column switches it to categorical without losing values"""
+        table = ColumnarTable.from_rows([{'a': 1.0}, {'a': None}, {'a': 'x'}])
+        assert table.get_column('a').kind == 'categorical'
+        assert [row['a'] for row in table.iter_rows()] == [1.0, None, 'x']
+
+    def test_missing_column(self, sample_csv_file):
+        """Unknown columns raise ValueError"""
+        dataset = WeatherDataset(sample_csv_file)
+        with pytest.raises(ValueError, match="not found"):
+            dataset.get_column('Humidity3pm')
+
+    def test_extend_remaps_codes(self):
+        """Appending a table remaps category codes"""
+        first = ColumnarTable.from_rows([{'Location': 'Sydney'}])
+        second = ColumnarTable.from_rows([{'Location': 'Perth'}, {'Location': 'Sydney'}])
+        first.extend(second)
+        assert [row['Location'] for row in first.iter_rows()] == ['Sydney', 'Perth', 'Sydney']
+
+
+    def test_select_append_leaves_source(self):
+        """Appending to a selection copies its columns first, the source table doesn't change"""
+        table = ColumnarTable.from_rows([{'Location': 'Sydney', 'MaxTemp': 20.0},
+                                         {'Location': 'Perth', 'MaxTemp': 25.0},
+                                         {'Location': 'Sydney', 'MaxTemp': 30.0}])
+        selection = table.select(['MaxTemp', 'Location'])
+        selection.append_rows([{'MaxTemp': 9.0, 'Location': 'Hobart'}])
+        assert len(selection) == 4 and len(selection.get_column('MaxTemp')) == 4
+        assert table.row_count == 3
+        assert len(table.get_column('MaxTemp')) == len(table.get_column('Location')) == 3
+        assert table.get_column('Location').categories == ['Sydney', 'Perth']
+
+
+class TestColumnarCache:
+    """Binary columnar cache tests"""
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """small csv plus a cache dir"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,Rainfall\n')
+            f.write('Sydney,28.5,5.2\n')
+            f.write('Melbourne,22.0,\n')
+            temp_path = f.name
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            yield temp_path, cache_dir
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_second_load_uses_cache(self, sample_csv_file):
+        """Second load memory maps the cache and returns the same data"""
+        path, cache_dir = sample_csv_file
+        first = WeatherDataset(path, cache=True, cache_dir=cache_dir)
+        second = WeatherDataset(path, cache=True, cache_dir=cache_dir)
+        assert second._data.read_only
+        assert second.get_data() == first.get_data()
+        assert second.get_column_statistics('MaxTemp')['mean'] == pytest.approx(25.25)
+
+    def test_cache_stale_after_edit(self, sample_csv_file):
+        """Changing the CSV invalidates the cache"""
+        path, cache_dir = sample_csv_file
+        WeatherDataset(path, cache=True, cache_dir=cache_dir)
+        with open(path, 'a', newline='') as f:
+            f.write('Perth,35.0,0.0\n')
+        assert load_cache(path, cache_dir) is None
+        assert WeatherDataset(path, cache=True, cache_dir=cache_dir).get_row_count() == 3
+
+    def test_content_hash_mismatch(self, sample_csv_file):
+        """Content hash catches edits that keep size and mtime"""
+        path, cache_dir = sample_csv_file
+        WeatherDataset(path, cache=True, cache_dir=cache_dir, cache_content_hash=True)
+        stat = os.stat(path)
+        with open(path, 'r+', newline='') as f:
+            f.seek(len('Location,MaxTemp,Rainfall\n'))
+            f.write('Sydnee')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert load_cache(path, cache_dir) is not None
+        assert load_cache(path, cache_dir, content_hash=True) is None
+
+    def test_cached_table_accepts_appends(self, sample_csv_file):
+        """Memory mapped tables copy themselves before appending"""
+        path, cache_dir = sample_csv_file
+        WeatherDataset(path, cache=True, cache_dir=cache_dir)
+        table = load_cache(path, cache_dir)
+        table.append_row({'Location': 'Perth', 'MaxTemp': 35.0, 'Rainfall': None})
+        assert not table.read_only
+        assert table.get_column('Location').categories == ['Sydney', 'Melbourne', 'Perth']
+        assert len(table) == 3
+
+
+class TestFollowMode:
+    """Follow mode tests for CSV files that keep growing"""
+
+    @pytest.fixture
+    def growing_csv_file(self):
+        """csv whose last line is still being written"""
+        temp_dir = tempfile.mkdtemp()
+        temp_path = os.path.join(temp_dir, 'station.csv')
+        with open(temp_path, 'w', newline='') as f:
+            f.write('Location,MaxTemp\nSydney,20.0\nAlbury,2')
+
+        yield temp_path
+
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    @staticmethod
+    def append(path, text):
+        with open(path, 'a', newline='') as f:
+            f.write(text)
+
+    def test_first_load_matches_plain_load(self, growing_csv_file):
+        """A file without a final newline loads the same rows as a plain load"""
+        dataset = WeatherDataset(growing_csv_file, follow=True)
+        assert dataset.get_data() == load_weather_data(growing_csv_file)
+        assert [row['MaxTemp'] for row in dataset.get_data()] == [20.0, 2.0]
+        assert dataset.refresh() == 0
+
+    def test_partial_line_waits(self, growing_csv_file):
+        """An appended line without its newline waits until it is finished or the file stops changing"""
+        self.append(growing_csv_file, '5.0\n')
+        dataset = WeatherDataset(growing_csv_file, follow=True)
+        self.append(growing_csv_file, 'Perth,30.0\nHobart,1')
+        assert dataset.refresh() == 1
+        assert [row['MaxTemp'] for row in dataset.get_data()] == [20.0, 25.0, 30.0]
+        # unchanged since the last read, so the writer is done with it
+        assert dataset.refresh() == 1
+        assert dataset.get_data()[-1] == {'Location': 'Hobart', 'MaxTemp': 1.0}
+
+        # it was still being written after all: the stale row is replaced by a reload
+        self.append(growing_csv_file, '0.0\nDarwin,33.0\n')
+        assert dataset.refresh() == 5
+        assert [row['MaxTemp'] for row in dataset.get_data()] == [20.0, 25.0, 30.0, 10.0, 33.0]
+        self.append(growing_csv_file, 'Cairns,31.0')
+        assert dataset.refresh(flush=True) == 1
+        self.append(growing_csv_file, '\nBroome,35.0\n')
+        assert dataset.refresh() == 1
+        assert [row['Location'] for row in dataset.get_data()][-2:] == ['Cairns', 'Broome']
+
+    def test_running_statistics_update(self, growing_csv_file):
+        """Streaming stats taken before a refresh include the new rows afterwards"""
+        self.append(growing_csv_file, '5.0\n')
+        dataset = WeatherDataset(growing_csv_file, follow=True)
+        assert dataset.get_column_statistics_streaming('MaxTemp')['count'] == 2
+        self.append(growing_csv_file, 'Perth,30.0\n')
+        dataset.refresh()
+        result = dataset.get_column_statistics_streaming('MaxTemp')
+        assert result['count'] == 3
+        assert result['mean'] == pytest.approx(25.0)
+        assert result['max'] == 30.0
+
+    def test_running_quantiles_only_read_new_rows(self, growing_csv_file, monkeypatch):
+        """After a refresh the median and percentiles come from the running sketch, not a rescan of the column"""
+        self.append(growing_csv_file, '5.0\n')
+        dataset = WeatherDataset(growing_csv_file, follow=True)
+        dataset.get_column_statistics_streaming('MaxTemp')
+        self.append(growing_csv_file, 'Perth,30.0\nPerth,12.0\n')
+
+        scanned = []
+        original = NumericColumn.valid_array
+        monkeypatch.setattr(NumericColumn, 'valid_array', lambda column: scanned.append(len(column)) or original(column))
+        dataset.refresh()
+        result = dataset.get_column_statistics_streaming('MaxTemp')
+        assert scanned == [2]
+        assert result['median'] == calculate_median([20.0, 25.0, 30.0, 12.0])
+        assert result['percentiles'] == pytest.approx(calculate_percentiles([20.0, 25.0, 30.0, 12.0]))
+
+    def test_checkpoint_resumes(self, growing_csv_file, monkeypatch):
+        """A new dataset resumes from the saved checkpoint and only parses appended rows"""
+        self.append(growing_csv_file, '5.0\n')
+        WeatherDataset(growing_csv_file, follow=True, cache=True)
+        self.append(growing_csv_file, 'Perth,30.0\n')
+
+        parsed = []
+        original = data_loader._parse_text
+        monkeypatch.setattr(data_loader, '_parse_text', lambda text, *args: parsed.append(text) or original(text, *args))
+        dataset = WeatherDataset(growing_csv_file, follow=True, cache=True)
+        assert parsed == ['Perth,30.0\n']
+        assert dataset.get_row_count() == 3
+
+    def test_replaced_file_reloads(self, growing_csv_file):
+        """Rewriting the file from scratch triggers a full reload"""
+        dataset = WeatherDataset(growing_csv_file, follow=True, cache=True)
+        with open(growing_csv_file, 'w', newline='') as f:
+            f.write('Location,MaxTemp\nHobart,10.0\n')
+        assert dataset.refresh() == 1
+        assert dataset.get_data() == [{'Location': 'Hobart', 'MaxTemp': 10.0}]
+
+    def test_refresh_needs_follow(self, growing_csv_file):
+        """refresh() on a normal dataset raises ValueError"""
+        with pytest.raises(ValueError, match="follow"):
+            WeatherDataset(growing_csv_file).refresh()
+
+
+class TestPartitionedDataset:
+    """Directory / glob datasets with partition pruning"""
+
+    @pytest.fixture
+    def partition_dir(self):
+        """one csv per station, each covering a different year"""
+        temp_dir = tempfile.mkdtemp()
+        stations = [('Albury', 2015, 20.0), ('Sydney', 2016, 25.0), ('Perth', 2017, 30.0)]
+        for location, year, temp in stations:
+            with open(os.path.join(temp_dir, f'{location}.csv'), 'w', newline='') as f:
+                f.write('Date,Location,MaxTemp\n')
+                f.write(f'{year}-01-01,{location},{temp}\n')
+                f.write(f'{year}-06-01,{location},{temp + 1}\n')
+
+        yield temp_dir
+
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    @staticmethod
+    def record_opens(monkeypatch):
+        opened = []
+        original = data_loader.open_csv_file
+        monkeypatch.setattr(data_loader, 'open_csv_file',
+                            lambda file_path, *args, **kwargs: opened.append(os.path.basename(file_path))
+                            or original(file_path, *args, **kwargs))
+        return opened
+
+    def test_directory_loads_every_file(self, partition_dir):
+        """A directory is read as one dataset, files in name order"""
+        dataset = WeatherDataset(partition_dir)
+        assert dataset.get_row_count() == 6
+        assert dataset.get_column('Location').categories == ['Albury', 'Perth', 'Sydney']
+
+    def test_glob_pattern(self, partition_dir):
+        """Glob patterns pick the matching files only"""
+        dataset = WeatherDataset(os.path.join(partition_dir, 'S*.csv'))
+        assert [row['Location'] for row in dataset.get_data()] == ['Sydney', 'Sydney']
+
+    def test_manifest_row_count_without_loading(self, partition_dir, monkeypatch):
+        """Lazy datasets answer row counts from the manifest"""
+        dataset = WeatherDataset(partition_dir, lazy_load=True)
+        opened = self.record_opens(monkeypatch)
+        assert dataset.get_row_count() == 6
+        assert opened == []
+
+    def test_location_filter_opens_one_file(self, partition_dir, monkeypatch):
+        """filter_by_location only reads the partition holding that station"""
+        dataset = WeatherDataset(partition_dir, lazy_load=True)
+        opened = self.record_opens(monkeypatch)
+        result = filter_by_location(dataset, 'Sydney')
+        assert [row['MaxTemp'] for row in result] == [25.0, 26.0]
+        assert opened == ['Sydney.csv']
+
+    def test_date_range_pruning(self, partition_dir, monkeypatch):
+        """Date range predicates skip files whose dates are all out of range"""
+        dataset = WeatherDataset(partition_dir, lazy_load=True)
+        opened = self.record_opens(monkeypatch)
+        rows = dataset.filter_rows(ColumnPredicate('Date', '>=', '2016-03-01'))
+        assert [row['Date'] for row in rows] == ['2017-01-01', '2017-06-01', '2016-06-01']
+        assert opened == ['Perth.csv', 'Sydney.csv']
+
+    def test_manifest_reused(self, partition_dir, monkeypatch):
+        """Unchanged files aren't rescanned when the manifest is rebuilt"""
+        WeatherDataset(partition_dir, lazy_load=True)
+        opened = self.record_opens(monkeypatch)
+        monkeypatch.setattr('weather_analysis.partitions.open_csv_file', data_loader.open_csv_file)
+        WeatherDataset(partition_dir, lazy_load=True)
+        assert opened == []
+
+    def test_parallel_streaming_statistics(self, partition_dir):
+        """Files summarized in worker processes merge to the serial result"""
+        serial = WeatherDataset(partition_dir, lazy_load=True).get_column_statistics_streaming('MaxTemp')
+        parallel = WeatherDataset(partition_dir, lazy_load=True, workers=2).get_column_statistics_streaming('MaxTemp')
+        assert parallel['count'] == serial['count'] == 6
+        assert parallel['mean'] == pytest.approx(serial['mean'])
+        assert parallel['std'] == pytest.approx(serial['std'])
+        assert (parallel['min'], parallel['max']) == (20.0, 31.0)
+
+    def test_no_files(self):
+        """A directory without CSV files raises FileNotFoundError"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with pytest.raises(FileNotFoundError):
+                WeatherDataset(temp_dir)
+
+
+# -- Query Tests --
+
+class TestQuery:
+    """Lazy query builder on WeatherDataset"""
+
+    @pytest.fixture
+    def query_csv_file(self):
+        """stations with a mix of hot, windy and rainy days"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,MinTemp,Rainfall,WindGustSpeed\n')
+            f.write('Darwin,36.0,25.0,12.0,65.0\n')
+            f.write('Darwin,37.0,26.0,3.0,70.0\n')
+            f.write('Perth,38.0,20.0,15.0,40.0\n')
+            f.write('Hobart,18.0,8.0,20.0,80.0\n')
+            f.write('Darwin,35.5,,11.0,62.0\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    @staticmethod
+    def hot_windy_rain(dataset):
+        return (dataset.query()
+                .where('Rainfall', '>=', 10.0)
+                .where(ColumnPredicate('WindGustSpeed', '>=', 60.0), ColumnPredicate('MaxTemp', '>=', 35.0))
+                .select('Location', 'Rainfall'))
+
+    def test_chained_filters_match_helpers(self, query_csv_file):
+        """A chained query gives the rows the three filter helpers give, for loaded and lazy datasets"""
+        rows = filter_high_temperature_days(
+            filter_windy_days(filter_by_rainfall_threshold(load_weather_data(query_csv_file), 10.0), 60.0), 35.0)
+        expected = [{'Location': row['Location'], 'Rainfall': row['Rainfall']} for row in rows]
+        assert self.hot_windy_rain(WeatherDataset(query_csv_file)).rows() == expected
+        assert self.hot_windy_rain(WeatherDataset(query_csv_file, lazy_load=True)).rows() == expected
+        assert expected == [{'Location': 'Darwin', 'Rainfall': 12.0}, {'Location': 'Darwin', 'Rainfall': 11.0}]
+
+    def test_pushdown_into_reader(self, query_csv_file, monkeypatch):
+        """Lazy queries hand the needed columns and the predicates to the CSV reader"""
+        calls = []
+        original = data_loader.csv_column_batches
+        monkeypatch.setattr('weather_analysis.weather_dataset.csv_column_batches',
+                            lambda file_path, **kwargs: calls.append(kwargs) or original(file_path, **kwargs))
+        self.hot_windy_rain(WeatherDataset(query_csv_file, lazy_load=True)).rows()
+        assert calls[0]['columns'] == ['Location', 'Rainfall']
+        assert [predicate.column for predicate in calls[0]['predicates']] == ['Rainfall', 'WindGustSpeed', 'MaxTemp']
+
+    def test_map_filter_and_aggregate(self, query_csv_file):
+        """Derived columns can be filtered and aggregated in the same pass"""
+        query = (WeatherDataset(query_csv_file).query()
+                 .map('TempRange', lambda high, low: high - low, 'MaxTemp', 'MinTemp')
+                 .where('TempRange', '>', 10.0))
+        result = query.agg(days='count', widest=('TempRange', 'max'), rain=('Rainfall', 'sum'),
+                           mean_range=('TempRange', 'mean'))
+        assert result == {'days': 3, 'widest': 18.0, 'rain': 30.0, 'mean_range': pytest.approx(40.0 / 3)}
+        assert query.where('Location', '==', 'Perth').select('Location', 'TempRange').rows() == [
+            {'Location': 'Perth', 'TempRange': 18.0}]
+
+    def test_plan_is_reusable(self, query_csv_file):
+        """Each step returns a new query, the base one is unchanged"""
+        base = WeatherDataset(query_csv_file).query().where('Location', '==', 'Darwin')
+        assert base.where('Rainfall', '>=', 10.0).count() == 2
+        assert base.count() == 3
+        assert WeatherDataset(query_csv_file).query().count() == 5
+        assert 'pushed down' in base.explain()
+
+    def test_unknown_aggregate(self, query_csv_file):
+        """Unknown aggregate functions raise ValueError"""
+        with pytest.raises(ValueError, match="Unknown aggregate"):
+            WeatherDataset(query_csv_file).query().agg(x=('MaxTemp', 'mode'))
+
+
+# -- Index Tests --
+
+class TestIndexes:
+    """Secondary indexes on loaded datasets"""
+
+    @pytest.fixture
+    def indexed_csv_file(self):
+        """a few hundred rows with repeats, missing values and several stations"""
+        rng = random.Random(11)
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,WindGustSpeed\n')
+            for _ in range(300):
+                temp = '' if rng.random() < 0.1 else str(rng.choice([20.0, 35.0, 35.5, 40.0, rng.uniform(10, 45)]))
+                f.write(f"{rng.choice(['Albury', 'Darwin', 'Perth', ''])},{temp},{rng.randint(20, 90)}\n")
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_lookups_match_scans(self, indexed_csv_file):
+        """Every operator gives the same rows with and without an index"""
+        plain = WeatherDataset(indexed_csv_file)
+        indexed = WeatherDataset(indexed_csv_file)
+        assert indexed.create_index('MaxTemp').kind == 'sorted'
+        assert indexed.create_index('Location').kind == 'hash'
+        for op in ('==', '!=', '>=', '>', '<=', '<'):
+            for predicate in (ColumnPredicate('MaxTemp', op, 35.0), ColumnPredicate('Location', op, 'Darwin')):
+                assert indexed.filter_rows(predicate) == plain.filter_rows(predicate)
+
+    def test_filters_use_index(self, indexed_csv_file, monkeypatch):
+        """filter helpers and queries answer indexed predicates without scanning the column"""
+        dataset = WeatherDataset(indexed_csv_file)
+        expected_hot = filter_high_temperature_days(dataset, 35.0)
+        expected_darwin = filter_by_location(dataset, 'Darwin')
+        dataset.create_index('MaxTemp')
+        dataset.create_index('Location')
+
+        def no_scan(*args, **kwargs):
+            raise AssertionError("column was scanned")
+        monkeypatch.setattr(NumericColumn, 'matching_rows', no_scan)
+        monkeypatch.setattr(CategoricalColumn, 'matching_rows', no_scan)
+        assert filter_high_temperature_days(dataset, 35.0) == expected_hot
+        assert filter_by_location(dataset, 'Darwin') == expected_darwin
+        assert (dataset.query().where('MaxTemp', '>=', 35.0).where('Location', '==', 'Darwin').count()
+                == len([row for row in expected_hot if row['Location'] == 'Darwin']))
+
+    def test_mixed_indexed_and_scanned(self, indexed_csv_file):
+        """Unindexed predicates only check the rows the index picked"""
+        plain = WeatherDataset(indexed_csv_file)
+        indexed = WeatherDataset(indexed_csv_file)
+        indexed.create_index('Location')
+        predicates = (ColumnPredicate('Location', '==', 'Perth'), ColumnPredicate('WindGustSpeed', '>=', 60.0))
+        assert indexed.filter_rows(*predicates) == plain.filter_rows(*predicates)
+
+    def test_rebuilt_after_refresh(self):
+        """Rows appended in follow mode show up in indexed lookups"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'station.csv')
+            with open(path, 'w', newline='') as f:
+                f.write('Location,MaxTemp\nSydney,36.0\nAlbury,20.0\n')
+            dataset = WeatherDataset(path, follow=True)
+            dataset.create_index('MaxTemp')
+            assert len(filter_high_temperature_days(dataset, 35.0)) == 1
+            with open(path, 'a', newline='') as f:
+                f.write('Perth,39.0\n')
+            dataset.refresh()
+            assert [row['Location'] for row in filter_high_temperature_days(dataset, 35.0)] == ['Sydney', 'Perth']
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestExceedance:
+    """Threshold sweeps answering many count above threshold queries in one pass"""
+
+    @pytest.fixture
+    def sample_csv_file(self):
+        """stations with repeats and missing temperatures"""
+        rng = random.Random(5)
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp\n')
+            for _ in range(120):
+                temp = '' if rng.random() < 0.1 else str(rng.choice([25.0, 30.0, round(rng.uniform(15, 40), 1)]))
+                f.write(f"{rng.choice(['Albury', 'Darwin', 'Perth', ''])},{temp}\n")
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_counts_match_comparisons(self):
+        """Counts and fractions equal a comparison per threshold, inclusive or not, in the given order"""
+        values = [i / 4 for i in range(200)] * 2
+        thresholds = [30.0, 0.0, 12.25, 100.0, -1.0]
+        for inclusive in (True, False):
+            result = calculate_exceedance(values, thresholds, inclusive=inclusive)
+            expected = [sum(1 for v in values if (v >= t if inclusive else v > t)) for t in thresholds]
+            assert result['counts'] == expected
+            assert result['fractions'] == [count / len(values) for count in expected]
+            assert result['total'] == len(values)
+            # numpy searchsorted path for big float buffers
+            assert calculate_exceedance(array('d', values * 10), thresholds, inclusive=inclusive)['counts'] == \
+                [count * 10 for count in expected]
+
+    def test_empty_values(self):
+        """No values means zero counts, not an error"""
+        assert calculate_exceedance([], [1.0, 2.0]) == {'thresholds': [1.0, 2.0], 'counts': [0, 0],
+                                                        'fractions': [0.0, 0.0], 'total': 0}
+
+    def test_dataset_matches_filters(self, sample_csv_file):
+        """Eager and lazy datasets give the same counts as one filter scan per threshold"""
+        thresholds = [20.0, 25.0, 30.0, 35.0]
+        for lazy in (False, True):
+            dataset = WeatherDataset(sample_csv_file, lazy_load=lazy)
+            result = dataset.exceedance('MaxTemp', thresholds)
+            assert result['counts'] == [len(filter_high_temperature_days(dataset, t)) for t in thresholds]
+
+    def test_by_location_with_row_ids(self, sample_csv_file):
+        """Per group counts add up and row ids point at the matching rows, with or without an index"""
+        dataset = WeatherDataset(sample_csv_file)
+        rows = dataset.get_data()
+        overall = dataset.exceedance('MaxTemp', [25.0, 30.0], row_ids=True)
+        for threshold, row_ids in zip([25.0, 30.0], overall['row_ids']):
+            assert row_ids == [i for i, row in enumerate(rows)
+                               if row['MaxTemp'] is not None and row['MaxTemp'] >= threshold]
+        dataset.create_index('MaxTemp')
+        assert dataset.exceedance('MaxTemp', [25.0, 30.0], row_ids=True) == overall
+
+        by_location = dataset.exceedance('MaxTemp', [25.0, 30.0], by='Location', row_ids=True)
+        assert by_location == WeatherDataset(sample_csv_file, lazy_load=True).exceedance(
+            'MaxTemp', [25.0, 30.0], by='Location', row_ids=True)
+        # rows without a Location are left out of the groups
+        assert sorted(by_location) == ['Albury', 'Darwin', 'Perth']
+        for location, group in by_location.items():
+            for row_ids, overall_ids, count in zip(group['row_ids'], overall['row_ids'], group['counts']):
+                assert row_ids == [i for i in overall_ids if rows[i]['Location'] == location]
+                assert len(row_ids) == count
+
+    def test_non_numeric_column(self, sample_csv_file):
+        with pytest.raises(ValueError):
+            WeatherDataset(sample_csv_file).exceedance('Location', [1.0])
+
+
+class TestGroupBy:
+    """Single pass hash aggregation per group"""
+
+    @pytest.fixture
+    def grouped_csv_file(self):
+        """a couple of months of readings at three stations, some values and keys missing"""
+        rng = random.Random(19)
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Date,Location,WindGustDir,MaxTemp,Rainfall\n')
+            for day in range(400):
+                rain = '' if rng.random() < 0.1 else str(rng.choice([0.0, round(rng.uniform(0, 30), 1)]))
+                f.write(f"2016-{day % 3 + 1:02d}-{day % 28 + 1:02d},{rng.choice(['Albury', 'Darwin', 'Perth', ''])},"
+                        f"{rng.choice(['N', 'S'])},{round(rng.uniform(10, 45), 1)},{rain}\n")
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_matches_per_station_filters(self, grouped_csv_file):
+        """One pass gives what filtering each station and aggregating it gives"""
+        dataset = WeatherDataset(grouped_csv_file)
+        result = dataset.group_by('Location', days='count', rain=('Rainfall', 'sum'), wet=('Rainfall', 'count'),
+                                  hottest=('MaxTemp', 'max'), mean=('MaxTemp', 'mean'), median=('MaxTemp', 'median'))
+        # rows without a Location are left out
+        assert sorted(result) == ['Albury', 'Darwin', 'Perth']
+        for location, group in result.items():
+            rows = filter_by_location(dataset, location)
+            temps = [row['MaxTemp'] for row in rows]
+            rain = [row['Rainfall'] for row in rows if row['Rainfall'] is not None]
+            assert group['days'] == len(rows)
+            assert group['wet'] == len(rain)
+            assert group['rain'] == pytest.approx(sum(rain))
+            assert group['hottest'] == max(temps)
+            assert group['mean'] == pytest.approx(calculate_mean(temps))
+            # small groups fit in the sketch, so the median is exact
+            assert group['median'] == pytest.approx(calculate_median(temps))
+
+    def test_lazy_parallel_and_loaded_agree(self, grouped_csv_file, monkeypatch):
+        """Partial aggregates of byte ranges in worker processes merge to the in process result"""
+        monkeypatch.setattr(data_loader, 'MIN_CHUNK_BYTES', 100)
+        aggregates = {'days': 'count', 'rain': ('Rainfall', 'sum'), 'spread': ('MaxTemp', 'std')}
+        keys = ['Location', 'WindGustDir']
+        expected = WeatherDataset(grouped_csv_file).group_by(keys, **aggregates)
+        assert all(isinstance(key, tuple) and len(key) == 2 for key in expected)
+        for workers in (1, 2):
+            result = WeatherDataset(grouped_csv_file, lazy_load=True, workers=workers).group_by(keys, **aggregates)
+            assert result.keys() == expected.keys()
+            for key, group in result.items():
+                assert group == pytest.approx(expected[key])
+
+    def test_query_derived_keys(self, grouped_csv_file):
+        """Query groups can use mapped columns, e.g. per station per month, after pushed down filters"""
+        dataset = WeatherDataset(grouped_csv_file)
+        result = (dataset.query()
+                  .where('Rainfall', '>', 0.0)
+                  .map('Month', lambda date: date[:7], 'Date')
+                  .group_by('Location', 'Month')
+                  .agg(days='count', rain=('Rainfall', 'sum')))
+        assert len(result) == 9
+        rows = filter_by_rainfall_threshold(dataset, 0.000001)
+        albury_feb = [row['Rainfall'] for row in rows
+                      if row['Location'] == 'Albury' and row['Date'].startswith('2016-02')]
+        assert result[('Albury', '2016-02')] == {'days': len(albury_feb), 'rain': pytest.approx(sum(albury_feb))}
+
+    def test_invalid_aggregates(self, grouped_csv_file):
+        dataset = WeatherDataset(grouped_csv_file)
+        with pytest.raises(ValueError, match="Unknown aggregate"):
+            dataset.group_by('Location', x=('MaxTemp', 'mode'))
+        with pytest.raises(ValueError, match="quantile"):
+            dataset.group_by('Location', x=('MaxTemp', 'quantile', 1.5))
+
+
+class TestTimeSeries:
+    """Per station time index and rolling / windowed statistics"""
+
+    @pytest.fixture
+    def daily_csv_file(self):
+        """two stations interleaved and out of date order, with a gap and missing values"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Date,Location,MaxTemp,Rainfall\n')
+            f.write('2016-01-03,Albury,30.0,2.0\n')
+            f.write('2016-01-01,Albury,20.0,1.0\n')
+            f.write('2016-01-01,Darwin,35.0,\n')
+            f.write('2016-01-02,Albury,25.0,\n')
+            f.write('2016-01-02,Darwin,33.0,10.0\n')
+            f.write('2016-01-06,Albury,,4.0\n')
+            f.write('2016-01-07,Albury,22.0,8.0\n')
+            f.write('not a date,Darwin,40.0,1.0\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_rolling_matches_recomputing_windows(self):
+        """Every function equals recomputing each window from scratch, with gaps and missing values"""
+        rng = random.Random(20)
+        days = sorted(rng.sample(range(200), 120))
+        values = [None if rng.random() < 0.1 else rng.uniform(-5, 40) for _ in days]
+        functions = {'sum': sum, 'mean': lambda w: sum(w) / len(w), 'count': len, 'min': min, 'max': max}
+        for how, function in functions.items():
+            expected = []
+            for day in days:
+                window = [value for other, value in zip(days, values) if day - 7 < other <= day and value is not None]
+                expected.append(function(window) if len(window) >= 2 else None)
+            assert rolling(days, values, 7, how, min_periods=2) == pytest.approx(expected)
+
+    def test_ewma_decays_over_gaps(self):
+        """A gap of two days decays the old average like two steps"""
+        assert ewma([1, 2, 4], [10.0, 20.0, 0.0], alpha=0.5) == [10.0, 15.0, 3.75]
+        assert ewma([1, 2], [None, 8.0], alpha=0.5) == [None, 8.0]
+        with pytest.raises(ValueError):
+            ewma([1], [1.0], alpha=0)
+
+    def test_time_index_per_station(self, daily_csv_file):
+        """Rows are split by station and sorted by date, unparsable dates are left out"""
+        dataset = WeatherDataset(daily_csv_file)
+        index = dataset.time_index()
+        assert index.dates('Albury') == ['2016-01-01', '2016-01-02', '2016-01-03', '2016-01-06', '2016-01-07']
+        assert list(index.rows['Darwin']) == [2, 4]
+        assert dataset.time_index() is index
+
+    def test_dataset_rolling_and_ewma(self, daily_csv_file):
+        """Windows cover calendar days per station"""
+        dataset = WeatherDataset(daily_csv_file, lazy_load=True)
+        rain = dataset.rolling('Rainfall', 3, 'sum')
+        assert rain['Albury'] == {'dates': ['2016-01-01', '2016-01-02', '2016-01-03', '2016-01-06', '2016-01-07'],
+                                  'values': [1.0, 1.0, 3.0, 4.0, 12.0]}
+        assert rain['Darwin']['values'] == [None, 10.0]
+        assert dataset.rolling('MaxTemp', 2, 'max')['Albury']['values'] == [20.0, 25.0, 30.0, None, 22.0]
+        assert dataset.ewma('MaxTemp', span=3)['Darwin']['values'] == [35.0, 34.0]
+        assert dataset.rolling('MaxTemp', 30, by=None)['values'][-1] == pytest.approx(27.5)
+
+    def test_missing_date_column(self, daily_csv_file):
+        """Datasets without dates can't be indexed by time"""
+        with pytest.raises(ValueError, match="not found"):
+            WeatherDataset(daily_csv_file, columns=['Location', 'MaxTemp']).rolling('MaxTemp', 7)
+
+
+# -- Report Tests --
+
+class TestWeatherReport:
+    """Fused single pass report engine"""
+
+    @pytest.fixture
+    def report_csv_file(self):
+        """csv with every column the standard report reads, some cells missing"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,MinTemp,Rainfall,WindGustSpeed,Humidity3pm,Pressure9am,RainToday,RainTomorrow\n')
+            f.write('Sydney,36.0,20.0,12.0,65.0,40.0,1010.0,Yes,Yes\n')
+            f.write('Sydney,25.0,15.0,0.0,30.0,55.0,1018.0,No,Yes\n')
+            f.write('Perth,,12.0,3.5,,70.0,1012.0,Yes,No\n')
+            f.write('Perth,38.5,22.0,,70.0,,1015.0,No,\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_matches_separate_functions(self, report_csv_file):
+        """One report pass gives what the separate functions give"""
+        rows = load_weather_data(report_csv_file)
+        results = weather_report().run(WeatherDataset(report_csv_file))
+        assert results['row_count'] == 4
+        assert results['rain_patterns'] == analyze_rain_patterns(rows)
+        assert results['max_temp'].max == find_max_temperature(rows)
+        assert results['min_temp'].min == find_min_temperature(rows)
+        assert results['rainfall'].total == calculate_total_rainfall(rows)
+        assert results['hot_days'] == len(filter_high_temperature_days(rows, 35.0))
+        assert results['heavy_rain_days'] == len(filter_by_rainfall_threshold(rows, 10.0))
+        assert results['windy_days'] == len(filter_windy_days(rows, 60.0))
+        assert (results['max_temps'].count, results['max_temps'].min, results['max_temps'].max) == (3, 25.0, 38.5)
+        assert sum(results['rainfall_amounts'].counts) == 2
+        assert list(results['rainy_pressure']) == [1010.0, 1012.0]
+        temp_ranges = extract_temperature_range(rows)
+        assert results['temp_range'].mean == pytest.approx(sum(temp_ranges) / len(temp_ranges))
+
+    def test_sources_agree(self, report_csv_file):
+        """Loaded datasets, lazy datasets and row dicts give the same results"""
+        loaded = WeatherReport({'rain': RainPatterns(), 'pairs': CollectPairs('MaxTemp', 'Humidity3pm')}).run(
+            WeatherDataset(report_csv_file))
+        lazy = WeatherReport({'rain': RainPatterns(), 'pairs': CollectPairs('MaxTemp', 'Humidity3pm')}).run(
+            WeatherDataset(report_csv_file, lazy_load=True))
+        rows = WeatherReport({'rain': RainPatterns(), 'pairs': CollectPairs('MaxTemp', 'Humidity3pm')}).run(
+            load_weather_data(report_csv_file), batch_size=3)
+        assert loaded['rain'] == lazy['rain'] == rows['rain']
+        assert loaded['pairs'] == lazy['pairs'] == rows['pairs'] == (array('d', [36.0, 25.0]), array('d', [40.0, 55.0]))
+
+    def test_rain_patterns_compare_codes(self, report_csv_file):
+        """Loaded data is counted on category codes, the 'Yes' strings aren't compared per row"""
+        dataset = WeatherDataset(report_csv_file)
+        task = RainPatterns()
+        result = WeatherReport({'rain': task}).run(dataset)
+        assert task.codes is not None
+        assert result['rain'] == analyze_rain_patterns(dataset) == analyze_rain_patterns(load_weather_data(report_csv_file))
+        lazy_task = RainPatterns()
+        WeatherReport({'rain': lazy_task}).run(WeatherDataset(report_csv_file, lazy_load=True))
+        assert lazy_task.codes is None
+
+    def test_tasks_are_abstract(self):
+        """A task without update and result can't be built"""
+        with pytest.raises(TypeError):
+            ReportTask()
+
+    def test_only_needed_columns_read(self, report_csv_file, monkeypatch):
+        """Lazy datasets only convert the columns the tasks read, in one pass"""
+        calls = []
+        original = data_loader.csv_column_batches
+        monkeypatch.setattr('weather_analysis.weather_dataset.csv_column_batches',
+                            lambda file_path, **kwargs: calls.append(kwargs['columns']) or original(file_path, **kwargs))
+        report = WeatherReport().add('wind', CountWhere(ColumnPredicate('WindGustSpeed', '>=', 60.0)))
+        assert report.run(WeatherDataset(report_csv_file, lazy_load=True)) == {'wind': 2}
+        assert calls == [['WindGustSpeed']]
+
+    def test_render_plots(self, report_csv_file):
+        """The standard plots are drawn from the collected arrays"""
+        report = weather_report()
+        report.run(WeatherDataset(report_csv_file))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            saved = render_report_plots(report, temp_dir)
+            assert len(saved) == 6
+            assert all(os.path.exists(path) for path in saved)
+
+
+    def test_render_plots_in_workers(self, report_csv_file):
+        """Worker processes save the same plots"""
+        report = weather_report()
+        report.run(WeatherDataset(report_csv_file))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            saved = render_report_plots(report, temp_dir, workers=2)
+            assert len(saved) == 6
+            assert all(os.path.getsize(path) > 0 for path in saved)
+
+    def test_render_plots_reports_errors_per_job(self):
+        """A failing job gets an error and timing, the other jobs still render"""
+        histogram = Histogram(10)
+        histogram.push_many([1.0, 2.0, 2.5, 7.0])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            good = os.path.join(temp_dir, 'good.png')
+            jobs = [
+                PlotJob(os.path.join(temp_dir, 'bad.png'), save_histogram, None, xlabel='x', title='bad'),
+                PlotJob(good, save_histogram, histogram, xlabel='x', title='good'),
+            ]
+            results = render_plots(jobs)
+            assert [result['output_path'] for result in results] == [job.output_path for job in jobs]
+            assert results[0]['error'] is not None
+            assert results[1]['error'] is None
+            assert results[1]['function'] == 'save_histogram'
+            assert results[1]['seconds'] >= 0
+            assert os.path.exists(good)
+
 
 # -- Visualization Module Tests --
 
@@ -509,6 +2012,272 @@ class TestAggregateFunctions:
         assert result == 8.0
 
 
+
+class TestHistogram:
+    """Streaming histograms feeding the plot functions"""
+
+    @staticmethod
+    def recount(histogram, values):
+        """count values into the histogram's final bins the slow way"""
+        counts = [0] * histogram.bins
+        for value in values:
+            counts[min(int((value - histogram.low) / histogram.width), histogram.bins - 1)] += 1
+        return counts
+
+    def test_fixed_bins(self):
+        """Fixed ranges count like numpy.histogram, values outside are only counted as outside"""
+        histogram = Histogram(4, value_range=(0, 8))
+        histogram.push_many([0.0, 1.9, 2.0, 7.99, 8.0, 9.0, -1.0, None, float('nan')])
+        assert histogram.counts == [2, 1, 0, 2]
+        assert (histogram.count, histogram.outside) == (5, 2)
+        assert histogram.edges == [0.0, 2.0, 4.0, 6.0, 8.0]
+
+    def test_adaptive_growth_is_exact(self):
+        """Widening the bins while streaming keeps every value in the bin that holds it"""
+        rng = random.Random(21)
+        values = [rng.gauss(20, 8) for _ in range(5000)] + [-40.0, 90.0]
+        histogram = Histogram(20)
+        histogram.push_many(iter(values), batch_size=100)
+        assert histogram.count == len(values)
+        assert histogram.low <= min(values) and histogram.high >= max(values)
+        assert histogram.counts == self.recount(histogram, values)
+        # float buffers (numpy path when installed) bin the same way
+        buffered = Histogram(20)
+        buffered.push_many(array('d', values))
+        assert buffered.counts == self.recount(buffered, values)
+
+    def test_merge(self):
+        """Merging chunk histograms gives the totals, exactly for matching grids"""
+        rng = random.Random(22)
+        values = [rng.uniform(0, 50) for _ in range(1000)]
+        whole = Histogram(10, value_range=(0, 50))
+        whole.push_many(values)
+        left, right = Histogram(10, value_range=(0, 50)), Histogram(10, value_range=(0, 50))
+        left.push_many(values[:300])
+        right.push_many(values[300:])
+        assert left.merge(right).counts == whole.counts
+
+        adaptive, other = Histogram(10), Histogram(10)
+        adaptive.push_many(values[:500])
+        other.push_many([value * 2 for value in values[500:]])
+        adaptive.merge(other)
+        assert adaptive.count == sum(adaptive.counts) == 1000
+        assert adaptive.max == max(values[500:]) * 2
+
+    def test_trimmed_combines_bins(self):
+        histogram = Histogram(8, value_range=(0, 8))
+        histogram.push_many([1.5, 2.5, 3.5, 3.6, 6.5])
+        assert histogram.trimmed() == ([1.0, 2.0, 3.0, 4.0, 5.0, 6.0], [1, 1, 2, 0, 0, 1], 1.0)
+        assert histogram.trimmed(max_bins=3) == ([1.0, 3.0, 5.0], [2, 2, 1], 2.0)
+
+    def test_plots_stream_datasets(self, monkeypatch):
+        """Histogram plots read lazy datasets a batch at a time and draw pre-binned bars"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'weather.csv')
+            with open(path, 'w', newline='') as f:
+                f.write('MaxTemp,MinTemp\n')
+                for i in range(300):
+                    f.write(f"{20 + i % 15},{10 + i % 7}\n")
+            drawn = []
+            monkeypatch.setattr('matplotlib.pyplot.bar',
+                                lambda lefts, counts, **kwargs: drawn.append(sum(counts)))
+            monkeypatch.setattr('matplotlib.pyplot.hist',
+                                lambda *args, **kwargs: pytest.fail("values were binned twice"))
+            dataset = WeatherDataset(path, lazy_load=True)
+            plot_temperature_distribution(dataset, os.path.join(temp_dir, 'temps.png'))
+            plot_temperature_range_trends(dataset.get_data(), os.path.join(temp_dir, 'ranges.png'))
+            assert drawn == [300, 300]
+            assert os.path.exists(os.path.join(temp_dir, 'temps.png'))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestScatterDensity:
+    """Density grids and sampling for scatter plots of many points"""
+
+    def test_grid_growth_is_exact(self):
+        """Both axes widen while streaming and points stay in (or right next to) the cell holding them"""
+        rng = random.Random(22)
+        xs = [rng.gauss(25, 6) for _ in range(3000)]
+        ys = [rng.uniform(0, 100) for _ in range(3000)]
+        grid = Histogram2D(10)
+        for start in range(0, 3000, 250):
+            grid.push_many(xs[start:start + 250], ys[start:start + 250])
+        expected = [0] * 100
+        for x, y in zip(xs, ys):
+            column = min(int((x - grid.x_axis[0]) / grid.x_axis[1]), 9)
+            row = min(int((y - grid.y_axis[0]) / grid.y_axis[1]), 9)
+            expected[row * 10 + column] += 1
+        # a value on a cell edge may land in the neighbour after the edges are recomputed in floating point
+        assert sum(grid.counts) == 3000
+        assert sum(abs(a - b) for a, b in zip(grid.counts, expected)) <= 4
+        assert grid.count == 3000 and (grid.x_axis[2], grid.x_axis[3]) == (min(xs), max(xs))
+
+    def test_modes(self):
+        """auto switches to a grid past the threshold, sample keeps a fixed number of points"""
+        points = ScatterPoints(threshold=100)
+        points.push_many(array('d', range(60)), array('d', range(60)))
+        assert points.kind == 'scatter'
+        points.push_many(array('d', range(60)), array('d', range(60)))
+        assert points.kind == 'density' and points.density.count == 120 and not points.x_values
+
+        sample = ScatterPoints('sample', sample_size=25)
+        for start in range(0, 1000, 100):
+            sample.push_many(array('d', range(start, start + 100)), array('d', range(100)))
+        assert (sample.kind, len(sample), len(sample.x_values)) == ('sample', 1000, 25)
+        assert len(set(sample.x_values)) == 25
+        with pytest.raises(ValueError):
+            ScatterPoints('hexagons')
+
+    def test_plot_modes(self):
+        """Every mode saves a plot, big inputs are drawn as a density grid automatically"""
+        rng = random.Random(23)
+        rows = [{'MaxTemp': rng.uniform(10, 40), 'Humidity3pm': rng.uniform(5, 100)} for _ in range(500)]
+        rows.append({'MaxTemp': None, 'Humidity3pm': 50.0})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for mode in ('auto', 'scatter', 'density', 'sample'):
+                path = os.path.join(temp_dir, f'{mode}.png')
+                plot_temperature_vs_humidity(rows, path, mode=mode, threshold=100, sample_size=50)
+                assert os.path.exists(path)
+
+
+class TestPlotCache:
+    """Content addressed cache of rendered figures"""
+
+    @pytest.fixture
+    def plot_csv_file(self):
+        """csv with a few temperatures"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as f:
+            f.write('Location,MaxTemp,MinTemp,Humidity3pm\n')
+            f.write('Sydney,30.0,20.0,40.0\nSydney,25.0,15.0,55.0\nPerth,38.5,22.0,\n')
+            temp_path = f.name
+
+        yield temp_path
+
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    def test_unchanged_plot_is_copied(self, plot_csv_file, monkeypatch):
+        """A second call with the same data and arguments copies the figure, a changed file draws again"""
+        calls = []
+        original = visualization.save_histogram
+        monkeypatch.setattr(visualization, 'save_histogram',
+                            lambda *args, **kwargs: calls.append(1) or original(*args, **kwargs))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = PlotCache(os.path.join(temp_dir, 'cache'))
+            output = os.path.join(temp_dir, 'temps.png')
+            dataset = WeatherDataset(plot_csv_file, lazy_load=True)
+            plot_temperature_distribution(dataset, output, cache=cache)
+            with open(output, 'rb') as f:
+                drawn = f.read()
+            os.remove(output)
+            plot_temperature_distribution(dataset, output, cache=cache)
+            assert len(calls) == 1
+            with open(output, 'rb') as f:
+                assert f.read() == drawn
+
+            # another path gets the same figure, other arguments and new rows are different figures
+            plot_temperature_distribution(dataset, os.path.join(temp_dir, 'copy.png'), cache=cache)
+            assert len(calls) == 1
+            plot_temperature_range_trends(dataset, output, cache=cache)
+            with open(plot_csv_file, 'a') as f:
+                f.write('Perth,41.0,25.0,20.0\n')
+            plot_temperature_distribution(dataset, output, cache=cache)
+            assert len(calls) == 3
+            assert len(cache.entries()) == 3
+
+    def test_loaded_data_keeps_its_fingerprint(self, plot_csv_file):
+        """Editing the file after an eager load doesn't change what the loaded rows are"""
+        dataset = WeatherDataset(plot_csv_file)
+        lazy = WeatherDataset(plot_csv_file, lazy_load=True)
+        before = dataset.fingerprint()
+        assert lazy.fingerprint() == before
+        with open(plot_csv_file, 'a') as f:
+            f.write('Perth,41.0,25.0,20.0\n')
+        assert dataset.fingerprint() == before
+        assert lazy.fingerprint() != before
+        assert WeatherDataset(plot_csv_file, columns=['MaxTemp']).fingerprint() != dataset.fingerprint()
+
+    def test_lru_eviction(self):
+        """Past max_bytes the least recently used figures go first"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = PlotCache(os.path.join(temp_dir, 'cache'), max_bytes=250)
+            output = os.path.join(temp_dir, 'plot.png')
+            for i, key in enumerate(['a.png', 'b.png', 'c.png']):
+                with open(output, 'wb') as f:
+                    f.write(bytes(100))
+                cache.store(key, output)
+                # mtimes a second apart so the order doesn't depend on the clock resolution
+                os.utime(cache._entry_path(key), (1000 + i, 1000 + i))
+            assert [os.path.basename(path) for _, _, path in cache.entries()] == ['b.png', 'c.png']
+
+            assert cache.fetch('b.png', output)
+            with open(output, 'wb') as f:
+                f.write(bytes(100))
+            cache.store('d.png', output)
+            assert sorted(os.path.basename(path) for _, _, path in cache.entries()) == ['b.png', 'd.png']
+            assert not cache.fetch('a.png', output)
+            with pytest.raises(ValueError):
+                PlotCache(temp_dir, max_bytes=0)
+
+    def test_render_plots_with_cache(self):
+        """Jobs with the same content come from the cache, hard linked when asked"""
+        histogram = Histogram(10)
+        histogram.push_many([1.0, 2.0, 2.5, 7.0])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = PlotCache(os.path.join(temp_dir, 'cache'), link=True)
+            jobs = [PlotJob(os.path.join(temp_dir, f'{title}.png'), save_histogram, histogram, xlabel='x', title=title)
+                    for title in ('one', 'two')]
+            assert [result['cached'] for result in render_plots(jobs, cache=cache)] == [False, False]
+            results = render_plots(jobs, cache=cache)
+            assert [result['cached'] for result in results] == [True, True]
+            assert os.stat(jobs[0].output_path).st_nlink == 2
+
+            histogram.push(3.0)
+            assert [result['cached'] for result in render_plots(jobs, cache=cache)] == [False, False]
+            assert os.stat(jobs[0].output_path).st_nlink == 1
+            assert len(cache.entries()) == 4
+
+
+# -- Package Tests --
+
+class TestLazyImports:
+    """Submodules and matplotlib load on first use, not on import"""
+
+    # seconds, importing matplotlib alone takes longer than this
+    IMPORT_BUDGET = 0.4
+
+    def _import_in_subprocess(self, statement):
+        """Run an import in a fresh interpreter, return (seconds it took, loaded modules)"""
+        code = (f"import sys, time\nstart = time.perf_counter()\n{statement}\n"
+                f"print(time.perf_counter() - start)\nprint(','.join(sorted(sys.modules)))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        seconds, modules = result.stdout.strip().split('\n')
+        return float(seconds), set(modules.split(','))
+
+    def test_import_budget(self):
+        """Workers that only read CSVs and compute stats don't pay for matplotlib"""
+        seconds, modules = self._import_in_subprocess(
+            'from weather_analysis import csv_row_generator, calculate_statistics_streaming')
+        assert 'matplotlib' not in modules
+        assert 'weather_analysis.visualization' not in modules
+        assert seconds < self.IMPORT_BUDGET
+
+        _, modules = self._import_in_subprocess('from weather_analysis import WeatherDataset, plot_rainfall_patterns')
+        assert 'weather_analysis.visualization' in modules
+        assert 'matplotlib' not in modules
+
+    def test_lazy_attributes(self):
+        """Every public name resolves and unknown names still raise AttributeError"""
+        import weather_analysis
+        for name in weather_analysis.__all__:
+            assert getattr(weather_analysis, name) is not None
+        assert set(weather_analysis.__all__) <= set(dir(weather_analysis))
+        with pytest.raises(AttributeError):
+            weather_analysis.no_such_function
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod(verbose=True)
@@ -1,50 +1,125 @@
-from .data_loader import load_weather_data, csv_row_generator, open_csv_file
-from .analytics import (
-    calculate_mean,
-    calculate_median,
-    calculate_range,
-    calculate_statistics_streaming
-)
-from .data_cleaning import (
-    extract_valid_numeric_values,
-    valid_numeric_values_generator,
-    filter_rows_by_condition
-)
-from .weather_dataset import WeatherDataset
-from .logger_config import setup_logger
-from .visualization import (
-    filter_by_rainfall_threshold,
-    filter_high_temperature_days,
-    filter_windy_days,
-    filter_by_location,
-    extract_temperature_range,
-    extract_humidity_change,
-    extract_pressure_change,
-    calculate_total_rainfall,
-    find_max_temperature,
-    find_min_temperature,
-    count_rainy_days,
-    analyze_rain_patterns,
-    plot_temperature_distribution,
-    plot_rainfall_patterns,
-    plot_temperature_vs_humidity,
-    plot_wind_speed_distribution,
-    plot_pressure_vs_rain,
-    plot_temperature_range_trends
-)
+import importlib
+
+# public name -> submodule defining it. Submodules load on first access (module __getattr__), so a worker
+# process that only needs csv_row_generator doesn't import matplotlib or the rest of the package
+_LAZY_ATTRIBUTES = {
+    'load_weather_data': 'data_loader',
+    'load_weather_columns': 'data_loader',
+    'csv_row_generator': 'data_loader',
+    'csv_column_batches': 'data_loader',
+    'open_csv_file': 'data_loader',
+    'infer_csv_schema': 'data_loader',
+    'infer_schema': 'schema',
+    'build_converters': 'schema',
+    'build_column_converters': 'schema',
+    'ColumnarTable': 'columnar',
+    'NumericColumn': 'columnar',
+    'CategoricalColumn': 'columnar',
+    'write_cache': 'cache',
+    'load_cache': 'cache',
+    'csv_fingerprint': 'cache',
+    'ColumnPredicate': 'predicates',
+    'Query': 'query',
+    'GroupAggregator': 'groupby',
+    'TimeIndex': 'timeseries',
+    'Histogram': 'histogram',
+    'PartitionManifest': 'partitions',
+    'KLLSketch': 'sketches',
+    'calculate_mean': 'analytics',
+    'calculate_median': 'analytics',
+    'calculate_range': 'analytics',
+    'calculate_statistics_streaming': 'analytics',
+    'StreamingAccumulator': 'analytics',
+    'calculate_percentiles': 'analytics',
+    'calculate_quantiles': 'analytics',
+    'calculate_exceedance': 'analytics',
+    'select_order_statistics': 'analytics',
+    'extract_valid_numeric_values': 'data_cleaning',
+    'valid_numeric_values_generator': 'data_cleaning',
+    'filter_rows_by_condition': 'data_cleaning',
+    'WeatherDataset': 'weather_dataset',
+    'WeatherReport': 'report',
+    'weather_report': 'report',
+    'render_report_plots': 'report',
+    'PlotCache': 'plot_cache',
+    'setup_logger': 'logger_config',
+    'filter_by_rainfall_threshold': 'visualization',
+    'filter_high_temperature_days': 'visualization',
+    'filter_windy_days': 'visualization',
+    'filter_by_location': 'visualization',
+    'extract_temperature_range': 'visualization',
+    'extract_humidity_change': 'visualization',
+    'extract_pressure_change': 'visualization',
+    'calculate_total_rainfall': 'visualization',
+    'find_max_temperature': 'visualization',
+    'find_min_temperature': 'visualization',
+    'count_rainy_days': 'visualization',
+    'analyze_rain_patterns': 'visualization',
+    'plot_temperature_distribution': 'visualization',
+    'plot_rainfall_patterns': 'visualization',
+    'plot_temperature_vs_humidity': 'visualization',
+    'plot_wind_speed_distribution': 'visualization',
+    'plot_pressure_vs_rain': 'visualization',
+    'plot_temperature_range_trends': 'visualization',
+    'PlotJob': 'visualization',
+    'render_plots': 'visualization',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    # cache it, later lookups don't come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __all__ = [
     'load_weather_data',
+    'load_weather_columns',
     'csv_row_generator',
+    'csv_column_batches',
     'open_csv_file',
+    'infer_csv_schema',
+    'infer_schema',
+    'build_converters',
+    'build_column_converters',
+    'ColumnarTable',
+    'NumericColumn',
+    'CategoricalColumn',
+    'write_cache',
+    'load_cache',
+    'csv_fingerprint',
+    'ColumnPredicate',
+    'Query',
+    'GroupAggregator',
+    'TimeIndex',
+    'Histogram',
+    'PartitionManifest',
+    'KLLSketch',
     'calculate_mean',
     'calculate_median',
     'calculate_range',
     'calculate_statistics_streaming',
+    'StreamingAccumulator',
+    'calculate_percentiles',
+    'calculate_quantiles',
+    'calculate_exceedance',
+    'select_order_statistics',
     'extract_valid_numeric_values',
     'valid_numeric_values_generator',
     'filter_rows_by_condition',
     'WeatherDataset',
+    'WeatherReport',
+    'weather_report',
+    'render_report_plots',
+    'PlotCache',
     'setup_logger',
     'filter_by_rainfall_threshold',
     'filter_high_temperature_days',
@@ -64,4 +139,6 @@ __all__ = [
     'plot_wind_speed_distribution',
     'plot_pressure_vs_rain',
     'plot_temperature_range_trends',
+    'PlotJob',
+    'render_plots',
 ]
\ No newline at end of file
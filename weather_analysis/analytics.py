@@ -1,9 +1,220 @@
+import math
+import random
 from typing import Iterable, Iterator
-from itertools import islice
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import partial
+from itertools import accumulate, islice
 from .logger_config import setup_logger
 
 logger = setup_logger(__name__)
 
+# percentiles reported alongside the streaming statistics
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95, 99)
+
+# float buffers at least this big are handed to numpy (partition, batch sums) when it is installed
+NUMPY_SELECT_THRESHOLD = 2048
+
+# slices this small are just sorted during selection
+_SMALL_SELECT = 32
+
+# selecting several ranks from at least this many values buckets them around sampled pivots first
+_BUCKET_SELECT = 100000
+
+
+def _as_sequence(values):
+    """Keep lists, tuples and float buffers (array('d'), numpy arrays) as they are, copy anything else to a list"""
+    if isinstance(values, (list, tuple, array)) or hasattr(values, 'dtype'):
+        return values
+    return list(values)
+
+
+def _load_numpy():
+    # numpy is optional, selection falls back to pure Python without it
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def _is_float_buffer(values) -> bool:
+    if isinstance(values, array):
+        return values.typecode in ('d', 'f')
+    return getattr(values, 'dtype', None) is not None and values.dtype.kind == 'f'
+
+
+def _select_buckets(values: list, ranks: list[int]) -> dict:
+    """
+    Several ranks in about one pass: bracket each rank between two pivots taken from a sorted random sample,
+    bucket every value by bisecting the pivots and sort only the buckets that hold wanted ranks
+    - Buckets are value intervals, so the kept values sort into bucket order
+    - The sample only decides how much is kept, the bucket counts make the result exact either way
+    """
+    n = len(values)
+    wanted = sorted(set(ranks))
+    sample_size = max(_SMALL_SELECT, int(n ** 0.75))
+    sample = sorted(random.Random(n).sample(values, sample_size))
+    # a rank's position in the sample is rarely off by more than half the square root of its size
+    margin = math.isqrt(sample_size) + 1
+    pivots = set()
+    for rank in wanted:
+        at = rank * sample_size // n
+        pivots.add(sample[max(at - margin, 0)])
+        pivots.add(sample[min(at + margin, sample_size - 1)])
+    pivots = sorted(pivots)
+
+    # bucket b holds pivots[b - 1] < value <= pivots[b], starts[b] counts the values in the buckets before it
+    keys = list(map(partial(bisect_left, pivots), values))
+    counts = Counter(keys)
+    starts = list(accumulate((counts[bucket] for bucket in range(len(pivots))), initial=0))
+    buckets = {rank: bisect_right(starts, rank) - 1 for rank in wanted}
+    needed = set(buckets.values())
+    kept = sorted([value for value, key in zip(values, keys) if key in needed])
+
+    offsets = {}
+    total = 0
+    for bucket in sorted(needed):
+        offsets[bucket] = total
+        total += counts[bucket]
+    return {rank: kept[offsets[bucket] + rank - starts[bucket]] for rank, bucket in buckets.items()}
+
+
+def _select_python(values, ranks: list[int]) -> dict:
+    """
+    Multi-rank quickselect: partition once around a pivot, then only descend into the sides holding wanted ranks
+    - Partitions are built with list comprehensions, so each pass runs at C speed
+    - Falls back to sorting a slice when it stops shrinking fast enough (introselect style worst case guard)
+    - Several ranks of a large list are bucketed in one pass instead (see _select_buckets)
+    """
+    if len(values) >= _BUCKET_SELECT and len(set(ranks)) > 1:
+        return _select_buckets(values, ranks)
+
+    found = {}
+    depth_limit = 2 * max(1, len(values)).bit_length()
+    stack = [(values, sorted(set(ranks)), 0, 0)]
+    while stack:
+        part, wanted, offset, depth = stack.pop()
+        if len(part) <= _SMALL_SELECT or depth > depth_limit:
+            ordered = sorted(part)
+            for rank in wanted:
+                found[rank] = ordered[rank - offset]
+            continue
+
+        # median of three pivot keeps sorted input from going quadratic
+        pivot = sorted((part[0], part[len(part) // 2], part[-1]))[1]
+        lows = [value for value in part if value < pivot]
+        highs = [value for value in part if value > pivot]
+        equal_start = offset + len(lows)
+        equal_end = offset + len(part) - len(highs)
+
+        low_ranks = [rank for rank in wanted if rank < equal_start]
+        high_ranks = [rank for rank in wanted if rank >= equal_end]
+        for rank in wanted:
+            if equal_start <= rank < equal_end:
+                found[rank] = pivot
+        if low_ranks:
+            stack.append((lows, low_ranks, offset, depth + 1))
+        if high_ranks:
+            stack.append((highs, high_ranks, equal_end, depth + 1))
+    return found
+
+
+def select_order_statistics(values: Iterable[float], ranks: Iterable[int], inplace: bool = False) -> list:
+    """
+    Find the values at several positions of the sorted order without sorting everything
+    - numpy.partition (introselect) on float buffers like array('d') or numpy arrays, one call for every rank
+    - Otherwise pure Python: quickselect for one rank, one bucketing pass for any number of ranks
+    - By default the input is never reordered, large float buffers are copied once into a scratch array.
+      With inplace=True an array('d') / float64 numpy array is partitioned where it is (np.frombuffer, no copy)
+    Args:
+        values: Iterable of numeric values (no NaN)
+        ranks: 0 based positions in sorted order, e.g. [len(values) // 2]
+        inplace: Allow reordering values, for scratch buffers like NumericColumn.valid_array()
+    Returns:
+        List of values at the ranks, in the order the ranks were given
+    Raises:
+        ValueError: values is empty
+        IndexError: A rank is out of range
+    """
+    values = _as_sequence(values)
+    ranks = list(ranks)
+    n = len(values)
+    if n == 0:
+        logger.error("Cannot select from empty collection")
+        raise ValueError("Can't select order statistics of empty list")
+    for rank in ranks:
+        if not 0 <= rank < n:
+            raise IndexError(f"Rank {rank} out of range for {n} values")
+
+    np = _load_numpy() if n >= NUMPY_SELECT_THRESHOLD and _is_float_buffer(values) else None
+    if np is not None:
+        logger.debug(f"Selecting {len(ranks)} order statistics of {n} values with numpy.partition")
+        if inplace and isinstance(values, array) and values.typecode == 'd':
+            scratch = np.frombuffer(values, dtype=np.float64)
+        elif inplace and isinstance(values, np.ndarray) and values.dtype == np.float64 and values.flags.writeable:
+            scratch = values
+        else:
+            scratch = np.array(values, dtype=np.float64)
+        scratch.partition(sorted(set(ranks)))
+        return [scratch[rank].item() for rank in ranks]
+
+    if not isinstance(values, list):
+        values = list(values)
+    logger.debug(f"Selecting {len(ranks)} order statistics of {n} values with quickselect")
+    found = _select_python(values, ranks)
+    return [found[rank] for rank in ranks]
+
+
+def calculate_quantiles(values: Iterable[float], qs: Iterable[float], inplace: bool = False) -> list:
+    """
+    Calculate several exact quantiles with one selection pass, interpolating between neighbours like the median
+    Args:
+        values: Iterable of numeric values (lists, iterators, array('d') or numpy arrays)
+        qs: Quantiles between 0 and 1
+        inplace: Allow reordering a float buffer instead of copying it (see select_order_statistics)
+    Returns:
+        List of quantile values in the same order as qs
+    Raises:
+        ValueError: values is empty or a quantile is outside [0, 1]
+    """
+    try:
+        values = _as_sequence(values)
+        qs = list(qs)
+        if len(values) == 0:
+            logger.error("Cannot calculate quantiles of empty collection")
+            raise ValueError("Can't calculate quantiles of empty list")
+        for q in qs:
+            if not 0 <= q <= 1:
+                raise ValueError(f"Quantile {q} is outside 0-1")
+
+        last = len(values) - 1
+        positions = [q * last for q in qs]
+        ranks = set()
+        for position in positions:
+            low = int(position)
+            ranks.update((low, min(low + 1, last)))
+        ranks = sorted(ranks)
+        selected = dict(zip(ranks, select_order_statistics(values, ranks, inplace=inplace)))
+
+        result = []
+        for position in positions:
+            low = int(position)
+            fraction = position - low
+            low_value = selected[low]
+            if fraction == 0:
+                result.append(low_value)
+            else:
+                result.append(low_value + (selected[min(low + 1, last)] - low_value) * fraction)
+        logger.debug(f"Quantiles calculated: {result}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error calculating quantiles: {e}")
+        raise
+
+
 def calculate_mean(values: Iterable[float]) -> float:
     """
     Calculate the average of a collection of numbers (lists or iterators)
@@ -16,11 +227,10 @@ def calculate_mean(values: Iterable[float]) -> float:
         TypeError: Values contain non numeric types
     """
     try:
-        # convert to list if its an iterator
-        if not isinstance(values, list):
-            values = list(values)
+        # convert to list if its an iterator (float buffers are used as they are)
+        values = _as_sequence(values)
 
-        if not values:
+        if len(values) == 0:
             logger.error("Cannot calculate mean of empty collection")
             raise ValueError("Can't calculate mean of empty list")
 
@@ -37,36 +247,35 @@ def calculate_mean(values: Iterable[float]) -> float:
         raise
 
 
-def calculate_median(values: Iterable[float]) -> float:
+def calculate_median(values: Iterable[float], inplace: bool = False) -> float:
     """
     Calculate the median of collection of numbers (lists or iterators)
     Args:
         values: Iterable of numeric values
+        inplace: Allow reordering a float buffer instead of copying it (see select_order_statistics)
     Returns:
         Median value
     Raises:
         ValueError: values is empty
     """
     try:
-        # convert to list if it's an iterator
-        if not isinstance(values, list):
-            values = list(values)
+        # convert to list if it's an iterator (float buffers are used as they are)
+        values = _as_sequence(values)
 
-        if not values:
+        if len(values) == 0:
             logger.error("Cannot calculate median of empty collection")
             raise ValueError("Can't calculate median of empty list")
 
         logger.debug(f"Calculating median of {len(values)} values")
-        sorted_values = sorted(values)
-        n = len(sorted_values)
+        n = len(values)
 
+        # select the middle value(s) instead of sorting everything
         # if odd num of elements, return middle value
         if n % 2 == 1:
-            result = sorted_values[n // 2]
+            result = select_order_statistics(values, [n // 2], inplace=inplace)[0]
         # if even num of elements, return avg of two middle values
         else:
-            mid1 = sorted_values[n // 2 - 1]
-            mid2 = sorted_values[n // 2]
+            mid1, mid2 = select_order_statistics(values, [n // 2 - 1, n // 2], inplace=inplace)
             result = (mid1 + mid2) / 2
 
         logger.debug(f"Median calculated: {result}")
@@ -77,6 +286,85 @@ def calculate_median(values: Iterable[float]) -> float:
         raise
 
 
+def calculate_percentiles(values: Iterable[float], percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+                          inplace: bool = False) -> dict:
+    """
+    Calculate exact percentiles, interpolating between neighbours like the median does
+    Args:
+        values: Iterable of numeric values
+        percentiles: Percentiles between 0 and 100
+        inplace: Allow reordering a float buffer instead of copying it (see select_order_statistics)
+    Returns:
+        Dict of percentile -> value
+    Raises:
+        ValueError: values is empty or a percentile is outside [0, 100]
+    """
+    try:
+        percentiles = list(percentiles)
+        for percentile in percentiles:
+            if not 0 <= percentile <= 100:
+                raise ValueError(f"Percentile {percentile} is outside 0-100")
+        values = _as_sequence(values)
+        if len(values) == 0:
+            logger.error("Cannot calculate percentiles of empty collection")
+            raise ValueError("Can't calculate percentiles of empty list")
+
+        result = dict(zip(percentiles, calculate_quantiles(values, [percentile / 100 for percentile in percentiles],
+                                                              inplace=inplace)))
+        logger.debug(f"Percentiles calculated: {result}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error calculating percentiles: {e}")
+        raise
+
+
+def calculate_exceedance(values: Iterable[float], thresholds: Iterable[float], inclusive: bool = True,
+                         presorted: bool = False) -> dict:
+    """
+    Count values at or above each of many thresholds (an exceedance curve) with one sort and a binary search each
+    - numpy.sort / searchsorted on float buffers of NUMPY_SELECT_THRESHOLD+ values when numpy is installed
+    Args:
+        values: Iterable of numeric values (no missing values)
+        thresholds: Thresholds to count against, in any order
+        inclusive: Count values >= threshold (True) or > threshold (False)
+        presorted: values is already sorted ascending, skip the sort
+    Returns:
+        Dict with 'thresholds', 'counts', 'fractions' (lists in threshold order) and 'total' (number of values).
+        Fractions are 0.0 when there are no values
+    """
+    try:
+        values = _as_sequence(values)
+        thresholds = list(thresholds)
+        total = len(values)
+        side = 'left' if inclusive else 'right'
+
+        np = _load_numpy() if total >= NUMPY_SELECT_THRESHOLD and _is_float_buffer(values) else None
+        if np is not None:
+            ordered = np.asarray(values, dtype=np.float64)
+            if not presorted:
+                ordered = np.sort(ordered)
+            positions = np.searchsorted(ordered, thresholds, side=side).tolist()
+        else:
+            ordered = values if presorted else sorted(values)
+            search = bisect_left if inclusive else bisect_right
+            positions = [search(ordered, threshold) for threshold in thresholds]
+
+        counts = [total - position for position in positions]
+        result = {
+            'thresholds': thresholds,
+            'counts': counts,
+            'fractions': [count / total if total else 0.0 for count in counts],
+            'total': total,
+        }
+        logger.debug(f"Exceedance counts for {len(thresholds)} thresholds over {total} values")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error calculating exceedance: {e}")
+        raise
+
+
 def calculate_range(values: Iterable[float]) -> float:
     """
     Calculate the range of a collection of numbers (lists or iterators)
@@ -88,11 +376,10 @@ def calculate_range(values: Iterable[float]) -> float:
         ValueError: values is empty
     """
     try:
-        # convert to list if it's an iterator
-        if not isinstance(values, list):
-            values = list(values)
+        # convert to list if it's an iterator (float buffers are used as they are)
+        values = _as_sequence(values)
 
-        if not values:
+        if len(values) == 0:
             logger.error("Cannot calculate range of empty collection")
             raise ValueError("Can't calculate range of empty list")
 
@@ -106,48 +393,170 @@ def calculate_range(values: Iterable[float]) -> float:
         raise
 
 
+class StreamingAccumulator:
+    """
+    Mergeable single pass statistics: count, mean, variance, min and max
+    - Welford updates for single values, Chan et al. pairwise combination for batches and merges,
+      so the variance stays accurate even when values sit far from zero
+    - The total is kept with Neumaier compensated summation
+    - Accumulators filled on different chunks, files or processes can be merged (plain attributes, picklable)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # sum of squared differences from the mean
+        self.m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self._total = 0.0
+        self._compensation = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return f"StreamingAccumulator(count={self.count}, mean={self.mean}, min={self.min}, max={self.max})"
+
+    def _add_to_total(self, value: float) -> None:
+        total = self._total + value
+        # keep the low order bits lost by the addition
+        if abs(self._total) >= abs(value):
+            self._compensation += (self._total - total) + value
+        else:
+            self._compensation += (value - total) + self._total
+        self._total = total
+
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        """Chan et al. update with the count, mean and m2 of another group of values"""
+        combined = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / combined
+        self.m2 += m2 + delta * delta * self.count * count / combined
+        self.count = combined
+
+    @property
+    def total(self) -> float:
+        """Compensated sum of every value"""
+        return self._total + self._compensation
+
+    def push(self, value: float) -> None:
+        """
+        Add one value
+        Args:
+            value: Numeric value
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self._add_to_total(value)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def push_many(self, values: Iterable[float], batch_size: int = 65536) -> None:
+        """
+        Add many values, batch at a time (faster than calling push for each)
+        - Float buffers like array('d') are summarized by numpy in one go when it is installed
+        Args:
+            values: Iterable of numeric values, e.g. a column's valid_array()
+            batch_size: Values summarized per step when values is an iterator
+        """
+        np = _load_numpy() if _is_float_buffer(values) and len(values) >= NUMPY_SELECT_THRESHOLD else None
+        if np is not None:
+            # array('d') is wrapped without copying
+            batch = np.asarray(values, dtype=np.float64)
+            batch_total = float(batch.sum())
+            batch_mean = batch_total / len(batch)
+            self._combine(len(batch), batch_mean, float(np.square(batch - batch_mean).sum()))
+            self._add_to_total(batch_total)
+            self.min = min(self.min, float(batch.min()))
+            self.max = max(self.max, float(batch.max()))
+            return
+
+        iterator = iter(values)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            # two pass over the batch: exact sum first, then squared differences from the batch mean
+            batch_total = math.fsum(batch)
+            batch_mean = batch_total / len(batch)
+            batch_m2 = sum([(value - batch_mean) ** 2 for value in batch])
+            self._combine(len(batch), batch_mean, batch_m2)
+            self._add_to_total(batch_total)
+            self.min = min(self.min, min(batch))
+            self.max = max(self.max, max(batch))
+
+    def merge(self, other: 'StreamingAccumulator') -> 'StreamingAccumulator':
+        """
+        Fold another accumulator into this one
+        Args:
+            other: StreamingAccumulator filled with other values
+        Returns:
+            self, so merges can be chained
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+            self._add_to_total(other._total)
+            self._add_to_total(other._compensation)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    def variance(self) -> float:
+        """Sample variance (n - 1 denominator), 0.0 for a single value"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self) -> float:
+        """Sample standard deviation"""
+        return math.sqrt(self.variance())
+
+    def result(self) -> dict:
+        """
+        Summarize the values seen so far
+        Returns:
+            Dict with 'mean', 'min', 'max', 'range', 'count', 'variance' and 'std' keys
+        Raises:
+            ValueError: No values have been pushed
+        """
+        if self.count == 0:
+            logger.error("Cannot calculate statistics of empty collection")
+            raise ValueError("Cant calculate statistics of empty iterator")
+        return {
+            'mean': self.total / self.count,
+            'min': self.min,
+            'max': self.max,
+            'range': self.max - self.min,
+            'count': self.count,
+            'variance': self.variance(),
+            'std': self.std(),
+        }
+
+
 def calculate_statistics_streaming(values: Iterator[float]) -> dict:
     """
-    Calculate mean, min, max, and count in single pass through data. Memory efficient for large dataset using generator pattern
+    Calculate mean, min, max, count and variance in single pass through data. Memory efficient for large dataset using generator pattern
     Args:
         values: Iterator of numeric values
     Returns:
-        Dict with 'mean', 'min', 'max', 'count', 'range' keys
+        Dict with 'mean', 'min', 'max', 'count', 'range', 'variance', 'std' keys
     Raises:
         ValueError: Values is empty
     """
     try:
         logger.debug("Calculating statistics in streaming mode")
 
-        count = 0
-        total = 0
-        min_val = float('inf')
-        max_val = float('-inf')
+        accumulator = StreamingAccumulator()
+        accumulator.push_many(values)
+        result = accumulator.result()
 
-        for value in values:
-            count += 1
-            total += value
-            min_val = min(min_val, value)
-            max_val = max(max_val, value)
-
-        if count == 0:
-            logger.error("Cannot calculate statistics of empty collection")
-            raise ValueError("Cant calculate statistics of empty iterator")
-
-        mean = total / count
-        range_val = max_val - min_val
-
-        result = {
-            'mean': mean,
-            'min': min_val,
-            'max': max_val,
-            'range': range_val,
-            'count': count
-        }
-
-        logger.info(f"Streaming statistics calculated for {count} values: mean={mean:.2f}, range={range_val:.2f}")
+        logger.info(f"Streaming statistics calculated for {result['count']} values: mean={result['mean']:.2f}, "
+                    f"range={result['range']:.2f}")
         return result
 
     except Exception as e:
         logger.error(f"Error in calculate_statistics_streaming: {e}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,389 @@
+import hashlib
+import json
+import mmap
+import os
+import sys
+import uuid
+from array import array
+from typing import Optional
+from .columnar import CategoricalColumn, ColumnarTable, NumericColumn
+from .data_loader import checkpoint_matches
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.wacache'
+HEADER_FILE = 'header.json'
+
+
+def _hash_file(file_path, block_size=1024 * 1024) -> str:
+    """Return the sha256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def csv_fingerprint(file_path, content_hash: bool = False) -> dict:
+    """
+    Identify a CSV file by path, size and modification time (and optionally its contents)
+    Args:
+        file_path: Path to the CSV file
+        content_hash: Also include a sha256 of the file contents
+    Returns:
+        Dict with 'path', 'size', 'mtime_ns' and optionally 'sha256'
+    Raises:
+        FileNotFoundError: File doesn't exist
+    """
+    stat = os.stat(file_path)
+    fingerprint = {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+    if content_hash:
+        fingerprint['sha256'] = _hash_file(file_path)
+    return fingerprint
+
+
+def cache_path_for(file_path, cache_dir: Optional[str] = None) -> str:
+    """
+    Return where the cache for a CSV file lives
+    Args:
+        file_path: Path to the CSV file
+        cache_dir: Directory to keep caches in, defaults to a hidden sidecar next to the CSV
+    Returns:
+        Path of the cache directory
+    """
+    abs_path = os.path.abspath(file_path)
+    base_name = os.path.basename(abs_path)
+    if cache_dir is None:
+        return os.path.join(os.path.dirname(abs_path), f'.{base_name}{CACHE_SUFFIX}')
+    # different CSVs with the same name can share a cache dir
+    path_key = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f'{base_name}-{path_key}{CACHE_SUFFIX}')
+
+
+def _predicate_key(predicates) -> Optional[list]:
+    """JSON friendly form of a list of predicates, stored in the header so filtered caches only serve the same filter"""
+    if not predicates:
+        return None
+    return [[predicate.column, predicate.op, predicate.value] for predicate in predicates]
+
+
+def _write_buffer(path, buffer) -> None:
+    with open(path, 'wb') as f:
+        f.write(memoryview(buffer).cast('B'))
+
+
+def _map_buffer(path, typecode: str, length: int):
+    """
+    Memory map a raw column file read only
+    Returns:
+        memoryview over the first length items of the file cast to typecode
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap can't map empty files
+            return memoryview(array(typecode)) if typecode != 'B' else memoryview(bytearray())
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    # files can run past the header's row count if an append was interrupted
+    return (view if typecode == 'B' else view.cast(typecode))[:length]
+
+
+def _read_buffer(path, typecode: str, length: int):
+    """Read the first length items of a raw column file into a writable array / bytearray"""
+    with open(path, 'rb') as f:
+        data = f.read(length * array(typecode).itemsize)
+    if typecode == 'B':
+        return bytearray(data)
+    buffer = array(typecode)
+    buffer.frombytes(data)
+    return buffer
+
+
+def _append_buffer(path, buffer, start: int) -> None:
+    """Append items from start onwards to a raw column file holding exactly start items"""
+    view = memoryview(buffer)
+    with open(path, 'r+b') as f:
+        # drop anything an interrupted append left past the committed rows
+        f.truncate(start * view.itemsize)
+        f.seek(0, os.SEEK_END)
+        f.write(view[start:].cast('B'))
+
+
+def _read_cache_header(cache_path) -> Optional[dict]:
+    try:
+        with open(os.path.join(cache_path, HEADER_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable cache header in {cache_path}: {e}")
+        return None
+
+
+def _write_header(cache_path, header: dict) -> None:
+    """Write the header atomically, it is the commit point for the column files it names"""
+    temp_path = os.path.join(cache_path, f'{HEADER_FILE}.{uuid.uuid4().hex[:8]}.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(header, f)
+    os.replace(temp_path, os.path.join(cache_path, HEADER_FILE))
+
+
+def _remove_unreferenced(cache_path, header: dict) -> None:
+    """Delete column files left over from older generations"""
+    keep = {HEADER_FILE}
+    for column in header['columns']:
+        keep.update(column['files'].values())
+    for name in os.listdir(cache_path):
+        if name not in keep and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(cache_path, name))
+            except OSError as e:
+                logger.debug(f"Could not remove old cache file {name}: {e}")
+
+
+def write_cache(table: ColumnarTable, file_path, cache_dir: Optional[str] = None, content_hash: bool = False,
+                schema: Optional[dict] = None, fingerprint: Optional[dict] = None, columns: Optional[list] = None,
+                extra: Optional[dict] = None, predicates: Optional[list] = None,
+                checkpoint: Optional[dict] = None) -> str:
+    """
+    Write a columnar table as raw column files plus a small JSON header
+    Args:
+        table: ColumnarTable parsed from file_path
+        file_path: CSV file the table came from, its fingerprint keys the cache
+        cache_dir: Directory to keep caches in, defaults to a sidecar next to the CSV
+        content_hash: Store a sha256 of the CSV so loads can verify contents, not just size/mtime
+        schema: Schema the table was parsed with
+        fingerprint: csv_fingerprint taken before parsing, so edits made while parsing invalidate the cache
+        columns: Column projection the table was loaded with, None if it holds every column
+        extra: Optional dict stored in the header for callers
+        predicates: ColumnPredicates the table was filtered with, None if it holds every row
+        checkpoint: Follow mode checkpoint (from data_loader.follow_checkpoint) the table was read up to
+    Returns:
+        Path of the cache directory
+    Raises:
+        OSError: Cache can't be written
+    """
+    cache_path = cache_path_for(file_path, cache_dir)
+    os.makedirs(cache_path, exist_ok=True)
+    generation = uuid.uuid4().hex[:8]
+
+    column_entries = []
+    for i, name in enumerate(table.column_names):
+        column = table.get_column(name)
+        if column.kind == 'numeric':
+            files = {'values': f'c{i}.{generation}.values', 'valid': f'c{i}.{generation}.valid'}
+            _write_buffer(os.path.join(cache_path, files['values']), column.values)
+            _write_buffer(os.path.join(cache_path, files['valid']), column.valid)
+            column_entries.append({'name': name, 'kind': 'numeric', 'files': files})
+        else:
+            files = {'codes': f'c{i}.{generation}.codes'}
+            _write_buffer(os.path.join(cache_path, files['codes']), column.codes)
+            column_entries.append({'name': name, 'kind': 'categorical', 'files': files, 'categories': column.categories})
+
+    header = {
+        'version': CACHE_VERSION,
+        'byteorder': sys.byteorder,
+        'code_itemsize': array('i').itemsize,
+        'fingerprint': fingerprint if fingerprint is not None else csv_fingerprint(file_path, content_hash=content_hash),
+        'schema': schema,
+        'projection': list(columns) if columns is not None else None,
+        'predicates': _predicate_key(predicates),
+        'row_count': table.row_count,
+        'columns': column_entries,
+        'extra': extra or {},
+        'follow': checkpoint,
+    }
+    _write_header(cache_path, header)
+    _remove_unreferenced(cache_path, header)
+    logger.info(f"Wrote columnar cache for {file_path} to {cache_path}")
+    return cache_path
+
+
+def _header_is_compatible(header: dict, schema: Optional[dict], columns: Optional[list] = None,
+                          predicates: Optional[list] = None) -> bool:
+    """Check a cache header was written by this version, on this platform, for the same load options"""
+    if header.get('version') != CACHE_VERSION or header.get('byteorder') != sys.byteorder:
+        return False
+    if header.get('code_itemsize') != array('i').itemsize:
+        return False
+    if schema is not None and header.get('schema') != schema:
+        return False
+    # a projected cache only serves loads asking for a subset of its columns
+    projection = header.get('projection')
+    if projection is not None and (columns is None or not set(columns) <= set(projection)):
+        return False
+    return header.get('predicates') == _predicate_key(predicates)
+
+
+def _header_is_current(header: dict, file_path, content_hash: bool, schema: Optional[dict],
+                       columns: Optional[list] = None, predicates: Optional[list] = None) -> bool:
+    """Check a cache header against the CSV file it claims to describe"""
+    if not _header_is_compatible(header, schema, columns, predicates):
+        return False
+
+    stored = header.get('fingerprint') or {}
+    current = csv_fingerprint(file_path)
+    if any(stored.get(key) != current[key] for key in ('path', 'size', 'mtime_ns')):
+        return False
+    if content_hash:
+        return stored.get('sha256') is not None and stored['sha256'] == _hash_file(file_path)
+    return True
+
+
+def table_from_header(cache_path, header: dict, use_mmap: bool = True) -> ColumnarTable:
+    """
+    Rebuild a ColumnarTable from a cache header and its column files
+    Args:
+        cache_path: Cache directory
+        header: Parsed header
+        use_mmap: Map the column files read only instead of reading them into memory
+    Returns:
+        ColumnarTable (read only when memory mapped)
+    """
+    load = _map_buffer if use_mmap else _read_buffer
+    row_count = header['row_count']
+    table = ColumnarTable()
+    for column in header['columns']:
+        files = {key: os.path.join(cache_path, name) for key, name in column['files'].items()}
+        if column['kind'] == 'numeric':
+            table.add_column(NumericColumn(column['name'], load(files['values'], 'd', row_count),
+                                           load(files['valid'], 'B', row_count)))
+        else:
+            table.add_column(CategoricalColumn(column['name'], load(files['codes'], 'i', row_count),
+                                               list(column['categories'])))
+    table.row_count = row_count
+    table.read_only = use_mmap
+    return table
+
+
+def load_cache(file_path, cache_dir: Optional[str] = None, content_hash: bool = False, schema: Optional[dict] = None,
+               columns: Optional[list] = None, use_mmap: bool = True,
+               predicates: Optional[list] = None) -> Optional[ColumnarTable]:
+    """
+    Open the cache for a CSV file if it is still current
+    Args:
+        file_path: CSV file the cache was built from
+        cache_dir: Directory to keep caches in, defaults to a sidecar next to the CSV
+        content_hash: Verify the stored sha256 against the CSV contents too
+        schema: Schema the caller wants, a cache built with a different schema is ignored
+        columns: Optional column projection, only these columns are returned
+        use_mmap: Memory map the column files instead of reading them
+        predicates: ColumnPredicates the caller filters with, the cache must have been built with the same ones
+    Returns:
+        ColumnarTable, or None if there is no usable cache
+    """
+    cache_path = cache_path_for(file_path, cache_dir)
+    header = _read_cache_header(cache_path)
+    if header is None:
+        logger.debug(f"No cache found for {file_path}")
+        return None
+
+    try:
+        if not _header_is_current(header, file_path, content_hash, schema, columns, predicates):
+            logger.info(f"Cache for {file_path} is stale, ignoring it")
+            return None
+        table = table_from_header(cache_path, header, use_mmap=use_mmap)
+        if columns is not None:
+            table = table.select(columns)
+    except (OSError, KeyError, ValueError, TypeError) as e:
+        logger.warning(f"Could not open cache for {file_path}: {e}")
+        return None
+
+    logger.info(f"Opened columnar cache for {file_path} with {table.row_count} rows")
+    return table
+
+
+def load_follow_cache(file_path, cache_dir: Optional[str] = None, schema: Optional[dict] = None,
+                      columns: Optional[list] = None, predicates: Optional[list] = None,
+                      use_mmap: bool = True) -> Optional[tuple]:
+    """
+    Open a follow mode cache for a CSV file that may have grown since the cache was written
+    - Instead of size/mtime, checks the file still matches the stored checkpoint (same header and bytes before it)
+    Args:
+        file_path: CSV file the cache was built from
+        cache_dir: Directory to keep caches in, defaults to a sidecar next to the CSV
+        schema: Schema the caller wants, a cache built with a different schema is ignored
+        columns: Optional column projection, only these columns are returned
+        predicates: ColumnPredicates the caller filters with
+        use_mmap: Memory map the column files instead of reading them
+    Returns:
+        Tuple of (ColumnarTable, checkpoint) to resume reading from, or None if there is no usable cache
+    """
+    cache_path = cache_path_for(file_path, cache_dir)
+    header = _read_cache_header(cache_path)
+    if header is None or not header.get('follow'):
+        logger.debug(f"No follow checkpoint cached for {file_path}")
+        return None
+
+    try:
+        checkpoint = header['follow']
+        if not _header_is_compatible(header, schema, columns, predicates) or not checkpoint_matches(file_path, checkpoint):
+            logger.info(f"Follow checkpoint for {file_path} doesn't match the file anymore, ignoring it")
+            return None
+        table = table_from_header(cache_path, header, use_mmap=use_mmap)
+        if columns is not None:
+            table = table.select(columns)
+    except (OSError, KeyError, ValueError, TypeError) as e:
+        logger.warning(f"Could not open cache for {file_path}: {e}")
+        return None
+
+    logger.info(f"Resuming {file_path} from byte {checkpoint['offset']} with {table.row_count} cached rows")
+    return table, checkpoint
+
+
+def append_cache(table: ColumnarTable, file_path, previous_checkpoint: Optional[dict], checkpoint: dict,
+                 cache_dir: Optional[str] = None, fingerprint: Optional[dict] = None, columns: Optional[list] = None,
+                 predicates: Optional[list] = None) -> str:
+    """
+    Save rows appended in follow mode by appending to the column files instead of rewriting them
+    - Falls back to write_cache when the cache on disk isn't the one previous_checkpoint describes,
+      or a column changed type or gained new columns
+    Args:
+        table: ColumnarTable holding every row read so far
+        file_path: CSV file the table came from
+        previous_checkpoint: Checkpoint the cache on disk was written at
+        checkpoint: Checkpoint table has been read up to
+        cache_dir: Directory to keep caches in, defaults to a sidecar next to the CSV
+        fingerprint: csv_fingerprint taken before reading, stored only if it covers exactly the rows cached
+        columns: Column projection the table was loaded with
+        predicates: ColumnPredicates the table was filtered with
+    Returns:
+        Path of the cache directory
+    Raises:
+        OSError: Cache can't be written
+    """
+    if fingerprint is not None and fingerprint['size'] != checkpoint['offset']:
+        # a partial last line isn't in the table, so a plain load of this file must not use the cache
+        fingerprint = {}
+
+    cache_path = cache_path_for(file_path, cache_dir)
+    header = _read_cache_header(cache_path)
+    layout = [(name, table.get_column(name).kind) for name in table.column_names]
+    if (header is None or previous_checkpoint is None or header.get('follow') != previous_checkpoint
+            or [(column['name'], column['kind']) for column in header['columns']] != layout
+            or header['row_count'] > table.row_count):
+        return write_cache(table, file_path, cache_dir, schema=checkpoint['schema'], fingerprint=fingerprint,
+                           columns=columns, predicates=predicates, checkpoint=checkpoint)
+
+    start = header['row_count']
+    for entry in header['columns']:
+        column = table.get_column(entry['name'])
+        files = {key: os.path.join(cache_path, name) for key, name in entry['files'].items()}
+        if column.kind == 'numeric':
+            _append_buffer(files['values'], column.values, start)
+            _append_buffer(files['valid'], column.valid, start)
+        else:
+            _append_buffer(files['codes'], column.codes, start)
+            # categories only ever grow, so old codes stay valid
+            entry['categories'] = column.categories
+
+    header.update({'row_count': table.row_count, 'follow': checkpoint, 'fingerprint': fingerprint})
+    _write_header(cache_path, header)
+    logger.info(f"Appended {table.row_count - start} rows to the cache for {file_path}")
+    return cache_path
@@ -0,0 +1,585 @@
+import math
+from array import array
+from itertools import compress, islice
+from typing import Iterable, Iterator, Optional
+from .logger_config import setup_logger
+from .schema import CATEGORICAL
+
+logger = setup_logger(__name__)
+
+# missing numeric cells are stored as NaN so numpy views stay nan-aware
+_MISSING = float('nan')
+
+# rows buffered by from_rows before they are transposed into the columns
+BATCH_SIZE = 4096
+
+
+class NumericColumn:
+    """
+    Float64 column stored in a typed array('d') with a validity mask
+    - values: contiguous doubles, NaN in missing slots
+    - valid: one byte per row, 1 = value present, 0 = missing
+    """
+
+    kind = 'numeric'
+
+    def __init__(self, name: str, values=None, valid=None):
+        """
+        Initialize the column
+        Args:
+            name: Column name
+            values: Optional existing array('d') (or buffer) of values
+            valid: Optional existing validity mask, same length as values
+        """
+        self.name = name
+        self.values = values if values is not None else array('d')
+        self.valid = valid if valid is not None else bytearray()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> Optional[float]:
+        return self.values[index] if self.valid[index] else None
+
+    def __iter__(self) -> Iterator[Optional[float]]:
+        for value, is_valid in zip(self.values, self.valid):
+            yield value if is_valid else None
+
+    def append(self, value) -> None:
+        """
+        Append a value, None or NaN is recorded as missing
+        Args:
+            value: Float value or None
+        """
+        if value is None or value != value:
+            self.values.append(_MISSING)
+            self.valid.append(0)
+        else:
+            self.values.append(value)
+            self.valid.append(1)
+
+    def extend_values(self, values: list) -> None:
+        """
+        Append a batch of values, None or NaN are recorded as missing
+        Args:
+            values: List of floats / None
+        Raises:
+            TypeError: A value isn't numeric (nothing is appended)
+        """
+        # build the whole batch first so a bad value leaves the column untouched
+        batch = array('d', [_MISSING if value is None else value for value in values])
+        self.values.extend(batch)
+        self.valid.extend([value == value for value in batch])
+
+    def valid_values(self) -> Iterator[float]:
+        """
+        Iterate over the non missing values only (itertools.compress, no Python level branching)
+        Yields:
+            Valid values as floats
+        """
+        return compress(self.values, self.valid)
+
+    def valid_array(self) -> array:
+        """
+        Pack the non missing values into a new array('d'), 8 bytes a value instead of a list of float objects
+        Returns:
+            array('d') of valid values
+        """
+        return array('d', self.valid_values())
+
+    def null_count(self) -> int:
+        """Return the number of missing values"""
+        return len(self.valid) - sum(self.valid)
+
+    def extend(self, other: 'NumericColumn') -> None:
+        """Append every value of another numeric column"""
+        self.values.extend(other.values)
+        self.valid.extend(other.valid)
+
+    def matching_rows(self, predicate, candidates: Optional[Iterable[int]] = None) -> list[int]:
+        """
+        Return the row indexes whose value satisfies a predicate
+        Args:
+            predicate: ColumnPredicate on this column
+            candidates: Optional row indexes to check instead of every row
+        Returns:
+            Sorted list of matching row indexes
+        """
+        if candidates is not None:
+            return [i for i in candidates if predicate.matches(self[i])]
+        if not predicate.is_numeric:
+            # text never matches a float column
+            return []
+        compare, target, valid = predicate.compare, predicate.value, self.valid
+        # missing slots hold NaN, only != can be true for them so validity is checked on hits
+        return [i for i, value in enumerate(self.values) if compare(value, target) and valid[i]]
+
+    def to_numpy(self):
+        """
+        Return a zero copy float64 numpy view of the values (missing are NaN)
+        Returns:
+            numpy.ndarray
+        Raises:
+            ImportError: numpy isn't installed
+        """
+        import numpy as np
+        return np.frombuffer(self.values, dtype=np.float64)
+
+    def make_writable(self) -> None:
+        """Copy read only buffers (e.g. memory mapped cache files) into array / bytearray"""
+        if not isinstance(self.values, array):
+            values = array('d')
+            values.frombytes(memoryview(self.values).cast('B'))
+            self.values = values
+        if not isinstance(self.valid, bytearray):
+            self.valid = bytearray(self.valid)
+
+    def copy(self) -> 'NumericColumn':
+        """Return a writable copy that shares no buffers with this column"""
+        values = array('d')
+        values.frombytes(memoryview(self.values).cast('B'))
+        return NumericColumn(self.name, values, bytearray(self.valid))
+
+    def to_categorical(self) -> 'CategoricalColumn':
+        """Convert to a categorical column, used when a string shows up in a numeric column"""
+        column = CategoricalColumn(self.name)
+        for value in self:
+            column.append(value)
+        return column
+
+
+class CategoricalColumn:
+    """
+    Dictionary encoded column
+    - codes: array('i') of indexes into categories, -1 for missing
+    - categories: distinct values in first seen order
+    """
+
+    kind = 'categorical'
+
+    def __init__(self, name: str, codes=None, categories=None):
+        """
+        Initialize the column
+        Args:
+            name: Column name
+            codes: Optional existing array('i') of codes
+            categories: Optional existing list of distinct values
+        """
+        self.name = name
+        self.codes = codes if codes is not None else array('i')
+        self.categories = categories if categories is not None else []
+        self._lookup = {value: code for code, value in enumerate(self.categories)}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int):
+        code = self.codes[index]
+        return self.categories[code] if code >= 0 else None
+
+    def __iter__(self):
+        categories = self.categories
+        for code in self.codes:
+            yield categories[code] if code >= 0 else None
+
+    def append(self, value) -> None:
+        """
+        Append a value, encoding it to its category code
+        Args:
+            value: Any hashable value or None
+        """
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._lookup[value] = code
+        self.codes.append(code)
+
+    def extend_values(self, values: list) -> None:
+        """
+        Append a batch of values, encoding new ones as they are first seen
+        Args:
+            values: List of hashable values / None
+        """
+        lookup = self._lookup
+        for value in dict.fromkeys(values):
+            if value is not None and value not in lookup:
+                lookup[value] = len(self.categories)
+                self.categories.append(value)
+        get = lookup.get
+        self.codes.extend(array('i', [get(value, -1) for value in values]))
+
+    def code_of(self, value) -> Optional[int]:
+        """
+        Return the code for a value
+        Args:
+            value: Category value
+        Returns:
+            Integer code, or None if the value never appears
+        """
+        return self._lookup.get(value)
+
+    def matching_rows(self, predicate, candidates: Optional[Iterable[int]] = None) -> list[int]:
+        """
+        Return the row indexes whose value satisfies a predicate, testing each category once instead of each row
+        Args:
+            predicate: ColumnPredicate on this column
+            candidates: Optional row indexes to check instead of every row
+        Returns:
+            Sorted list of matching row indexes
+        """
+        hits = {code for code, value in enumerate(self.categories) if predicate.matches(value)}
+        codes = self.codes
+        if candidates is not None:
+            return [i for i in candidates if codes[i] in hits]
+        if not hits:
+            return []
+        if len(hits) == 1:
+            hit = hits.pop()
+            return [i for i, code in enumerate(codes) if code == hit]
+        return [i for i, code in enumerate(codes) if code in hits]
+
+    def valid_values(self) -> Iterator[float]:
+        """
+        Iterate over numeric entries only (mixed columns), matching valid_numeric_values_generator
+        Yields:
+            Valid values as floats
+        """
+        numeric = [isinstance(value, (int, float)) and not math.isnan(value) for value in self.categories]
+        categories = self.categories
+        for code in self.codes:
+            if code >= 0 and numeric[code]:
+                yield float(categories[code])
+
+    def valid_array(self) -> array:
+        """Pack the numeric entries into a new array('d')"""
+        return array('d', self.valid_values())
+
+    def null_count(self) -> int:
+        """Return the number of missing values"""
+        return self.codes.tolist().count(-1)
+
+    def make_writable(self) -> None:
+        """Copy a read only codes buffer (e.g. memory mapped cache file) into an array"""
+        if not isinstance(self.codes, array):
+            codes = array('i')
+            codes.frombytes(memoryview(self.codes).cast('B'))
+            self.codes = codes
+
+    def copy(self) -> 'CategoricalColumn':
+        """Return a writable copy that shares no buffers with this column"""
+        codes = array('i')
+        codes.frombytes(memoryview(self.codes).cast('B'))
+        return CategoricalColumn(self.name, codes, list(self.categories))
+
+    def extend(self, other: 'CategoricalColumn') -> None:
+        """Append every value of another categorical column, remapping its codes"""
+        remap = array('i', (self._code_for_append(value) for value in other.categories))
+        self.codes.extend(remap[code] if code >= 0 else -1 for code in other.codes)
+
+    def _code_for_append(self, value) -> int:
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._lookup[value] = code
+        return code
+
+
+class ColumnarTable:
+    """
+    In memory columnar store for weather data
+    - Numeric columns are typed float64 arrays with a validity mask
+    - String columns are dictionary encoded
+    - Tables opened from a memory mapped cache, and selections, are read only until make_writable() copies them
+    """
+
+    def __init__(self):
+        """Initialize an empty table"""
+        self._columns = {}
+        self.row_count = 0
+        self.read_only = False
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    @classmethod
+    def _with_schema(cls, schema: Optional[dict]) -> 'ColumnarTable':
+        """Create an empty table with typed columns for every schema entry"""
+        table = cls()
+        for name, column_type in (schema or {}).items():
+            table.add_column(CategoricalColumn(name) if column_type == CATEGORICAL else NumericColumn(name))
+        return table
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict], schema: Optional[dict] = None) -> 'ColumnarTable':
+        """
+        Build a table from an iterable of row dicts (consumes a generator a batch at a time)
+        Args:
+            rows: Iterable of dicts, e.g. csv_row_generator
+            schema: Optional dict of column name -> 'numeric' or 'categorical' to create typed columns up front
+        Returns:
+            ColumnarTable
+        """
+        table = cls._with_schema(schema)
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            table.append_rows(batch)
+        logger.debug(f"Built columnar table with {table.row_count} rows and {len(table._columns)} columns")
+        return table
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[tuple], schema: Optional[dict] = None) -> 'ColumnarTable':
+        """
+        Build a table from column batches, skipping row dicts entirely
+        Args:
+            batches: Iterable of (column names, list of value lists), e.g. csv_column_batches
+            schema: Optional dict of column name -> 'numeric' or 'categorical' to create typed columns up front
+        Returns:
+            ColumnarTable
+        """
+        table = cls._with_schema(schema)
+        for names, values_by_column in batches:
+            table.append_columns(names, values_by_column)
+        logger.debug(f"Built columnar table with {table.row_count} rows and {len(table._columns)} columns")
+        return table
+
+    @property
+    def column_names(self) -> list[str]:
+        """Column names in file order"""
+        return list(self._columns)
+
+    def has_column(self, name: str) -> bool:
+        return name in self._columns
+
+    def get_column(self, name: str):
+        """
+        Return the column object for a name
+        Args:
+            name: Column name
+        Returns:
+            NumericColumn or CategoricalColumn
+        Raises:
+            ValueError: Column doesn't exist
+        """
+        try:
+            return self._columns[name]
+        except KeyError:
+            logger.error(f"Column '{name}' not found in dataset")
+            raise ValueError(f"Column '{name}' not found in dataset")
+
+    def select(self, names: Iterable[str]) -> 'ColumnarTable':
+        """
+        Return a table with only some of the columns
+        - Column objects are shared, not copied, so the selection is read only: appending to it
+          copies its columns first (see make_writable) and never changes this table
+        Args:
+            names: Column names to keep
+        Returns:
+            ColumnarTable
+        Raises:
+            ValueError: Column doesn't exist
+        """
+        table = ColumnarTable()
+        for name in names:
+            table._columns[name] = self.get_column(name)
+        table.row_count = self.row_count
+        table.read_only = True
+        return table
+
+    def make_writable(self) -> None:
+        """Copy the columns of a read only table (memory mapped, or shared by select) so rows can be appended"""
+        if self.read_only:
+            self._columns = {name: column.copy() for name, column in self._columns.items()}
+            self.read_only = False
+
+    def add_column(self, column) -> None:
+        """
+        Add a column object, backfilling missing values for rows already in the table
+        Args:
+            column: NumericColumn or CategoricalColumn
+        """
+        if self.read_only and len(column) < self.row_count:
+            self.make_writable()
+            column.make_writable()
+        while len(column) < self.row_count:
+            column.append(None)
+        self._columns[column.name] = column
+
+    def append_row(self, row: dict) -> None:
+        """
+        Append one row dict, values are routed to their columns
+        Args:
+            row: Dict of column name -> value
+        """
+        if self.read_only:
+            self.make_writable()
+        if len(row) != len(self._columns):
+            for key in row:
+                if key not in self._columns:
+                    self.add_column(NumericColumn(key))
+
+        columns = self._columns
+        for name, column in columns.items():
+            value = row.get(name)
+            if isinstance(value, str) and column.kind == 'numeric':
+                # promote once, the rest of the column is dictionary encoded
+                logger.debug(f"Column '{name}' holds strings, switching to categorical encoding")
+                column = column.to_categorical()
+                columns[name] = column
+            column.append(value)
+        self.row_count += 1
+
+    def append_columns(self, names: list[str], values_by_column: list[list]) -> None:
+        """
+        Append a batch of rows given as one list of values per column
+        Args:
+            names: Column names, same order as values_by_column
+            values_by_column: Lists of values, all the same length
+        """
+        if self.read_only:
+            self.make_writable()
+        count = len(values_by_column[0]) if values_by_column else 0
+        columns = self._columns
+        for name, values in zip(names, values_by_column):
+            if name not in columns:
+                self.add_column(NumericColumn(name))
+            column = columns[name]
+            try:
+                column.extend_values(values)
+            except TypeError:
+                # promote once, the rest of the column is dictionary encoded
+                logger.debug(f"Column '{name}' holds strings, switching to categorical encoding")
+                column = column.to_categorical()
+                columns[name] = column
+                column.extend_values(values)
+        self.row_count += count
+
+        # columns missing from this batch get missing values
+        if len(names) != len(columns):
+            for column in columns.values():
+                if len(column) < self.row_count:
+                    column.extend_values([None] * (self.row_count - len(column)))
+
+    def append_rows(self, rows: list[dict]) -> None:
+        """
+        Append a batch of row dicts, one list per column instead of one call per cell
+        Args:
+            rows: List of dicts of column name -> value
+        """
+        names = list(self._columns)
+        for row in rows:
+            if len(row) != len(names):
+                names.extend(key for key in row if key not in names)
+        self.append_columns(names, [[row.get(name) for row in rows] for name in names])
+
+    def extend(self, other: 'ColumnarTable') -> None:
+        """
+        Append all rows of another table (e.g. a parsed chunk), keeping row order
+        Args:
+            other: ColumnarTable with the same columns
+        """
+        self.make_writable()
+        for name, column in other._columns.items():
+            if name not in self._columns:
+                self.add_column(NumericColumn(name) if column.kind == 'numeric' else CategoricalColumn(name))
+            mine = self._columns[name]
+            if mine.kind != column.kind:
+                if mine.kind == 'numeric':
+                    mine = mine.to_categorical()
+                    self._columns[name] = mine
+                if column.kind == 'numeric':
+                    column = column.to_categorical()
+            mine.extend(column)
+        self.row_count += other.row_count
+        for column in self._columns.values():
+            while len(column) < self.row_count:
+                column.append(None)
+
+    def matching_rows(self, predicates: Iterable) -> list[int]:
+        """
+        Return the indexes of rows satisfying every predicate
+        Args:
+            predicates: Iterable of ColumnPredicate
+        Returns:
+            Sorted list of row indexes
+        Raises:
+            ValueError: A predicate names a column that doesn't exist
+        """
+        candidates = None
+        for predicate in predicates:
+            # later predicates only look at rows that survived the earlier ones
+            candidates = self.get_column(predicate.column).matching_rows(predicate, candidates)
+            if not candidates:
+                return []
+        return list(range(self.row_count)) if candidates is None else candidates
+
+    def iter_rows(self, indexes: Optional[Iterable[int]] = None) -> Iterator[dict]:
+        """
+        Yield each row as a dict (compatibility view, built on the fly)
+        Args:
+            indexes: Optional row indexes to yield instead of every row (e.g. from matching_rows)
+        Yields:
+            Dict for each row
+        """
+        names = list(self._columns)
+        if indexes is not None:
+            columns = list(self._columns.values())
+            for i in indexes:
+                yield {name: column[i] for name, column in zip(names, columns)}
+            return
+        for values in zip(*self._columns.values()):
+            yield dict(zip(names, values))
+
+    def column_batches(self, names: Optional[Iterable[str]] = None, batch_size: int = BATCH_SIZE,
+                       indexes: Optional[list[int]] = None) -> Iterator[tuple]:
+        """
+        Yield the table as batches of column values, the same shape csv_column_batches gives
+        Args:
+            names: Columns to include, defaults to all of them
+            batch_size: Rows per batch
+            indexes: Optional sorted row indexes to include instead of every row (e.g. from matching_rows)
+        Yields:
+            Tuple of (column names, list with one list of values per column), missing values are None
+        Raises:
+            ValueError: Column doesn't exist
+        """
+        names = list(self._columns) if names is None else list(names)
+        columns = [self.get_column(name) for name in names]
+        total = self.row_count if indexes is None else len(indexes)
+        for start in range(0, total, batch_size):
+            end = min(start + batch_size, total)
+            picked = None if indexes is None else indexes[start:end]
+            values_by_column = []
+            for column in columns:
+                if column.kind == 'numeric':
+                    if picked is None:
+                        values = column.values[start:end].tolist()
+                    else:
+                        source = column.values
+                        values = [source[i] for i in picked]
+                    values_by_column.append([value if value == value else None for value in values])
+                else:
+                    # code -1 (missing) picks the None on the end
+                    lookup = column.categories + [None]
+                    if picked is None:
+                        codes = column.codes[start:end].tolist()
+                    else:
+                        source = column.codes
+                        codes = [source[i] for i in picked]
+                    values_by_column.append([lookup[code] for code in codes])
+            yield names, values_by_column
+
+    def to_rows(self) -> list[dict]:
+        """
+        Materialize the whole table as a list of dicts
+        Returns:
+            List of dicts containing weather data
+        """
+        return list(self.iter_rows())
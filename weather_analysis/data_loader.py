@@ -1,15 +1,71 @@
+import bz2
 import csv
+import gzip
+import hashlib
+import io
+import lzma
 import os
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
+from itertools import chain, islice
+from .analytics import StreamingAccumulator
+from .columnar import BATCH_SIZE, ColumnarTable
+from .predicates import predicate_columns
+from .schema import CATEGORICAL, NUMERIC, DEFAULT_SAMPLE_SIZE, build_column_converters, build_converters, convert_value, infer_schema
+from .sketches import KLLSketch
 from .logger_config import setup_logger
 
 logger = setup_logger(__name__)
 
+# don't bother splitting files into ranges smaller than this
+MIN_CHUNK_BYTES = 1024 * 1024
+
+# bytes pulled from a decompressor per read, small reads make decompression call heavy
+READ_BUFFER_SIZE = 1024 * 1024
+
+# follow mode reads appended data in blocks this big so a first load doesn't hold the whole file twice
+FOLLOW_BLOCK_BYTES = 16 * 1024 * 1024
+
+# bytes before a checkpoint offset that are hashed to notice a file being replaced or rewritten
+TAIL_CHECK_BYTES = 4096
+
+# magic bytes at the start of compressed files, checked instead of trusting the extension
+_COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+)
+_DECOMPRESSORS = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+}
+
+
+def detect_compression(file_path):
+    """
+    Detect a gzip, bz2 or xz file from its first bytes
+    Args:
+        file_path: Path to the file
+    Returns:
+        'gzip', 'bz2', 'xz', or None for uncompressed files
+    Raises:
+        FileNotFoundError: File doesn't exist
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(6)
+    for magic, compression in _COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
 # had to relearn context managers, but I think it will be worth it and is needed for this project
 @contextmanager
 def open_csv_file(file_path, mode='r', encoding='utf-8'):
     """
     Context manager to safely open and clos CSV files
+    - gzip, bz2 and xz files are detected when reading and decompressed as they are read
     Args:
         file_path: Path to the CSV file
         mode: File mode
@@ -24,7 +80,14 @@ def open_csv_file(file_path, mode='r', encoding='utf-8'):
     file_handle = None
     try:
         logger.debug(f"Opening file: {file_path}")
-        file_handle = open(file_path, mode=mode, encoding=encoding, newline='')
+        compression = detect_compression(file_path) if mode in ('r', 'rt') else None
+        if compression:
+            logger.debug(f"Decompressing {compression} file while reading: {file_path}")
+            stream = _DECOMPRESSORS[compression](file_path, 'rb')
+            file_handle = io.TextIOWrapper(io.BufferedReader(stream, buffer_size=READ_BUFFER_SIZE),
+                                           encoding=encoding, newline='')
+        else:
+            file_handle = open(file_path, mode=mode, encoding=encoding, newline='')
         yield file_handle
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
@@ -44,17 +107,215 @@ def open_csv_file(file_path, mode='r', encoding='utf-8'):
                 logger.warning(f"Error closing file {file_path}: {e}")
 
 
-def csv_row_generator(file_path):
+def infer_csv_schema(file_path, sample_size=DEFAULT_SAMPLE_SIZE, encoding='utf-8'):
     """
-    Generator to yield rows from CSV file one at a time and memory-efficient for large files
+    Infer the column types of a CSV file from its first rows
     Args:
-        file_path: Path the CSV file
+        file_path: Path to the CSV file
+        sample_size: Number of data rows to look at
+        encoding: File encoding
+    Returns:
+        Dict of column name -> 'numeric' or 'categorical'
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: CSV file has no headers
+    """
+    with open_csv_file(file_path, encoding=encoding) as csvfile:
+        reader = csv.reader(csvfile)
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            logger.error(f"CSV file has no headers: {file_path}")
+            raise ValueError("CSV file has no headers")
+        return infer_schema(fieldnames, islice(reader, sample_size))
+
+
+def read_csv_header(file_path, encoding='utf-8') -> list:
+    """
+    Read the column names of a CSV file without reading its rows
+    Args:
+        file_path: Path to the CSV file (may be compressed)
+        encoding: File encoding
+    Returns:
+        List of column names in file order
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: CSV file has no headers
+    """
+    with open_csv_file(file_path, encoding=encoding) as csvfile:
+        fieldnames = next(csv.reader(csvfile), None)
+    if fieldnames is None:
+        logger.error(f"CSV file has no headers: {file_path}")
+        raise ValueError("CSV file has no headers")
+    return fieldnames
+
+
+def resolve_columns(fieldnames, columns):
+    """
+    Work out which header positions a column projection needs
+    Args:
+        fieldnames: Header names in file order
+        columns: Iterable of column names to keep, or None for all
+    Returns:
+        Tuple of (kept names, their indexes in the header), indexes is None when keeping everything
+    Raises:
+        ValueError: A requested column isn't in the header
+    """
+    if columns is None:
+        return list(fieldnames), None
+    positions = {name: i for i, name in enumerate(fieldnames)}
+    names = list(dict.fromkeys(columns))
+    for name in names:
+        if name not in positions:
+            logger.error(f"Column '{name}' not found in dataset")
+            raise ValueError(f"Column '{name}' not found in dataset")
+    return names, [positions[name] for name in names]
+
+
+def _fit_record(record, width):
+    """Pad short records with empty cells (read as None, like csv.DictReader) and drop extra cells"""
+    if len(record) < width:
+        return record + [''] * (width - len(record))
+    logger.warning(f"Row has {len(record) - width} more cells than the header, ignoring the extra cells")
+    return record[:width]
+
+
+def _never(text) -> bool:
+    return False
+
+
+def _predicate_checks(fieldnames, predicates, schema=None):
+    """
+    Pair each predicate's raw text test with the header position of the cell it tests
+    - A numeric predicate on a column the schema reads as categorical never matches, the converted cell is text
+      and ColumnPredicate.matches wouldn't match it either
+    Raises:
+        ValueError: A predicate names a column that isn't in the header
+    """
+    if not predicates:
+        return []
+    resolve_columns(fieldnames, predicate_columns(predicates))
+    positions = {name: i for i, name in enumerate(fieldnames)}
+    schema = schema or {}
+    return [(positions[predicate.column],
+             _never if predicate.is_numeric and schema.get(predicate.column) == CATEGORICAL else predicate.matches_raw)
+            for predicate in predicates]
+
+
+def _filter_records(records, fieldnames, checks, counts=None):
+    """
+    Generator that drops raw records failing any predicate, before any of their cells are converted
+    Args:
+        records: Iterable of raw records (lists of strings)
+        fieldnames: Header names
+        checks: List of (header position, raw text test) from _predicate_checks
+        counts: Optional dict, 'read' is set to the number of non blank records seen
+    Yields:
+        Records that pass every predicate, fitted to the header width
+    """
+    width = len(fieldnames)
+    read = 0
+    for record in records:
+        if not record:
+            continue
+        read += 1
+        if len(record) != width:
+            record = _fit_record(record, width)
+        # only the tested cells are looked at, as raw text
+        for index, test in checks:
+            if not test(record[index]):
+                break
+        else:
+            yield record
+    if counts is not None:
+        counts['read'] = read
+
+
+def _convert_records(records, fieldnames, converters, indexes=None):
+    """
+    Generator that turns raw csv records into typed row dicts using per column converters
+    Args:
+        records: Iterable of raw records (lists of strings)
+        fieldnames: Header names
+        converters: One converter per kept column (from build_converters)
+        indexes: Header positions to keep (from resolve_columns), None keeps every column
     Yields:
         Dictionary representing each row
+    """
+    width = len(fieldnames)
+    names = fieldnames if indexes is None else [fieldnames[i] for i in indexes]
+    for record in records:
+        # blank lines are skipped, same as csv.DictReader
+        if not record:
+            continue
+        if len(record) != width:
+            record = _fit_record(record, width)
+        # only the projected cells get converted
+        cells = record if indexes is None else [record[i] for i in indexes]
+        try:
+            values = [convert(value) for convert, value in zip(converters, cells)]
+        except ValueError:
+            # a cell didn't match its column type, fall back to guessing this row cell by cell
+            logger.debug("Row doesn't match the schema, converting it cell by cell")
+            values = [convert_value(value) for value in cells]
+        yield dict(zip(names, values))
+
+
+def _convert_cells(name, convert, cells):
+    """Run a column converter over a batch of cells, guessing cell by cell if one doesn't fit the column type"""
+    try:
+        return convert(cells)
+    except ValueError:
+        logger.debug(f"Column '{name}' has cells that don't match the schema, converting the batch cell by cell")
+        return [convert_value(value) for value in cells]
+
+
+def _convert_batches(records, fieldnames, converters, indexes=None):
+    """
+    Generator that converts raw csv records a batch at a time, one column at a time
+    Args:
+        records: Iterable of raw records (lists of strings)
+        fieldnames: Header names
+        converters: One batch converter per kept column (from build_column_converters)
+        indexes: Header positions to keep (from resolve_columns), None keeps every column
+    Yields:
+        List with one list of converted values per kept column
+    """
+    width = len(fieldnames)
+    names = fieldnames if indexes is None else [fieldnames[i] for i in indexes]
+    records = iter(records)
+    while True:
+        batch = list(islice(records, BATCH_SIZE))
+        if not batch:
+            return
+        # blank lines are skipped, same as csv.DictReader
+        batch = [record for record in batch if record]
+        if not batch:
+            continue
+        if any(len(record) != width for record in batch):
+            batch = [record if len(record) == width else _fit_record(record, width) for record in batch]
+
+        # transpose to columns, only the projected columns get converted
+        if indexes is None:
+            cells_by_column = list(zip(*batch))
+        else:
+            cells_by_column = [[record[i] for record in batch] for i in indexes]
+        yield [_convert_cells(name, convert, cells) for name, convert, cells in zip(names, converters, cells_by_column)]
+
+
+def _read_csv(file_path, schema, columns, as_rows, predicates=None):
+    """
+    Shared reader behind csv_row_generator and csv_column_batches
+    Args:
+        file_path: Path the CSV file
+        schema: Optional column types, inferred from the first rows if not given
+        columns: Optional list of column names to keep
+        as_rows: Yield row dicts if True, column batches if False
+        predicates: Optional list of ColumnPredicate, rows failing any are dropped before conversion
+    Yields:
+        Row dicts, or (column names, list of value lists) batches
     Raises:
         FileNotFoundError: File doesn't exist
-        ValueError: CSV file is empty or messed up
-        csv.Error: CSV parsing errors
+        ValueError: CSV file is empty or messed up, or a requested column doesn't exist
     """
     if not os.path.exists(file_path):
         logger.error(f"File not found: {file_path}")
@@ -62,45 +323,50 @@ def csv_row_generator(file_path):
 
     try:
         with open_csv_file(file_path) as csvfile:
-            reader = csv.DictReader(csvfile)
+            reader = csv.reader(csvfile)
+            fieldnames = next(reader, None)
 
             # check if file headers
-            if reader.fieldnames is None:
+            if fieldnames is None:
                 logger.error(f"CSV file has no headers: {file_path}")
                 raise ValueError("CSV file has no headers")
 
             logger.info(f"Reading CSV file: {file_path}")
-            logger.debug(f"CSV columns: {reader.fieldnames}")
+            logger.debug(f"CSV columns: {fieldnames}")
+            names, indexes = resolve_columns(fieldnames, columns)
 
-            row_count = 0
-            for row_num, row in enumerate(reader, start=2):  # start at 2, after header
-                try:
-                    # convert num strings to appropriate types
-                    processed_row = {}
-                    for key, value in row.items():
-                        if value == '' or value is None:
-                            processed_row[key] = None
-                        else:
-                            # try to convert to float if possible
-                            try:
-                                processed_row[key] = float(value)
-                            except (ValueError, TypeError):
-                                # keep as string if not number
-                                processed_row[key] = value
+            records = reader
+            if schema is None:
+                # peek at the first rows to pick a converter per column, before any filtering
+                sample = list(islice(reader, DEFAULT_SAMPLE_SIZE))
+                schema = infer_schema(fieldnames, sample)
+                records = chain(sample, reader)
+            checks = _predicate_checks(fieldnames, predicates, schema)
 
-                    row_count += 1
-                    yield processed_row
+            counts = {}
+            if checks:
+                records = _filter_records(records, fieldnames, checks, counts)
 
-                except Exception as e:
-                    logger.warning(f"Error processing row {row_num}: {e}")
-                    # continue processing other rows
-                    continue
+            row_count = 0
+            if as_rows:
+                for row in _convert_records(records, fieldnames, build_converters(names, schema), indexes):
+                    row_count += 1
+                    yield row
+            else:
+                converters = build_column_converters(names, schema)
+                for values_by_column in _convert_batches(records, fieldnames, converters, indexes):
+                    row_count += len(values_by_column[0]) if values_by_column else 0
+                    yield names, values_by_column
 
-            if row_count == 0:
+            # a filter matching nothing is fine, an empty file isn't
+            if counts.get('read', row_count) == 0:
                 logger.error(f"CSV file is emtpy or has no data rows: {file_path}")
                 raise ValueError("CSV file is empty or has no data rows")
 
-            logger.info(f"Successfully read {row_count} rows from {file_path}")
+            if checks:
+                logger.info(f"Successfully read {row_count} of {counts['read']} rows matching predicates from {file_path}")
+            else:
+                logger.info(f"Successfully read {row_count} rows from {file_path}")
 
     except csv.Error as e:
         logger.error(f"CSV parsing error in {file_path}: {e}")
@@ -110,11 +376,520 @@ def csv_row_generator(file_path):
         raise
 
 
-def load_weather_data(file_path):
+def csv_row_generator(file_path, schema=None, columns=None, predicates=None):
+    """
+    Generator to yield rows from CSV file one at a time and memory-efficient for large files
+    Args:
+        file_path: Path the CSV file
+        schema: Optional dict of column name -> 'numeric' or 'categorical'. Inferred from the first rows if not given
+        columns: Optional list of column names to keep, other cells are never converted
+        predicates: Optional list of ColumnPredicate, checked on the raw text so failing rows are never converted
+    Yields:
+        Dictionary representing each row
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: CSV file is empty or messed up, or a requested column doesn't exist
+        csv.Error: CSV parsing errors
+    """
+    return _read_csv(file_path, schema, columns, as_rows=True, predicates=predicates)
+
+
+def csv_column_batches(file_path, schema=None, columns=None, predicates=None):
+    """
+    Generator to yield a CSV file as batches of columns, the fastest way to feed columnar storage
+    Args:
+        file_path: Path the CSV file
+        schema: Optional dict of column name -> 'numeric' or 'categorical'. Inferred from the first rows if not given
+        columns: Optional list of column names to keep, other cells are never converted
+        predicates: Optional list of ColumnPredicate, checked on the raw text so failing rows are never converted
+    Yields:
+        Tuple of (column names, list with one list of values per column) for each batch of rows
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: CSV file is empty or messed up, or a requested column doesn't exist
+    """
+    return _read_csv(file_path, schema, columns, as_rows=False, predicates=predicates)
+
+
+def _project_schema(schema, columns):
+    """Keep only the schema entries for projected columns, in projection order"""
+    if columns is None or schema is None:
+        return schema
+    return {name: schema[name] for name in columns if name in schema}
+
+
+def _read_header(file_path, encoding='utf-8'):
+    """
+    Read the header line of a CSV file in binary mode
+    Args:
+        file_path: Path to the CSV file
+        encoding: File encoding
+    Returns:
+        Tuple of (fieldnames, byte offset where the data rows start)
+    Raises:
+        ValueError: CSV file has no headers
+    """
+    with open(file_path, 'rb') as f:
+        header_line = f.readline()
+        data_start = f.tell()
+    fieldnames = next(csv.reader(io.StringIO(header_line.decode(encoding), newline='')), None)
+    if fieldnames is None:
+        logger.error(f"CSV file has no headers: {file_path}")
+        raise ValueError("CSV file has no headers")
+    return fieldnames, data_start
+
+
+def split_byte_ranges(file_path, start, chunks, min_chunk_bytes=None):
+    """
+    Split a file into byte ranges that begin and end on line boundaries
+    Args:
+        file_path: Path to the file
+        start: Byte offset to start splitting from (first data row)
+        chunks: Desired number of ranges
+        min_chunk_bytes: Smallest range worth handing to a worker, defaults to MIN_CHUNK_BYTES
+    Returns:
+        List of (start, end) byte offsets covering [start, file size)
+    """
+    if min_chunk_bytes is None:
+        min_chunk_bytes = MIN_CHUNK_BYTES
+    size = os.path.getsize(file_path)
+    chunks = max(1, min(chunks, (size - start) // max(1, min_chunk_bytes)))
+    step = (size - start) / chunks
+
+    boundaries = [start]
+    with open(file_path, 'rb') as f:
+        for i in range(1, chunks):
+            f.seek(int(start + step * i))
+            # move to the start of the next line so no row is cut in half
+            f.readline()
+            boundaries.append(max(boundaries[-1], min(f.tell(), size)))
+    boundaries.append(size)
+
+    ranges = [(lo, hi) for lo, hi in zip(boundaries, boundaries[1:]) if hi > lo]
+    logger.debug(f"Split {file_path} into {len(ranges)} byte ranges")
+    return ranges
+
+
+def _parse_byte_range(file_path, start, end, fieldnames, schema, encoding='utf-8', as_columns=False, columns=None,
+                      predicates=None):
+    """
+    Worker function: parse the rows in one byte range of a CSV file
+    Args:
+        file_path: Path to the CSV file
+        start: First byte of the range (start of a line)
+        end: Byte after the range (start of a line or end of file)
+        fieldnames: Header names read by the parent
+        schema: Column types decided by the parent so every range converts the same way
+        encoding: File encoding
+        as_columns: Return a ColumnarTable instead of a list of dicts
+        columns: Optional list of column names to keep
+        predicates: Optional list of ColumnPredicate checked on the raw text
+    Returns:
+        List of dicts or ColumnarTable for the rows in the range
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode(encoding)
+    return _parse_text(text, fieldnames, schema, as_columns, columns, predicates)
+
+
+def _parse_text(text, fieldnames, schema, as_columns=False, columns=None, predicates=None):
+    """Parse decoded CSV data rows (no header) into a list of dicts or a ColumnarTable"""
+    records = csv.reader(io.StringIO(text, newline=''))
+    names, indexes = resolve_columns(fieldnames, columns)
+    checks = _predicate_checks(fieldnames, predicates, schema)
+    if checks:
+        records = _filter_records(records, fieldnames, checks)
+    if as_columns:
+        batches = _convert_batches(records, fieldnames, build_column_converters(names, schema), indexes)
+        return ColumnarTable.from_batches(((names, values) for values in batches), schema=_project_schema(schema, names))
+    return list(_convert_records(records, fieldnames, build_converters(names, schema), indexes))
+
+
+def _tail_hash(file_path, offset):
+    """sha256 of the bytes just before offset"""
+    with open(file_path, 'rb') as f:
+        f.seek(max(0, offset - TAIL_CHECK_BYTES))
+        return hashlib.sha256(f.read(offset - f.tell())).hexdigest()
+
+
+def follow_checkpoint(file_path, offset, fieldnames, schema, seen=None, open_line=False):
+    """
+    Describe how far a growing CSV file has been read
+    Args:
+        file_path: Path to the CSV file
+        offset: Byte offset after the last line read
+        fieldnames: Header names
+        schema: Column types the rows were converted with, appended rows must use the same ones
+        seen: File size when it was read, including a partial last line held back (defaults to offset)
+        open_line: The last line read had no newline (it was taken as complete because the file had stopped growing)
+    Returns:
+        Dict with 'offset', 'fieldnames', 'schema', 'tail_sha256', 'seen' and 'open_line'
+        (JSON friendly, stored in the cache header)
+    """
+    return {
+        'offset': offset,
+        'fieldnames': list(fieldnames),
+        'schema': dict(schema),
+        'tail_sha256': _tail_hash(file_path, offset),
+        'seen': offset if seen is None else seen,
+        'open_line': open_line,
+    }
+
+
+def _continues_open_line(file_path, checkpoint) -> bool:
+    """Check whether bytes were added to an unterminated last line that was already read as a row"""
+    if not checkpoint.get('open_line'):
+        return False
+    with open(file_path, 'rb') as f:
+        f.seek(checkpoint['offset'])
+        following = f.read(1)
+    return following not in (b'', b'\n', b'\r')
+
+
+def initial_checkpoint(file_path, schema=None):
+    """
+    Checkpoint for a CSV file nothing has been read from yet (just after the header)
+    Args:
+        file_path: Path to the CSV file
+        schema: Optional column types, inferred from the first rows if not given
+    Returns:
+        Checkpoint dict (see follow_checkpoint)
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: CSV file has no headers
+    """
+    fieldnames, data_start = _read_header(file_path)
+    if schema is None:
+        schema = infer_csv_schema(file_path)
+    return follow_checkpoint(file_path, data_start, fieldnames, schema)
+
+
+def checkpoint_matches(file_path, checkpoint):
+    """
+    Check a file still starts with the data a checkpoint was taken on, i.e. it only had rows appended
+    Args:
+        file_path: Path to the CSV file
+        checkpoint: Checkpoint dict from follow_checkpoint
+    Returns:
+        False if the file shrank, its header changed, the bytes before the offset changed
+        or an unterminated last line that was read as a row got continued
+    """
+    try:
+        if os.path.getsize(file_path) < checkpoint['offset']:
+            return False
+        fieldnames, _ = _read_header(file_path)
+        return (fieldnames == checkpoint['fieldnames']
+                and _tail_hash(file_path, checkpoint['offset']) == checkpoint['tail_sha256']
+                and not _continues_open_line(file_path, checkpoint))
+    except (OSError, ValueError, KeyError) as e:
+        logger.debug(f"Checkpoint check failed for {file_path}: {e}")
+        return False
+
+
+def read_appended_rows(file_path, checkpoint, columns=None, predicates=None, encoding='utf-8', flush=False):
+    """
+    Parse the complete lines written to a CSV file after a checkpoint, a trailing partial line is left for later
+    - A partial last line is read as a row once the file hasn't changed since the last read,
+      or right away with flush=True (a first load, so it matches a plain load of a file without a final newline)
+    - If such a line gets continued later, checkpoint_matches fails and the file has to be loaded again
+    - Rows are split on b'\n', so quoted fields with embedded newlines aren't supported in follow mode
+    Args:
+        file_path: Path to the CSV file
+        checkpoint: Checkpoint dict from initial_checkpoint / an earlier call
+        columns: Optional list of column names to keep
+        predicates: Optional list of ColumnPredicate checked on the raw text
+        encoding: File encoding
+        flush: Read an unterminated last line as a complete row
+    Returns:
+        Tuple of (ColumnarTable of the new rows, checkpoint after them)
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: The unterminated last line read before was continued (load the file again)
+    """
+    if _continues_open_line(file_path, checkpoint):
+        logger.error(f"Last line of {file_path} was read before it was finished")
+        raise ValueError("The unterminated last line read at the checkpoint was continued, reload the file")
+
+    fieldnames, schema = checkpoint['fieldnames'], checkpoint['schema']
+    names, _ = resolve_columns(fieldnames, columns)
+    table = ColumnarTable.from_batches([], schema=_project_schema(schema, names))
+    offset = checkpoint['offset']
+    open_line = checkpoint.get('open_line', False)
+    pending = b''
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        if open_line:
+            # the newline that finishes the line already read as a row
+            ending = f.read(2)
+            newline = 2 if ending == b'\r\n' else 1 if ending[:1] in (b'\n', b'\r') else 0
+            offset += newline
+            open_line = newline == 0
+            f.seek(offset)
+        while True:
+            block = f.read(FOLLOW_BLOCK_BYTES)
+            if not block:
+                break
+            block = pending + block
+            end = block.rfind(b'\n') + 1
+            pending = block[end:]
+            if end:
+                table.extend(_parse_text(block[:end].decode(encoding), fieldnames, schema, True, columns, predicates))
+                offset += end
+
+    seen = offset + len(pending)
+    # a partial line that is still the same as at the last read means the writer is done with the file
+    stalled = offset == checkpoint['offset'] and seen == checkpoint.get('seen')
+    if (flush or stalled) and pending.strip():
+        table.extend(_parse_text(pending.decode(encoding), fieldnames, schema, True, columns, predicates))
+        offset = seen
+        open_line = True
+
+    if offset == checkpoint['offset'] and seen == checkpoint.get('seen', offset):
+        return table, checkpoint
+    if table.row_count:
+        logger.info(f"Read {table.row_count} appended rows from {file_path}")
+    return table, follow_checkpoint(file_path, offset, fieldnames, schema, seen=seen, open_line=open_line)
+
+
+def _can_split(file_path):
+    """Check a file can be split into byte ranges, compressed streams can't be entered mid way"""
+    compression = detect_compression(file_path)
+    if compression:
+        logger.info(f"{file_path} is {compression} compressed, parsing it in one process")
+        return False
+    return True
+
+
+def _parallel_parse(file_path, schema, workers, as_columns, columns=None, predicates=None):
+    """
+    Parse a CSV file across a process pool, one newline aligned byte range per task
+    Args:
+        file_path: Path to the CSV file
+        schema: Optional column types, inferred once here if not given
+        workers: Number of worker processes
+        as_columns: Workers return ColumnarTable chunks instead of lists of dicts
+        columns: Optional list of column names to keep
+        predicates: Optional list of ColumnPredicate, applied inside the workers
+    Returns:
+        List of per range results in file order
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: CSV file is empty or messed up
+    """
+    if not os.path.exists(file_path):
+        logger.error(f"File not found: {file_path}")
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    fieldnames, data_start = _read_header(file_path)
+    # fail early on unknown columns instead of inside every worker
+    resolve_columns(fieldnames, columns)
+    _predicate_checks(fieldnames, predicates)
+    if schema is None:
+        schema = infer_csv_schema(file_path)
+    ranges = split_byte_ranges(file_path, data_start, workers)
+
+    if len(ranges) <= 1:
+        logger.debug("File too small to split, parsing in this process")
+        results = [_parse_byte_range(file_path, lo, hi, fieldnames, schema, as_columns=as_columns, columns=columns,
+                                     predicates=predicates)
+                   for lo, hi in ranges]
+    else:
+        logger.info(f"Parsing {file_path} in {len(ranges)} ranges across {workers} worker processes")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map keeps the results in submission order, i.e. file order
+            results = list(executor.map(
+                _parse_byte_range,
+                [file_path] * len(ranges),
+                [lo for lo, _ in ranges],
+                [hi for _, hi in ranges],
+                [fieldnames] * len(ranges),
+                [schema] * len(ranges),
+                ['utf-8'] * len(ranges),
+                [as_columns] * len(ranges),
+                [columns] * len(ranges),
+                [predicates] * len(ranges),
+            ))
+
+    # with predicates an empty result just means nothing matched
+    if not ranges or (not predicates and sum(len(result) for result in results) == 0):
+        logger.error(f"CSV file is emtpy or has no data rows: {file_path}")
+        raise ValueError("CSV file is empty or has no data rows")
+    return results
+
+
+def _accumulate_task(file_path, start, end, fieldnames, schema, column_names, predicates=None):
+    """
+    Worker function: summarize some columns of a byte range (or a whole file when start is None)
+    Returns:
+        Dict of column name -> (StreamingAccumulator, KLLSketch, missing count, holds text), small and picklable
+        whatever the range size
+    """
+    summaries = {name: (StreamingAccumulator(), KLLSketch(), 0, False) for name in column_names}
+    if start is None:
+        # compressed files can't be split, stream them batch by batch instead
+        for names, batch in csv_column_batches(file_path, schema=schema, columns=column_names, predicates=predicates):
+            for name, values in zip(names, batch):
+                accumulator, sketch, missing, text = summaries[name]
+                valid = [value for value in values if isinstance(value, float) and value == value]
+                accumulator.push_many(valid)
+                sketch.push_many(valid)
+                summaries[name] = (accumulator, sketch, missing + values.count(None),
+                                   text or any(isinstance(value, str) for value in values))
+    else:
+        table = _parse_byte_range(file_path, start, end, fieldnames, schema, as_columns=True, columns=column_names,
+                                  predicates=predicates)
+        for name in column_names:
+            accumulator, sketch, _, _ = summaries[name]
+            column = table.get_column(name)
+            valid = column.valid_array()
+            accumulator.push_many(valid)
+            sketch.push_many(valid)
+            # a string in a numeric column makes the loaded column categorical
+            summaries[name] = (accumulator, sketch, column.null_count(), column.kind != NUMERIC)
+    return summaries
+
+
+def _summary_tasks(file_paths, column_names, schema, workers, predicates) -> list[tuple]:
+    """Split files into (file_path, start, end, fieldnames, schema) tasks, whole compressed files get start None"""
+    if isinstance(file_paths, (str, os.PathLike)):
+        file_paths = [file_paths]
+    tasks = []
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            logger.error(f"File not found: {file_path}")
+            raise FileNotFoundError(f"File not found: {file_path}")
+        if not _can_split(file_path):
+            tasks.append((file_path, None, None, None, schema))
+            continue
+        fieldnames, data_start = _read_header(file_path)
+        # fail early on unknown columns instead of inside every worker
+        resolve_columns(fieldnames, column_names)
+        _predicate_checks(fieldnames, predicates)
+        file_schema = schema if schema is not None else infer_csv_schema(file_path)
+        for lo, hi in split_byte_ranges(file_path, data_start, workers):
+            tasks.append((file_path, lo, hi, fieldnames, file_schema))
+    return tasks
+
+
+def accumulate_columns(file_paths, column_names, schema=None, workers=1, predicates=None):
+    """
+    Stream columns of one or more CSV files into mergeable summaries in one read, optionally across a process pool
+    - Each byte range (or compressed file) becomes one task returning partial summaries
+    - Partials are merged in the parent, no rows are sent between processes
+    Args:
+        file_paths: Path or list of paths to CSV files
+        column_names: Columns to summarize (non numeric and missing values are skipped)
+        schema: Optional column types, inferred per file if not given
+        workers: Number of worker processes (1 = run in this process)
+        predicates: Optional list of ColumnPredicate checked on the raw text
+    Returns:
+        Dict of column name -> (StreamingAccumulator, KLLSketch, missing count, holds text) covering every
+        matching row, holds text is True when a value wasn't a number (the loaded column would be categorical)
+    Raises:
+        FileNotFoundError: A file doesn't exist
+        ValueError: CSV file has no headers or a column doesn't exist
+    """
+    column_names = list(dict.fromkeys(column_names))
+    tasks = _summary_tasks(file_paths, column_names, schema, workers, predicates)
+
+    if workers > 1 and len(tasks) > 1:
+        logger.info(f"Summarizing {len(column_names)} columns in {len(tasks)} tasks across {workers} worker processes")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(_accumulate_task, *zip(*tasks), [column_names] * len(tasks),
+                                         [predicates] * len(tasks)))
+    else:
+        partials = [_accumulate_task(*task, column_names, predicates) for task in tasks]
+
+    merged = {name: (StreamingAccumulator(), KLLSketch(), 0, False) for name in column_names}
+    for partial in partials:
+        for name, (partial_accumulator, partial_sketch, partial_missing, partial_text) in partial.items():
+            accumulator, sketch, missing, text = merged[name]
+            merged[name] = (accumulator.merge(partial_accumulator), sketch.merge(partial_sketch),
+                            missing + partial_missing, text or partial_text)
+    return merged
+
+
+def _group_task(file_path, start, end, fieldnames, schema, aggregator, predicates=None):
+    """
+    Worker function: hash aggregate a byte range (or a whole file when start is None) into an empty aggregator
+    Returns:
+        The filled aggregator, its size depends on the number of groups, not rows
+    """
+    columns = aggregator.columns
+    if start is None:
+        batches = csv_column_batches(file_path, schema=schema, columns=columns, predicates=predicates)
+    else:
+        table = _parse_byte_range(file_path, start, end, fieldnames, schema, as_columns=True, columns=columns,
+                                  predicates=predicates)
+        batches = table.column_batches(columns)
+    for names, values_by_column in batches:
+        aggregator.update(dict(zip(names, values_by_column)))
+    return aggregator
+
+
+def aggregate_groups(file_paths, aggregator, schema=None, workers=1, predicates=None):
+    """
+    Hash aggregate one or more CSV files in one read, optionally as partial aggregates across a process pool
+    - Each byte range (or compressed file) is aggregated into its own partial, the partials are merged here
+    Args:
+        file_paths: Path or list of paths to CSV files
+        aggregator: GroupAggregator (see groupby), rows are folded into it
+        schema: Optional column types, inferred per file if not given
+        workers: Number of worker processes (1 = run in this process)
+        predicates: Optional list of ColumnPredicate checked on the raw text
+    Returns:
+        The aggregator, with every matching row folded in
+    Raises:
+        FileNotFoundError: A file doesn't exist
+        ValueError: CSV file has no headers or a column doesn't exist
+    """
+    tasks = _summary_tasks(file_paths, aggregator.columns, schema, workers, predicates)
+    empties = [aggregator.empty() for _ in tasks]
+    if workers > 1 and len(tasks) > 1:
+        logger.info(f"Aggregating groups of {list(aggregator.keys)} in {len(tasks)} tasks "
+                    f"across {workers} worker processes")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(_group_task, *zip(*tasks), empties, [predicates] * len(tasks)))
+    else:
+        partials = [_group_task(*task, partial, predicates) for task, partial in zip(tasks, empties)]
+
+    for partial in partials:
+        aggregator.merge(partial)
+    return aggregator
+
+
+def accumulate_column(file_paths, column_name, schema=None, workers=1, predicates=None):
+    """
+    Stream one column of one or more CSV files into mergeable summaries (see accumulate_columns)
+    Args:
+        file_paths: Path or list of paths to CSV files
+        column_name: Column to summarize (non numeric and missing values are skipped)
+        schema: Optional column types, inferred per file if not given
+        workers: Number of worker processes (1 = run in this process)
+        predicates: Optional list of ColumnPredicate checked on the raw text
+    Returns:
+        Tuple of (StreamingAccumulator, KLLSketch) covering every matching value
+    Raises:
+        FileNotFoundError: A file doesn't exist
+        ValueError: CSV file has no headers or the column doesn't exist
+    """
+    accumulator, sketch, _, _ = accumulate_columns(file_paths, [column_name], schema=schema, workers=workers,
+                                                predicates=predicates)[column_name]
+    return accumulator, sketch
+
+
+def load_weather_data(file_path, schema=None, workers=1, columns=None, predicates=None):
     """
     Load weather data from csv and return a list of dicts. Uses generator for efficient memory use.
     Args:
         file_path: Path to the CSV file
+        schema: Optional dict of column name -> 'numeric' or 'categorical'
+        workers: Number of processes to parse with. Parallel parsing splits the file on line breaks,
+                 so files with line breaks inside quoted fields need workers=1
+                 (compressed files are always parsed in one process)
+        columns: Optional list of column names to load, the rest are skipped while parsing
+        predicates: Optional list of ColumnPredicate, only matching rows are converted and kept
     Returns:
         List of dicts containing weather data
     Raises:
@@ -124,9 +899,51 @@ def load_weather_data(file_path):
     """
     try:
         logger.info(f"Loading weather data from: {file_path}")
-        data = list(csv_row_generator(file_path))
+        if workers > 1 and _can_split(file_path):
+            data = []
+            for chunk in _parallel_parse(file_path, schema, workers, as_columns=False, columns=columns,
+                                         predicates=predicates):
+                data.extend(chunk)
+        else:
+            data = list(csv_row_generator(file_path, schema=schema, columns=columns, predicates=predicates))
         logger.info(f"Loaded {len(data)} records successfully")
         return data
     except Exception as e:
         logger.error(f"Failed to load weather data from {file_path}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def load_weather_columns(file_path, schema=None, workers=1, columns=None, predicates=None):
+    """
+    Load weather data from csv into a columnar table (typed float arrays and dictionary encoded strings)
+    Args:
+        file_path: Path to the CSV file
+        schema: Optional dict of column name -> 'numeric' or 'categorical', inferred if not given
+        workers: Number of processes to parse with (see load_weather_data)
+        columns: Optional list of column names to load, the rest are skipped while parsing
+        predicates: Optional list of ColumnPredicate, only matching rows are converted and kept
+    Returns:
+        ColumnarTable containing weather data
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: CSV file is empty or messed up
+        Exception: Other CSV reading errors
+    """
+    try:
+        logger.info(f"Loading weather data into columns from: {file_path}")
+        if schema is None:
+            schema = infer_csv_schema(file_path)
+        if workers > 1 and _can_split(file_path):
+            chunks = _parallel_parse(file_path, schema, workers, as_columns=True, columns=columns,
+                                     predicates=predicates)
+            table = chunks[0]
+            for chunk in chunks[1:]:
+                table.extend(chunk)
+        else:
+            batches = csv_column_batches(file_path, schema=schema, columns=columns, predicates=predicates)
+            table = ColumnarTable.from_batches(batches, schema=_project_schema(schema, columns))
+        logger.info(f"Loaded {len(table)} records into {len(table.column_names)} columns")
+        return table
+    except Exception as e:
+        logger.error(f"Failed to load weather data from {file_path}: {e}")
+        raise
@@ -0,0 +1,177 @@
+from typing import Iterable
+from .analytics import StreamingAccumulator
+from .sketches import KLLSketch
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# aggregate name -> how to read it off a StreamingAccumulator, None if the column had no valid values
+AGGREGATES = {
+    'count': lambda acc: acc.count,
+    'sum': lambda acc: acc.total,
+    'mean': lambda acc: acc.total / acc.count if acc.count else None,
+    'min': lambda acc: acc.min if acc.count else None,
+    'max': lambda acc: acc.max if acc.count else None,
+    'var': lambda acc: acc.variance() if acc.count else None,
+    'std': lambda acc: acc.std() if acc.count else None,
+}
+
+# aggregates estimated from a KLL sketch of the column instead
+SKETCH_AGGREGATES = ('median', 'quantile')
+
+
+def parse_aggregates(aggregates: dict) -> dict:
+    """
+    Check aggregate specs and normalize them to (column, function, quantile)
+    Args:
+        aggregates: result name -> 'count' (matching rows), (column, function) or (column, 'quantile', q)
+    Returns:
+        Dict of result name -> (column or None, function, quantile or None)
+    Raises:
+        ValueError: Unknown aggregate function or a quantile outside [0, 1]
+    """
+    specs = {}
+    for name, spec in aggregates.items():
+        if spec == 'count':
+            specs[name] = (None, 'count', None)
+            continue
+        column, function, *rest = spec
+        if function not in AGGREGATES and function not in SKETCH_AGGREGATES:
+            logger.error(f"Unknown aggregate function: {function}")
+            raise ValueError(f"Unknown aggregate '{function}', expected one of "
+                             f"{', '.join(list(AGGREGATES) + list(SKETCH_AGGREGATES))}")
+        q = 0.5 if function == 'median' else (rest[0] if rest else None)
+        if function == 'quantile' and (q is None or not 0 <= q <= 1):
+            logger.error(f"Invalid quantile for {name}: {q}")
+            raise ValueError(f"Aggregate '{name}' needs a quantile between 0 and 1, e.g. (column, 'quantile', 0.9)")
+        specs[name] = (column, function, q)
+    return specs
+
+
+class GroupAggregator:
+    """
+    Hash aggregation of column batches: every group of the key columns gets its own running aggregates
+    - One pass for every group, e.g. all stations at once instead of one filter and scan per station
+    - Per group and column a StreamingAccumulator (count, sum, mean, min, max, variance), plus a KLL sketch
+      for columns with median / quantile aggregates, so memory grows with the groups, not the rows
+    - Aggregators of the same spec merge, so partial aggregates of file chunks can run in worker processes
+    - Rows missing a key value are left out, no keys at all aggregates every row as the group ()
+    """
+
+    def __init__(self, keys: Iterable[str], aggregates: dict):
+        """
+        Initialize the aggregator
+        Args:
+            keys: Key column names, e.g. ['Location'] or ['Location', 'WindGustDir']
+            aggregates: result name -> 'count', (column, function) or (column, 'quantile', q),
+                        function one of count, sum, mean, min, max, var, std, median
+        Raises:
+            ValueError: Unknown aggregate function
+        """
+        self.keys = tuple(keys)
+        self.aggregates = dict(aggregates)
+        self.specs = parse_aggregates(self.aggregates)
+        self.value_columns = list(dict.fromkeys(column for column, _, _ in self.specs.values() if column is not None))
+        self._sketched = {column for column, function, _ in self.specs.values() if function in SKETCH_AGGREGATES}
+        # group key -> [row count, {column: (StreamingAccumulator, KLLSketch or None)}]
+        self.groups = {}
+        if not self.keys:
+            self.groups[()] = self._new_state()
+
+    @property
+    def columns(self) -> list[str]:
+        """Every column update() reads, keys first"""
+        return list(dict.fromkeys(self.keys + tuple(self.value_columns)))
+
+    def empty(self) -> 'GroupAggregator':
+        """Return a new aggregator with the same keys and aggregates and no groups (a partial to fill)"""
+        return GroupAggregator(self.keys, self.aggregates)
+
+    def _new_state(self) -> list:
+        return [0, {column: (StreamingAccumulator(), KLLSketch() if column in self._sketched else None)
+                    for column in self.value_columns}]
+
+    def _group_rows(self, batch: dict) -> dict:
+        """Split a batch into group key -> row positions (None for every row when there are no keys)"""
+        if not self.keys:
+            return {(): None}
+        if len(self.keys) == 1:
+            key_values = batch[self.keys[0]]
+        else:
+            key_values = zip(*(batch[key] for key in self.keys))
+        rows_by_key = {}
+        for row, key in enumerate(key_values):
+            rows = rows_by_key.get(key)
+            if rows is None:
+                rows_by_key[key] = [row]
+            else:
+                rows.append(row)
+        if len(self.keys) == 1:
+            rows_by_key.pop(None, None)
+        else:
+            rows_by_key = {key: rows for key, rows in rows_by_key.items() if None not in key}
+        return rows_by_key
+
+    def update(self, batch: dict) -> None:
+        """
+        Fold one batch of rows into the groups
+        Args:
+            batch: Dict of column name -> list of values (None for missing), holding every column in columns
+        """
+        count = len(next(iter(batch.values()))) if batch else 0
+        for key, rows in self._group_rows(batch).items():
+            state = self.groups.get(key)
+            if state is None:
+                state = self.groups[key] = self._new_state()
+            state[0] += count if rows is None else len(rows)
+            for column, (accumulator, sketch) in state[1].items():
+                values = batch[column]
+                if rows is not None:
+                    values = [values[row] for row in rows]
+                numbers = [value for value in values if type(value) in (float, int) and value == value]
+                accumulator.push_many(numbers)
+                if sketch is not None:
+                    sketch.push_many(numbers)
+
+    def merge(self, other: 'GroupAggregator') -> 'GroupAggregator':
+        """
+        Fold another aggregator of the same keys and aggregates into this one
+        Args:
+            other: GroupAggregator, e.g. the partial of a worker process
+        Returns:
+            self, so merges can be chained
+        """
+        for key, (count, columns) in other.groups.items():
+            state = self.groups.get(key)
+            if state is None:
+                state = self.groups[key] = self._new_state()
+            state[0] += count
+            for column, (accumulator, sketch) in columns.items():
+                mine, my_sketch = state[1][column]
+                mine.merge(accumulator)
+                if my_sketch is not None:
+                    my_sketch.merge(sketch)
+        return self
+
+    def _group_result(self, state: list) -> dict:
+        row_count, columns = state
+        result = {}
+        for name, (column, function, q) in self.specs.items():
+            if column is None:
+                result[name] = row_count
+            elif function in SKETCH_AGGREGATES:
+                sketch = columns[column][1]
+                result[name] = sketch.quantile(q) if len(sketch) else None
+            else:
+                result[name] = AGGREGATES[function](columns[column][0])
+        return result
+
+    def result(self) -> dict:
+        """
+        Return the aggregates of every group
+        Returns:
+            Dict of group key -> dict of result name -> value, in first seen order. The key is the value itself
+            for one key column and a tuple for several. median and quantile are estimates once a group
+            holds more values than its sketch keeps (rank error about 1.65% of the count)
+        """
+        return {key: self._group_result(state) for key, state in self.groups.items()}
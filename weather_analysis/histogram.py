@@ -0,0 +1,401 @@
+import math
+import random
+from array import array
+from collections import Counter
+from itertools import islice
+from typing import Iterable, Optional
+from .analytics import NUMPY_SELECT_THRESHOLD, _is_float_buffer, _load_numpy
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# bins drawn by the plot histograms, same as the plt.hist calls used before
+DEFAULT_BINS = 50
+
+# bins kept by the adaptive histograms plots are fed from, growing can leave the data in a quarter of them
+# so they are drawn combined down to DEFAULT_BINS over the filled range
+FINE_BINS = 4 * DEFAULT_BINS
+
+
+class Histogram:
+    """
+    Streaming, mergeable histogram with a fixed number of equal width bins, constant memory however many values
+    - Fixed: Histogram(bins, value_range=(low, high)), values outside the range are only counted in outside
+    - Adaptive (no range): the first values set the grid over their min and max, later values outside it double
+      the bin width (neighbouring bins are added together) until they fit, so no count is lost
+    - Fed from generators, lists or column buffers (numpy bincount for big float buffers when installed)
+    - Histograms with the same grid merge exactly, other grids are rebinned by bin center
+    """
+
+    def __init__(self, bins: int = DEFAULT_BINS, value_range: Optional[tuple] = None):
+        """
+        Initialize the histogram
+        Args:
+            bins: Number of bins (rounded up to even for adaptive histograms, so bins can be paired up)
+            value_range: Optional (low, high) for fixed bins
+        Raises:
+            ValueError: Fewer than 2 bins or an empty range
+        """
+        if bins < 2:
+            logger.error(f"Histogram needs at least 2 bins, got {bins}")
+            raise ValueError("bins must be at least 2")
+        self.fixed = value_range is not None
+        if not self.fixed and bins % 2:
+            bins += 1
+        self.bins = bins
+        self.counts = [0] * bins
+        self.count = 0
+        self.outside = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.low = None
+        self.width = None
+        if self.fixed:
+            low, high = value_range
+            if not high > low:
+                logger.error(f"Invalid histogram range: {value_range}")
+                raise ValueError("Histogram range must have high > low")
+            self.low = float(low)
+            self.width = (high - low) / bins
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def high(self) -> Optional[float]:
+        return None if self.low is None else self.low + self.width * self.bins
+
+    @property
+    def edges(self) -> list[float]:
+        """Bin edges, bins + 1 values (empty before the first value of an adaptive histogram)"""
+        if self.low is None:
+            return []
+        return [self.low + i * self.width for i in range(self.bins + 1)]
+
+    def _grow(self, low: float, high: float) -> None:
+        """Double the bin width until [low, high] fits, adding neighbouring bins together"""
+        if self.low is None:
+            # the first values set the grid, a width of 1 when they're all the same
+            self.low = low
+            self.width = (high - low) / self.bins if high > low else 1.0
+            return
+        while low < self.low or high > self.high:
+            merged = [self.counts[i] + self.counts[i + 1] for i in range(0, self.bins, 2)]
+            padding = [0] * (self.bins // 2)
+            if low < self.low:
+                # the old bins become the upper half
+                self.counts = padding + merged
+                self.low -= self.width * self.bins
+            else:
+                self.counts = merged + padding
+            self.width *= 2
+
+    def _add(self, numbers: list) -> None:
+        low, high = min(numbers), max(numbers)
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+        if self.fixed:
+            inside = [value for value in numbers if self.low <= value <= self.high]
+            self.outside += len(numbers) - len(inside)
+            numbers = inside
+            if not numbers:
+                return
+        else:
+            self._grow(low, high)
+        start, width, last, counts = self.low, self.width, self.bins - 1, self.counts
+        for index, hits in Counter([int((value - start) / width) for value in numbers]).items():
+            # the high edge belongs to the last bin
+            counts[min(index, last)] += hits
+        self.count += len(numbers)
+
+    def _add_array(self, np, values) -> None:
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        low, high = float(values.min()), float(values.max())
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+        if self.fixed:
+            inside = values[(values >= self.low) & (values <= self.high)]
+            self.outside += len(values) - len(inside)
+            values = inside
+            if not len(values):
+                return
+        else:
+            self._grow(low, high)
+        indexes = ((values - self.low) / self.width).astype(np.int64)
+        np.minimum(indexes, self.bins - 1, out=indexes)
+        for index, hits in enumerate(np.bincount(indexes, minlength=self.bins).tolist()):
+            self.counts[index] += hits
+        self.count += len(values)
+
+    def push(self, value: float) -> None:
+        """
+        Add one value
+        Args:
+            value: Number (None, NaN and infinities are skipped)
+        """
+        if value is not None and -math.inf < value < math.inf:
+            self._add([value])
+
+    def push_many(self, values: Iterable[float], batch_size: int = 65536) -> None:
+        """
+        Add many values, binning a batch at a time
+        Args:
+            values: Iterable of numbers (None, NaN and infinities are skipped), e.g. a generator or an array('d')
+            batch_size: Values binned together when reading from an iterator
+        """
+        np = None
+        if _is_float_buffer(values) and len(values) >= NUMPY_SELECT_THRESHOLD:
+            np = _load_numpy()
+        if np is not None:
+            self._add_array(np, np.asarray(values, dtype=np.float64))
+            return
+        iterator = iter(values)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            numbers = [value for value in batch if value is not None and -math.inf < value < math.inf]
+            if numbers:
+                self._add(numbers)
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        """
+        Fold another histogram into this one
+        Args:
+            other: Histogram, e.g. built on another file or in another process
+        Returns:
+            self, so merges can be chained
+        """
+        self.outside += other.outside
+        if not other.count:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.low is None and self.bins == other.bins:
+            # nothing binned yet, take the other grid as it is
+            self.low, self.width = other.low, other.width
+        if (self.low, self.width, self.bins) == (other.low, other.width, other.bins):
+            self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+            self.count += other.count
+            return self
+        if not self.fixed:
+            self._grow(other.low, other.high)
+            while self.width < other.width:
+                self._grow(self.low, self.low + self.width * self.bins * 2)
+        last = self.bins - 1
+        for index, hits in enumerate(other.counts):
+            if not hits:
+                continue
+            center = other.low + (index + 0.5) * other.width
+            if self.fixed and not self.low <= center <= self.high:
+                self.outside += hits
+                continue
+            self.counts[min(int((center - self.low) / self.width), last)] += hits
+            self.count += hits
+        return self
+
+    def trimmed(self, max_bins: Optional[int] = None) -> tuple:
+        """
+        Return the bins between the first and last non empty one, what a plot needs to draw
+        Args:
+            max_bins: Optional limit, neighbouring bins are added together to stay under it
+        Returns:
+            Tuple of (left edges, counts, bin width), empty lists for an empty histogram
+        """
+        filled = [index for index, hits in enumerate(self.counts) if hits]
+        if not filled:
+            return [], [], self.width
+        first, last = filled[0], filled[-1]
+        group = 1 if max_bins is None else max(1, math.ceil((last - first + 1) / max_bins))
+        counts = [sum(self.counts[index:min(index + group, last + 1)]) for index in range(first, last + 1, group)]
+        width = self.width * group
+        return [self.low + first * self.width + i * width for i in range(len(counts))], counts, width
+
+
+class Histogram2D:
+    """
+    Streaming 2D histogram (density grid) of (x, y) points, constant memory however many points
+    - bins x bins cells, each axis grows like an adaptive Histogram (bin width doubles, neighbours are added)
+    - counts is row major: counts[y_index * bins + x_index]
+    """
+
+    def __init__(self, bins: int = 100):
+        """
+        Initialize the grid
+        Args:
+            bins: Bins per axis (rounded up to even)
+        Raises:
+            ValueError: Fewer than 2 bins
+        """
+        if bins < 2:
+            logger.error(f"Histogram needs at least 2 bins, got {bins}")
+            raise ValueError("bins must be at least 2")
+        self.bins = bins + bins % 2
+        self.counts = [0] * (self.bins * self.bins)
+        self.count = 0
+        # per axis: [low, width, min, max]
+        self.x_axis = [None, None, math.inf, -math.inf]
+        self.y_axis = [None, None, math.inf, -math.inf]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _edges(self, axis: list) -> list[float]:
+        low, width = axis[0], axis[1]
+        return [] if low is None else [low + i * width for i in range(self.bins + 1)]
+
+    @property
+    def x_edges(self) -> list[float]:
+        return self._edges(self.x_axis)
+
+    @property
+    def y_edges(self) -> list[float]:
+        return self._edges(self.y_axis)
+
+    def _grow(self, axis: list, low: float, high: float, is_x: bool) -> None:
+        """Widen one axis until [low, high] fits, adding neighbouring cells along it together"""
+        axis[2], axis[3] = min(axis[2], low), max(axis[3], high)
+        if axis[0] is None:
+            axis[0] = low
+            axis[1] = (high - low) / self.bins if high > low else 1.0
+            return
+        n, half = self.bins, self.bins // 2
+        while low < axis[0] or high > axis[0] + axis[1] * n:
+            down = low < axis[0]
+            grid = [self.counts[row * n:(row + 1) * n] for row in range(n)]
+            if is_x:
+                grid = [[cells[i] + cells[i + 1] for i in range(0, n, 2)] for cells in grid]
+                grid = [[0] * half + cells if down else cells + [0] * half for cells in grid]
+            else:
+                grid = [[a + b for a, b in zip(grid[i], grid[i + 1])] for i in range(0, n, 2)]
+                padding = [[0] * n for _ in range(half)]
+                grid = padding + grid if down else grid + padding
+            self.counts = [cell for cells in grid for cell in cells]
+            if down:
+                axis[0] -= axis[1] * n
+            axis[1] *= 2
+
+    def push_many(self, x_values, y_values) -> None:
+        """
+        Add points
+        Args:
+            x_values: Sequence of x numbers (finite)
+            y_values: Sequence of y numbers, same length
+        """
+        if not len(x_values):
+            return
+        np = None
+        if _is_float_buffer(x_values) and len(x_values) >= NUMPY_SELECT_THRESHOLD:
+            np = _load_numpy()
+        if np is not None:
+            xs, ys = np.asarray(x_values, dtype=np.float64), np.asarray(y_values, dtype=np.float64)
+            self._grow(self.x_axis, float(xs.min()), float(xs.max()), True)
+            self._grow(self.y_axis, float(ys.min()), float(ys.max()), False)
+            last = self.bins - 1
+            x_index = np.minimum(((xs - self.x_axis[0]) / self.x_axis[1]).astype(np.int64), last)
+            y_index = np.minimum(((ys - self.y_axis[0]) / self.y_axis[1]).astype(np.int64), last)
+            cells = np.bincount(y_index * self.bins + x_index, minlength=len(self.counts)).tolist()
+            self.counts = [mine + new for mine, new in zip(self.counts, cells)]
+        else:
+            self._grow(self.x_axis, min(x_values), max(x_values), True)
+            self._grow(self.y_axis, min(y_values), max(y_values), False)
+            x_low, x_width = self.x_axis[0], self.x_axis[1]
+            y_low, y_width = self.y_axis[0], self.y_axis[1]
+            n, last = self.bins, self.bins - 1
+            cells = Counter([min(int((y - y_low) / y_width), last) * n + min(int((x - x_low) / x_width), last)
+                             for x, y in zip(x_values, y_values)])
+            for cell, hits in cells.items():
+                self.counts[cell] += hits
+        self.count += len(x_values)
+
+    def grid(self) -> list[list[int]]:
+        """Return the counts as rows of cells, one row per y bin from the bottom"""
+        n = self.bins
+        return [self.counts[row * n:(row + 1) * n] for row in range(n)]
+
+
+# scatter plots with more points than this are drawn as a density grid
+DENSITY_THRESHOLD = 50000
+# cells per axis of the density grid
+DENSITY_BINS = 100
+# points kept by the sampling mode
+SAMPLE_SIZE = 10000
+SCATTER_MODES = ('auto', 'scatter', 'density', 'sample')
+
+
+class ScatterPoints:
+    """
+    Collect (x, y) points for a scatter plot in bounded memory
+    - scatter keeps every point, density bins them into a Histogram2D, sample keeps a uniform reservoir sample
+    - auto keeps points until there are more than threshold, then moves them into a density grid
+    """
+
+    def __init__(self, mode: str = 'auto', threshold: int = DENSITY_THRESHOLD, sample_size: int = SAMPLE_SIZE,
+                 bins: int = DENSITY_BINS, seed: Optional[int] = 0):
+        """
+        Initialize the collector
+        Args:
+            mode: One of auto, scatter, density, sample
+            threshold: Points above which auto switches to a density grid
+            sample_size: Points kept by the sample mode
+            bins: Density grid cells per axis
+            seed: Seed of the sample, for reproducible plots
+        Raises:
+            ValueError: Unknown mode
+        """
+        if mode not in SCATTER_MODES:
+            logger.error(f"Unknown scatter mode: {mode}")
+            raise ValueError(f"Unknown scatter mode '{mode}', expected one of {', '.join(SCATTER_MODES)}")
+        self.mode = mode
+        self.threshold = threshold
+        self.sample_size = sample_size
+        self.bins = bins
+        self.seen = 0
+        self.x_values = array('d')
+        self.y_values = array('d')
+        self.density = Histogram2D(bins) if mode == 'density' else None
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.seen
+
+    @property
+    def kind(self) -> str:
+        """What a plot should draw: 'density', 'sample' or 'scatter'"""
+        if self.density is not None:
+            return 'density'
+        return 'sample' if self.mode == 'sample' else 'scatter'
+
+    def push_many(self, x_values, y_values) -> None:
+        """
+        Add points
+        Args:
+            x_values: Sequence of x numbers
+            y_values: Sequence of y numbers, same length
+        """
+        if self.mode == 'auto' and self.density is None and self.seen + len(x_values) > self.threshold:
+            logger.debug(f"More than {self.threshold} points, switching to a density grid")
+            self.density = Histogram2D(self.bins)
+            self.density.push_many(self.x_values, self.y_values)
+            self.x_values, self.y_values = array('d'), array('d')
+        if self.density is not None:
+            self.density.push_many(x_values, y_values)
+        elif self.mode == 'sample':
+            # reservoir sampling, every point seen so far is kept with the same chance
+            for x, y in zip(x_values, y_values):
+                self.seen += 1
+                if len(self.x_values) < self.sample_size:
+                    self.x_values.append(x)
+                    self.y_values.append(y)
+                else:
+                    slot = self._random.randrange(self.seen)
+                    if slot < self.sample_size:
+                        self.x_values[slot] = x
+                        self.y_values[slot] = y
+            return
+        else:
+            self.x_values.extend(x_values)
+            self.y_values.extend(y_values)
+        self.seen += len(x_values)
@@ -0,0 +1,128 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class SortedIndex:
+    """
+    Sorted permutation index on a numeric column, range and equality lookups with bisect
+    - keys holds the valid values in ascending order, rows the row index of each key
+    - A lookup costs O(log n) to find the range plus sorting the k matching row indexes back into row order
+    - Missing values are left out, so they never match (same as the scans)
+    """
+
+    kind = 'sorted'
+
+    def __init__(self, column):
+        """
+        Build the index
+        Args:
+            column: NumericColumn
+        """
+        values = column.values
+        order = sorted(compress(range(len(values)), column.valid), key=values.__getitem__)
+        self.column = column
+        self.row_count = len(values)
+        self.keys = array('d', [values[i] for i in order])
+        self.rows = array('i', order)
+        logger.debug(f"Built sorted index on {column.name} over {len(order)} values")
+
+    def _bounds(self, predicate) -> tuple:
+        """Return the (start, end) slice of keys satisfying a comparison"""
+        keys, value = self.keys, predicate.value
+        op = predicate.op
+        if op == '>=':
+            return bisect_left(keys, value), len(keys)
+        if op == '>':
+            return bisect_right(keys, value), len(keys)
+        if op == '<=':
+            return 0, bisect_right(keys, value)
+        if op == '<':
+            return 0, bisect_left(keys, value)
+        return bisect_left(keys, value), bisect_right(keys, value)
+
+    def lookup(self, predicate) -> list[int]:
+        """
+        Find the rows matching a predicate on the indexed column
+        Args:
+            predicate: ColumnPredicate with a numeric value
+        Returns:
+            Sorted list of row indexes
+        """
+        if not predicate.is_numeric:
+            # text never matches a numeric column
+            return []
+        start, end = self._bounds(predicate)
+        if predicate.op == '!=':
+            return sorted(self.rows[:start].tolist() + self.rows[end:].tolist())
+        return sorted(self.rows[start:end])
+
+
+class HashIndex:
+    """
+    Hash index on a categorical column: each distinct value -> the rows holding it, in row order
+    - Equality lookups are a dict hit, other predicates test each distinct value once
+    """
+
+    kind = 'hash'
+
+    def __init__(self, column):
+        """
+        Build the index
+        Args:
+            column: CategoricalColumn
+        """
+        positions = {}
+        for row, code in enumerate(column.codes):
+            if code >= 0:
+                rows = positions.get(code)
+                if rows is None:
+                    positions[code] = rows = array('i')
+                rows.append(row)
+        self.column = column
+        self.row_count = len(column.codes)
+        self.buckets = {column.categories[code]: rows for code, rows in positions.items()}
+        logger.debug(f"Built hash index on {column.name} over {len(self.buckets)} values")
+
+    def lookup(self, predicate) -> list[int]:
+        """
+        Find the rows matching a predicate on the indexed column
+        Args:
+            predicate: ColumnPredicate
+        Returns:
+            Sorted list of row indexes
+        """
+        if predicate.op == '==' and not predicate.is_numeric:
+            return self.buckets.get(predicate.value, array('i')).tolist()
+        hits = [rows for value, rows in self.buckets.items() if predicate.matches(value)]
+        if len(hits) == 1:
+            return hits[0].tolist()
+        return sorted(row for rows in hits for row in rows)
+
+
+def build_index(column):
+    """
+    Build the index that fits a column: SortedIndex for numeric columns, HashIndex for categorical ones
+    Args:
+        column: NumericColumn or CategoricalColumn
+    Returns:
+        SortedIndex or HashIndex
+    """
+    if column.kind == 'numeric':
+        return SortedIndex(column)
+    return HashIndex(column)
+
+
+def index_is_current(index, column) -> bool:
+    """
+    Check an index still describes a column (same column object, no rows appended since)
+    Args:
+        index: SortedIndex or HashIndex
+        column: The table's current column object
+    Returns:
+        True if the index can be used
+    """
+    return index.column is column and index.row_count == len(column)
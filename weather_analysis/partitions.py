@@ -0,0 +1,237 @@
+import csv
+import glob
+import json
+import os
+import uuid
+from itertools import chain
+from typing import Iterable, Optional
+from .data_loader import open_csv_file
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = '.wamanifest.json'
+
+# columns whose distinct values are recorded per file (e.g. one file per station)
+KEY_COLUMNS = ('Location',)
+# columns whose min/max text is recorded per file (e.g. one file per year)
+RANGE_COLUMNS = ('Date',)
+# more distinct values than this and the column is no use for pruning
+MAX_KEY_VALUES = 1000
+
+# file names picked up when a directory is given
+PARTITION_PATTERNS = ('*.csv', '*.csv.gz', '*.csv.bz2', '*.csv.xz')
+
+
+def is_partitioned_path(path) -> bool:
+    """
+    Check if a dataset path names several files (a directory or a glob pattern) rather than one CSV
+    Args:
+        path: File path, directory or glob pattern
+    Returns:
+        True for directories and glob patterns
+    """
+    return os.path.isdir(path) or glob.has_magic(str(path))
+
+
+def list_partition_files(path) -> list[str]:
+    """
+    List the CSV files of a partitioned dataset
+    Args:
+        path: Directory (its *.csv files, compressed or not) or glob pattern
+    Returns:
+        Sorted list of file paths
+    Raises:
+        FileNotFoundError: No files match
+    """
+    if os.path.isdir(path):
+        files = {name for pattern in PARTITION_PATTERNS for name in glob.glob(os.path.join(path, pattern))}
+    else:
+        files = {name for name in glob.glob(path) if os.path.isfile(name)}
+    if not files:
+        logger.error(f"No CSV files found for: {path}")
+        raise FileNotFoundError(f"No CSV files found for: {path}")
+    return sorted(files)
+
+
+def scan_partition(file_path, key_columns: Iterable[str] = KEY_COLUMNS,
+                   range_columns: Iterable[str] = RANGE_COLUMNS) -> dict:
+    """
+    Read one file's raw text to record its row count, key values and value ranges (nothing is converted)
+    Args:
+        file_path: Path to the CSV file
+        key_columns: Columns to record distinct values for
+        range_columns: Columns to record min/max text for
+    Returns:
+        Manifest entry dict with 'size', 'mtime_ns', 'row_count', 'keys' and 'ranges'
+    Raises:
+        FileNotFoundError: File doesn't exist
+        ValueError: CSV file has no headers or is messed up
+    """
+    stat = os.stat(file_path)
+    try:
+        with open_csv_file(file_path) as csvfile:
+            reader = csv.reader(csvfile)
+            fieldnames = next(reader, None)
+            if fieldnames is None:
+                logger.error(f"CSV file has no headers: {file_path}")
+                raise ValueError("CSV file has no headers")
+
+            keys = {name: set() for name in key_columns if name in fieldnames}
+            ranges = {name: set() for name in range_columns if name in fieldnames}
+            tracked = [(fieldnames.index(name), values) for name, values in chain(keys.items(), ranges.items())]
+
+            row_count = 0
+            for record in reader:
+                if not record:
+                    continue
+                row_count += 1
+                for index, values in tracked:
+                    if index < len(record) and record[index]:
+                        values.add(record[index])
+    except csv.Error as e:
+        logger.error(f"CSV parsing error in {file_path}: {e}")
+        raise ValueError(f"CSV parsing error: {e}")
+
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'row_count': row_count,
+        # None means too many values to be worth keeping
+        'keys': {name: sorted(values) if len(values) <= MAX_KEY_VALUES else None for name, values in keys.items()},
+        'ranges': {name: [min(values), max(values)] if values else None for name, values in ranges.items()},
+    }
+
+
+def entry_may_match(entry: dict, predicate) -> bool:
+    """
+    Check if a file could hold rows matching a predicate, going only by its manifest entry
+    Args:
+        entry: Manifest entry from scan_partition
+        predicate: ColumnPredicate
+    Returns:
+        False only if no row of the file can match
+    """
+    column = predicate.column
+    if column in entry['keys'] and entry['keys'][column] is not None:
+        return any(predicate.matches_raw(value) for value in entry['keys'][column])
+
+    if column in entry['ranges'] and not predicate.is_numeric:
+        bounds = entry['ranges'][column]
+        if bounds is None:
+            # every cell is missing and missing never matches
+            return False
+        low, high = bounds
+        value = predicate.value
+        if predicate.op == '==':
+            return low <= value <= high
+        if predicate.op == '!=':
+            return not (low == high == value)
+        if predicate.op in ('>=', '>'):
+            return predicate.matches_raw(high)
+        return predicate.matches_raw(low)
+
+    # nothing recorded for the column, the file has to be read
+    return True
+
+
+class PartitionManifest:
+    """
+    Lightweight index of a partitioned dataset (one CSV per station, per year, ...)
+    - Per file row counts, distinct key values and min/max ranges
+    - Saved as JSON next to the files and only rescanned for files whose size or mtime changed
+    - prune() picks the files a set of predicates can match without opening the others
+    """
+
+    def __init__(self, entries: dict):
+        """
+        Initialize the manifest
+        Args:
+            entries: Dict of absolute file path -> entry from scan_partition, in file order
+        """
+        self.entries = entries
+
+    @classmethod
+    def build(cls, path, cache_dir: Optional[str] = None) -> 'PartitionManifest':
+        """
+        Build (or refresh) the manifest for a directory or glob of CSV files
+        Args:
+            path: Directory or glob pattern
+            cache_dir: Directory to keep the manifest in, defaults to the directory holding the files
+        Returns:
+            PartitionManifest
+        Raises:
+            FileNotFoundError: No files match
+        """
+        files = [os.path.abspath(name) for name in list_partition_files(path)]
+        manifest_path = os.path.join(cache_dir or os.path.commonpath([os.path.dirname(name) for name in files]),
+                                     MANIFEST_FILE)
+        saved = _read_manifest(manifest_path)
+
+        entries = {}
+        scanned = 0
+        for name in files:
+            entry = saved.get(name)
+            stat = os.stat(name)
+            if entry is None or entry.get('size') != stat.st_size or entry.get('mtime_ns') != stat.st_mtime_ns:
+                entry = scan_partition(name)
+                scanned += 1
+            entries[name] = entry
+
+        if scanned:
+            logger.info(f"Scanned {scanned} of {len(files)} partition files for {path}")
+            # keep entries for other files sharing the manifest, as long as they still exist
+            saved.update(entries)
+            _write_manifest(manifest_path, {name: entry for name, entry in saved.items() if os.path.exists(name)})
+        return cls(entries)
+
+    @property
+    def files(self) -> list[str]:
+        """Every file in the dataset"""
+        return list(self.entries)
+
+    @property
+    def row_count(self) -> int:
+        """Total rows across every file"""
+        return sum(entry['row_count'] for entry in self.entries.values())
+
+    def prune(self, predicates: Iterable) -> list[str]:
+        """
+        Return the files that can hold rows matching every predicate
+        Args:
+            predicates: Iterable of ColumnPredicate
+        Returns:
+            List of file paths in dataset order
+        """
+        predicates = list(predicates)
+        files = [name for name, entry in self.entries.items()
+                 if all(entry_may_match(entry, predicate) for predicate in predicates)]
+        if predicates:
+            logger.info(f"Partition pruning kept {len(files)} of {len(self.entries)} files")
+        return files
+
+
+def _read_manifest(manifest_path) -> dict:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable partition manifest {manifest_path}: {e}")
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+
+def _write_manifest(manifest_path, entries: dict) -> None:
+    """Write the manifest atomically, failing to write it only costs a rescan next time"""
+    temp_path = f'{manifest_path}.{uuid.uuid4().hex[:8]}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': entries}, f)
+        os.replace(temp_path, manifest_path)
+    except OSError as e:
+        logger.warning(f"Could not write partition manifest {manifest_path}: {e}")
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import uuid
+from typing import Callable, Optional
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# bump when the drawing code changes what a plot looks like, so old entries stop matching
+PLOT_CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_PLOT_CACHE_DIR = '.plot_cache'
+
+_library_versions = None
+
+
+def library_versions() -> dict:
+    """Versions that change how a figure renders, part of every cache key"""
+    global _library_versions
+    if _library_versions is None:
+        import matplotlib
+        _library_versions = {
+            'plot_cache': PLOT_CACHE_VERSION,
+            'matplotlib': matplotlib.__version__,
+            'python': list(sys.version_info[:2]),
+        }
+    return _library_versions
+
+
+def data_fingerprint(data) -> Optional[dict]:
+    """
+    Return what identifies the data behind a plot, None when it can't be identified cheaply
+    Args:
+        data: WeatherDataset (anything with a fingerprint() method), or rows
+    Returns:
+        Fingerprint dict, None for plain rows (those plots are always drawn)
+    """
+    fingerprint = getattr(data, 'fingerprint', None)
+    return fingerprint() if callable(fingerprint) else None
+
+
+def _remove_quietly(path) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _file_version(path) -> Optional[tuple]:
+    """Return (mtime_ns, size, inode) of a file, None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class PlotCache:
+    """
+    Content addressed store of rendered figures, so unchanged plots are copied instead of drawn again
+    - The key hashes the data fingerprint (or the plot's input data), the function name, its arguments,
+      the output format and the library versions, so any change to one of them draws a new figure
+    - Entries are plain files named by their key, a hit copies (or hard links) the entry to the output path
+    - Size bounded: once the entries pass max_bytes the least recently used ones are deleted,
+      the file mtime records the last use so several processes can share one directory
+    - The cache is an optimization, errors reading or writing it are logged and the plot is drawn as usual
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_PLOT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 link: bool = False):
+        """
+        Initialize the cache
+        Args:
+            cache_dir: Directory holding the cached figures, created on the first store
+            max_bytes: Size limit of all entries together
+            link: Hard link hits to the output path instead of copying (falls back to a copy across
+                  file systems). Linked outputs share the cached bytes, replace them rather than edit them in place
+        Raises:
+            ValueError: max_bytes isn't positive
+        """
+        if max_bytes <= 0:
+            logger.error(f"Invalid plot cache size: {max_bytes}")
+            raise ValueError("max_bytes must be positive")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.link = link
+
+    def key(self, function_name: str, arguments: dict, data, output_path: str) -> str:
+        """
+        Compute the cache key of a figure
+        Args:
+            function_name: Name of the drawing function
+            arguments: JSON friendly options of the call (the output path itself isn't part of the key)
+            data: JSON friendly identity of the data, e.g. a fingerprint dict or a content digest
+            output_path: Path the figure is saved to, only its extension (the image format) is used
+        Returns:
+            Hex digest, followed by the output extension
+        """
+        suffix = os.path.splitext(output_path)[1].lower()
+        payload = json.dumps({
+            'function': function_name,
+            'arguments': arguments,
+            'data': data,
+            'format': suffix,
+            'versions': library_versions(),
+        }, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest() + suffix
+
+    def job_key(self, job) -> str:
+        """
+        Compute the cache key of a PlotJob from the data it carries
+        - The job's Histograms / arrays are hashed, so the key follows the content even without a fingerprint
+        Args:
+            job: PlotJob
+        Returns:
+            Cache key
+        """
+        digest = hashlib.sha256(pickle.dumps((job.args, sorted(job.kwargs.items())))).hexdigest()
+        return self.key(f'{job.function.__module__}.{job.function.__name__}', {}, digest, job.output_path)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """
+        Put the cached figure for key at output_path
+        Args:
+            key: Cache key
+            output_path: Path to save the plot
+        Returns:
+            True on a hit, False when there is no usable entry
+        """
+        entry = self._entry_path(key)
+        if not os.path.exists(entry):
+            return False
+
+        # write next to the output and rename, readers never see a half copied file
+        temp_path = f'{output_path}.{uuid.uuid4().hex[:8]}.tmp'
+        try:
+            if self.link:
+                try:
+                    os.link(entry, temp_path)
+                except OSError:
+                    shutil.copyfile(entry, temp_path)
+            else:
+                shutil.copyfile(entry, temp_path)
+            os.replace(temp_path, output_path)
+            # mtime is the last use for LRU eviction
+            os.utime(entry)
+        except OSError as e:
+            logger.warning(f"Could not use cached plot {key}: {e}")
+            _remove_quietly(temp_path)
+            return False
+
+        logger.info(f"Plot cache hit, copied {output_path} from {self.cache_dir}")
+        return True
+
+    def store(self, key: str, output_path: str) -> None:
+        """
+        Add a freshly drawn figure to the cache, then evict down to max_bytes
+        Args:
+            key: Cache key
+            output_path: Path of the saved plot
+        """
+        entry = self._entry_path(key)
+        temp_path = f'{entry}.{uuid.uuid4().hex[:8]}.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # a copy, not a link, so redrawing output_path later can't change the entry
+            shutil.copyfile(output_path, temp_path)
+            os.replace(temp_path, entry)
+        except OSError as e:
+            logger.warning(f"Could not cache plot {output_path}: {e}")
+            _remove_quietly(temp_path)
+            return
+        logger.debug(f"Cached {output_path} as {key}")
+        self.evict()
+
+    def detach(self, output_path: str) -> None:
+        """Remove output_path if it is a hard linked hit, so drawing over it can't change the cached entry"""
+        try:
+            if os.stat(output_path).st_nlink > 1:
+                os.remove(output_path)
+        except OSError:
+            pass
+
+    def entries(self) -> list:
+        """
+        List the cached figures
+        Returns:
+            List of (last use in ns, size in bytes, path), least recently used first
+        """
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # removed by another process meanwhile
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def size(self) -> int:
+        """Return the total size of the cached figures in bytes"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> int:
+        """
+        Delete least recently used figures until the cache fits in max_bytes
+        Returns:
+            Number of figures deleted
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.debug(f"Could not evict {path}: {e}")
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} plots from {self.cache_dir}, {total} bytes left")
+        return removed
+
+    def render(self, data, output_path: str, function_name: str, arguments: dict, draw: Callable) -> bool:
+        """
+        Serve a plot_* call from the cache, or draw it and cache the result
+        Args:
+            data: Data the plot is drawn from, only datasets with a fingerprint are cached
+            output_path: Path to save the plot
+            function_name: Name of the plot function
+            arguments: Other options of the call, e.g. {'mode': 'density'}
+            draw: Callable drawing the plot to output_path without the cache
+        Returns:
+            True if the figure came from the cache
+        """
+        fingerprint = data_fingerprint(data)
+        if fingerprint is None:
+            logger.debug(f"Data for {function_name} has no fingerprint, drawing without the cache")
+            draw()
+            return False
+
+        key = self.key(function_name, arguments, fingerprint, output_path)
+        if self.fetch(key, output_path):
+            return True
+
+        self.detach(output_path)
+        before = _file_version(output_path)
+        draw()
+        # an unchanged (or missing) file means there was nothing to plot
+        after = _file_version(output_path)
+        if after is not None and after != before:
+            self.store(key, output_path)
+        return False
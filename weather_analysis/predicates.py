@@ -0,0 +1,118 @@
+import operator
+from typing import Iterable
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+}
+
+_NUMBER_TYPES = (float, int)
+
+
+class ColumnPredicate:
+    """
+    A simple `column <op> value` test, e.g. ColumnPredicate('Rainfall', '>=', 10.0)
+    - Can be checked on raw CSV text before a row is converted (matches_raw)
+    - Or on converted values / row dicts (matches, or call it like filter_rows_by_condition expects)
+    - Missing values never match, and numeric predicates only match converted numbers (text is only parsed
+      by matches_raw)
+    """
+
+    def __init__(self, column: str, op: str, value):
+        """
+        Initialize the predicate
+        Args:
+            column: Column name
+            op: One of ==, !=, >=, >, <=, <
+            value: Value to compare against, numbers compare numerically, strings compare as text
+        Raises:
+            ValueError: Unknown operator
+        """
+        if op not in _OPERATORS:
+            logger.error(f"Unknown predicate operator: {op}")
+            raise ValueError(f"Unknown operator '{op}', expected one of {', '.join(_OPERATORS)}")
+        self.column = column
+        self.op = op
+        self.value = value
+        self.compare = _OPERATORS[op]
+        self.is_numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def __repr__(self) -> str:
+        return f"ColumnPredicate({self.column!r}, {self.op!r}, {self.value!r})"
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, ColumnPredicate)
+                and (self.column, self.op, self.value) == (other.column, other.op, other.value))
+
+    def __hash__(self) -> int:
+        return hash((self.column, self.op, self.value))
+
+    def __call__(self, row: dict) -> bool:
+        return self.matches(row.get(self.column))
+
+    def matches_raw(self, text: str) -> bool:
+        """
+        Check a raw CSV cell without converting the rest of the row
+        Args:
+            text: Raw cell text
+        Returns:
+            True if the cell satisfies the predicate
+        """
+        if not text:
+            return False
+        if self.is_numeric:
+            try:
+                number = float(text)
+            except ValueError:
+                return False
+            return number == number and self.compare(number, self.value)
+        return self.compare(text, self.value)
+
+    def matches(self, value) -> bool:
+        """
+        Check an already converted value
+        Args:
+            value: Cell value (float, str or None)
+        Returns:
+            True if the value satisfies the predicate
+        """
+        if value is None:
+            return False
+        if self.is_numeric:
+            # text never matches, like the row filters
+            if not isinstance(value, (int, float)) or value != value:
+                return False
+        elif not isinstance(value, str):
+            return False
+        return self.compare(value, self.value)
+
+    def matches_many(self, values: Iterable) -> list[bool]:
+        """
+        Check a batch of converted values, same rules as matches without a method call per value
+        Args:
+            values: Iterable of cell values (float, str or None)
+        Returns:
+            List of booleans, one per value
+        """
+        compare, target = self.compare, self.value
+        if self.is_numeric:
+            return [type(value) in _NUMBER_TYPES and value == value and compare(value, target) for value in values]
+        return [type(value) is str and compare(value, target) for value in values]
+
+
+def predicate_columns(predicates: Iterable[ColumnPredicate]) -> list[str]:
+    """
+    Return the distinct column names a list of predicates looks at
+    Args:
+        predicates: Iterable of ColumnPredicate
+    Returns:
+        List of column names in first seen order
+    """
+    return list(dict.fromkeys(predicate.column for predicate in predicates))
@@ -0,0 +1,225 @@
+from typing import Callable, Iterator, Optional
+from .groupby import GroupAggregator
+from .predicates import ColumnPredicate
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class Query:
+    """
+    Lazy query over a WeatherDataset: dataset.query().where(...).map(...).select(...).agg(...)
+    - Building a query only records a plan, nothing is read until rows(), iter_rows(), count() or agg()
+    - Predicates on file columns and the needed columns are pushed down into the reader
+      (raw text checks and partition pruning when lazy, column buffer checks when loaded)
+    - map steps, filters on mapped columns and aggregates run fused in one loop per batch,
+      no intermediate lists of row dicts
+    - group_by(...).agg(...) hash aggregates every group in the same pass, keys can be derived columns
+    - Every step returns a new Query, so a base query can be reused
+    """
+
+    def __init__(self, dataset, predicates: tuple = (), maps: tuple = (), late_predicates: tuple = (),
+                 columns: Optional[tuple] = None, group_keys: tuple = ()):
+        """
+        Initialize the query
+        Args:
+            dataset: WeatherDataset (anything with column_batches(columns, predicates))
+            predicates: ColumnPredicates on file columns, pushed down into the reader
+            maps: (name, function, input columns) steps adding derived columns
+            late_predicates: ColumnPredicates on derived columns, checked after the maps
+            columns: Projected output columns, None for every file column plus the derived ones
+            group_keys: Columns agg() groups by, empty to aggregate every row together
+        """
+        self._dataset = dataset
+        self._predicates = predicates
+        self._maps = maps
+        self._late_predicates = late_predicates
+        self._columns = columns
+        self._group_keys = group_keys
+
+    def _replace(self, **changes) -> 'Query':
+        plan = {'predicates': self._predicates, 'maps': self._maps, 'late_predicates': self._late_predicates,
+                'columns': self._columns, 'group_keys': self._group_keys}
+        plan.update(changes)
+        return Query(self._dataset, **plan)
+
+    @property
+    def _derived(self) -> list[str]:
+        return [name for name, _, _ in self._maps]
+
+    def where(self, *args) -> 'Query':
+        """
+        Keep only rows matching a condition
+        Args:
+            args: ColumnPredicate objects, or column, op, value, e.g. where('Rainfall', '>=', 10.0)
+        Returns:
+            New Query
+        Raises:
+            ValueError: Arguments are neither predicates nor a column, op, value triple
+        """
+        if len(args) == 3 and isinstance(args[0], str):
+            predicates = [ColumnPredicate(*args)]
+        elif all(isinstance(arg, ColumnPredicate) for arg in args):
+            predicates = list(args)
+        else:
+            logger.error(f"Invalid where arguments: {args}")
+            raise ValueError("where() takes ColumnPredicates or a column, op, value triple")
+
+        derived = self._derived
+        early = tuple(predicate for predicate in predicates if predicate.column not in derived)
+        late = tuple(predicate for predicate in predicates if predicate.column in derived)
+        # filters on file columns commute with maps (maps only add columns), so they can always go to the reader
+        return self._replace(predicates=self._predicates + early, late_predicates=self._late_predicates + late)
+
+    def map(self, name: str, function: Callable, *columns: str) -> 'Query':
+        """
+        Add a derived column computed per row, e.g. map('TempRange', lambda high, low: high - low, 'MaxTemp', 'MinTemp')
+        Args:
+            name: Name of the new column
+            function: Called with the input values, only when none of them is missing (else the result is None)
+            columns: Input column names (file columns or earlier derived ones)
+        Returns:
+            New Query
+        """
+        return self._replace(maps=self._maps + ((name, function, tuple(columns)),))
+
+    def select(self, *columns: str) -> 'Query':
+        """
+        Keep only some columns in the output
+        Args:
+            columns: Column names (file or derived)
+        Returns:
+            New Query
+        """
+        return self._replace(columns=tuple(columns))
+
+    def group_by(self, *keys: str) -> 'Query':
+        """
+        Aggregate per group of key columns in agg(), e.g. group_by('Location') or
+        map('Month', lambda date: date[:7], 'Date').group_by('Location', 'Month')
+        Args:
+            keys: Key column names (file or derived)
+        Returns:
+            New Query
+        """
+        return self._replace(group_keys=tuple(keys))
+
+    def _source_columns(self, outputs: Optional[list]) -> Optional[list]:
+        """File columns the reader has to convert for the given outputs (None = every column)"""
+        if outputs is None:
+            return None
+        derived = set(self._derived)
+        needed = list(outputs)
+        needed += [column for _, _, inputs in self._maps for column in inputs]
+        needed += [predicate.column for predicate in self._late_predicates]
+        return list(dict.fromkeys(column for column in needed if column not in derived))
+
+    def _batches(self, outputs: Optional[list]) -> Iterator[dict]:
+        """Run the fused plan, yielding each batch as a dict of column name -> values with every step applied"""
+        reads = self._source_columns(outputs)
+        logger.debug(f"Query reading columns {reads} with pushed down predicates {list(self._predicates)}")
+        for names, values_by_column in self._dataset.column_batches(reads, predicates=list(self._predicates)):
+            batch = dict(zip(names, values_by_column))
+            for name, function, inputs in self._maps:
+                arguments = [batch[column] for column in inputs]
+                batch[name] = [None if None in values else function(*values) for values in zip(*arguments)]
+
+            mask = None
+            for predicate in self._late_predicates:
+                hits = predicate.matches_many(batch[predicate.column])
+                mask = hits if mask is None else [a and b for a, b in zip(mask, hits)]
+            if mask is not None:
+                batch = {name: [value for value, keep in zip(values, mask) if keep] for name, values in batch.items()}
+            yield batch
+
+    def _output_columns(self) -> Optional[list]:
+        return list(self._columns) if self._columns is not None else None
+
+    def iter_rows(self) -> Iterator[dict]:
+        """
+        Run the query, yielding one dict per matching row
+        Yields:
+            Dict of the selected columns (every column when nothing was selected)
+        """
+        outputs = self._output_columns()
+        for batch in self._batches(outputs):
+            names = outputs if outputs is not None else list(batch)
+            yield from (dict(zip(names, values)) for values in zip(*(batch[name] for name in names)))
+
+    def rows(self) -> list[dict]:
+        """
+        Run the query and materialize the matching rows
+        Returns:
+            List of dicts of the selected columns
+        """
+        try:
+            result = list(self.iter_rows())
+            logger.info(f"Query returned {len(result)} rows")
+            return result
+        except Exception as e:
+            logger.error(f"Error running query: {e}")
+            raise
+
+    def count(self) -> int:
+        """
+        Run the query and count the matching rows, only the predicate columns are read
+        Returns:
+            Number of matching rows
+        """
+        outputs = [predicate.column for predicate in self._predicates + self._late_predicates]
+        if not outputs:
+            # nothing filters rows, the dataset knows its size (a lazy partitioned one from its manifest)
+            return self._dataset.get_row_count()
+        total = 0
+        for batch in self._batches(outputs):
+            total += len(next(iter(batch.values()))) if batch else 0
+        return total
+
+    def agg(self, **aggregates) -> dict:
+        """
+        Run the query and aggregate columns in the same pass, per group when group_by was called
+        Args:
+            aggregates: result name -> (column, function) with function one of count, sum, mean, min, max, var, std,
+                        median, or (column, 'quantile', q), or 'count' for the number of matching rows,
+                        e.g. agg(rows='count', total=('Rainfall', 'sum'), hottest=('MaxTemp', 'max'))
+        Returns:
+            Dict of result name -> value (None for aggregates of a column without valid values),
+            or dict of group key -> such a dict after group_by (see groupby.GroupAggregator.result)
+        Raises:
+            ValueError: Unknown aggregate function
+        """
+        try:
+            aggregator = GroupAggregator(self._group_keys, aggregates)
+            if not aggregator.columns:
+                # only row counts wanted, no values to convert
+                row_count = self.count()
+                return {name: row_count for name in aggregates}
+
+            for batch in self._batches(aggregator.columns):
+                aggregator.update(batch)
+
+            result = aggregator.result()
+            if not self._group_keys:
+                result = result[()]
+            logger.info(f"Query aggregates: {result}")
+            return result
+        except Exception as e:
+            logger.error(f"Error aggregating query: {e}")
+            raise
+
+    def explain(self) -> str:
+        """
+        Describe the plan without running it
+        Returns:
+            Multi line string, one step per line
+        """
+        outputs = self._output_columns()
+        lines = [f"scan columns={self._source_columns(outputs) or 'all'}"]
+        lines += [f"  pushed down: {predicate!r}" for predicate in self._predicates]
+        lines += [f"  fused map: {name} <- {', '.join(inputs)}" for name, _, inputs in self._maps]
+        lines += [f"  fused filter: {predicate!r}" for predicate in self._late_predicates]
+        if outputs is not None:
+            lines.append(f"  select: {', '.join(outputs)}")
+        if self._group_keys:
+            lines.append(f"  hash aggregate by: {', '.join(self._group_keys)}")
+        return '\n'.join(lines)
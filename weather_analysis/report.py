@@ -0,0 +1,438 @@
+import os
+from abc import ABC, abstractmethod
+from array import array
+from itertools import islice
+from typing import Iterable, Optional
+from .analytics import StreamingAccumulator
+from .columnar import BATCH_SIZE, ColumnarTable
+from .histogram import FINE_BINS, Histogram, ScatterPoints
+from .plot_cache import PlotCache
+from .predicates import ColumnPredicate
+from .visualization import PlotJob, render_plots, save_histogram, save_points, save_boxplot
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _numbers(values: list) -> list:
+    """Keep the usable numbers of a batch (no None, NaN or text)"""
+    return [value for value in values if type(value) in (float, int) and value == value]
+
+
+def _row_mask(batch: dict, predicates: Iterable[ColumnPredicate]) -> Optional[list]:
+    """Return a list of booleans for the rows matching every predicate, or None when there are no predicates"""
+    mask = None
+    for predicate in predicates:
+        hits = predicate.matches_many(batch[predicate.column])
+        mask = hits if mask is None else [a and b for a, b in zip(mask, hits)]
+    return mask
+
+
+def _loaded_columns(data, names: Iterable[str]) -> Optional[list]:
+    """Return the in-memory columns of a loaded WeatherDataset or ColumnarTable, None for streamed or row input"""
+    is_loaded = getattr(data, 'is_loaded', None)
+    if isinstance(data, ColumnarTable) or (callable(is_loaded) and is_loaded()):
+        return [data.get_column(name) for name in names]
+    return None
+
+
+class ReportTask(ABC):
+    """
+    One aggregate of a report, fed column batches by WeatherReport.run
+    - columns lists the columns update() reads
+    - prepare() sees the data once before the pass, e.g. to look up category codes
+    - update() folds a batch into counters / accumulators, it never keeps the rows
+    - result() returns the final value
+    """
+
+    columns = ()
+
+    def prepare(self, data) -> None:
+        """
+        Look at the data before the first batch, does nothing unless a task needs it
+        Args:
+            data: What WeatherReport.run was given
+        """
+
+    @abstractmethod
+    def update(self, batch: dict, count: int) -> None:
+        """
+        Fold one batch of rows into the aggregate
+        Args:
+            batch: Dict of column name -> list of values (None for missing)
+            count: Rows in the batch
+        """
+
+    @abstractmethod
+    def result(self):
+        """Return the aggregate of every batch seen"""
+
+
+class RowCount(ReportTask):
+    """Number of rows seen"""
+
+    def __init__(self):
+        self.count = 0
+
+    def update(self, batch: dict, count: int) -> None:
+        self.count += count
+
+    def result(self) -> int:
+        return self.count
+
+
+class NumericSummary(ReportTask):
+    """Count, total, mean, variance, min and max of a column (a StreamingAccumulator)"""
+
+    def __init__(self, column: str):
+        self.columns = (column,)
+        self.accumulator = StreamingAccumulator()
+
+    def update(self, batch: dict, count: int) -> None:
+        self.accumulator.push_many(_numbers(batch[self.columns[0]]))
+
+    def result(self) -> StreamingAccumulator:
+        return self.accumulator
+
+
+class CountWhere(ReportTask):
+    """Number of rows matching every predicate, e.g. CountWhere(ColumnPredicate('MaxTemp', '>=', 35.0))"""
+
+    def __init__(self, *predicates: ColumnPredicate):
+        self.predicates = predicates
+        self.columns = tuple(dict.fromkeys(predicate.column for predicate in predicates))
+        self.count = 0
+
+    def update(self, batch: dict, count: int) -> None:
+        mask = _row_mask(batch, self.predicates)
+        self.count += count if mask is None else sum(mask)
+
+    def result(self) -> int:
+        return self.count
+
+
+class RainPatterns(ReportTask):
+    """
+    The counts analyze_rain_patterns gives: rain today, rain tomorrow, both, and total days
+    - Loaded data is counted on the category codes, the 'Yes' codes are looked up once in prepare()
+    - Streamed or row input compares the strings of each batch
+    """
+
+    columns = ('RainToday', 'RainTomorrow')
+
+    def __init__(self):
+        self.counts = {'rain_today': 0, 'rain_tomorrow': 0, 'consecutive_rain': 0, 'total_days': 0}
+        self.codes = None
+        self.offset = 0
+
+    def prepare(self, data) -> None:
+        self.codes = None
+        self.offset = 0
+        columns = _loaded_columns(data, self.columns)
+        if columns is not None and all(column.kind == 'categorical' for column in columns):
+            # (codes, code of 'Yes') per column, -2 never matches when no day has 'Yes'
+            yes_codes = [column.code_of('Yes') for column in columns]
+            self.codes = [(column.codes, -2 if code is None else code) for column, code in zip(columns, yes_codes)]
+
+    def update(self, batch: dict, count: int) -> None:
+        if self.codes is not None:
+            # loaded batches come in row order, so the codes of this batch start at offset
+            end = self.offset + count
+            (today_codes, yes_today), (tomorrow_codes, yes_tomorrow) = self.codes
+            today = [code == yes_today for code in today_codes[self.offset:end]]
+            tomorrow = [code == yes_tomorrow for code in tomorrow_codes[self.offset:end]]
+            self.offset = end
+        else:
+            today = [value == 'Yes' for value in batch['RainToday']]
+            tomorrow = [value == 'Yes' for value in batch['RainTomorrow']]
+        self.counts['rain_today'] += sum(today)
+        self.counts['rain_tomorrow'] += sum(tomorrow)
+        self.counts['consecutive_rain'] += sum([a and b for a, b in zip(today, tomorrow)])
+        self.counts['total_days'] += count
+
+    def result(self) -> dict:
+        return dict(self.counts)
+
+
+class Collect(ReportTask):
+    """
+    Keep the numbers of a column for plotting, in an array('d') (8 bytes a value, no row dicts)
+    - Optional predicates pick the rows, e.g. Collect('Pressure9am', ColumnPredicate('RainToday', '==', 'Yes'))
+    """
+
+    def __init__(self, column: str, *predicates: ColumnPredicate):
+        self.column = column
+        self.predicates = predicates
+        self.columns = tuple(dict.fromkeys((column,) + tuple(predicate.column for predicate in predicates)))
+        self.values = array('d')
+
+    def update(self, batch: dict, count: int) -> None:
+        values = batch[self.column]
+        mask = _row_mask(batch, self.predicates)
+        if mask is not None:
+            values = [value for value, keep in zip(values, mask) if keep]
+        self.values.extend(_numbers(values))
+
+    def result(self) -> array:
+        return self.values
+
+
+class ColumnHistogram(ReportTask):
+    """
+    Bin the numbers of a column as they pass (constant memory, for histogram plots)
+    - Optional predicates pick the rows, e.g. ColumnHistogram('Rainfall', ColumnPredicate('Rainfall', '>', 0))
+    """
+
+    def __init__(self, column: str, *predicates: ColumnPredicate, bins: int = FINE_BINS):
+        self.column = column
+        self.predicates = predicates
+        self.columns = tuple(dict.fromkeys((column,) + tuple(predicate.column for predicate in predicates)))
+        self.histogram = Histogram(bins)
+
+    def update(self, batch: dict, count: int) -> None:
+        values = batch[self.column]
+        mask = _row_mask(batch, self.predicates)
+        if mask is not None:
+            values = [value for value, keep in zip(values, mask) if keep]
+        self.histogram.push_many(_numbers(values))
+
+    def result(self) -> Histogram:
+        return self.histogram
+
+
+class CollectPairs(ReportTask):
+    """Keep (x, y) numbers of rows where both columns are valid, as two array('d') (scatter plot input)"""
+
+    def __init__(self, x_column: str, y_column: str):
+        self.columns = (x_column, y_column)
+        self.x_values = array('d')
+        self.y_values = array('d')
+
+    def update(self, batch: dict, count: int) -> None:
+        pairs = [(x, y) for x, y in zip(batch[self.columns[0]], batch[self.columns[1]])
+                 if type(x) in (float, int) and x == x and type(y) in (float, int) and y == y]
+        self.x_values.extend([x for x, _ in pairs])
+        self.y_values.extend([y for _, y in pairs])
+
+    def result(self) -> tuple:
+        return self.x_values, self.y_values
+
+
+class PairPoints(ReportTask):
+    """(x, y) numbers of rows where both columns are valid, as a ScatterPoints (density grid past a row count)"""
+
+    def __init__(self, x_column: str, y_column: str, mode: str = 'auto', **options):
+        self.columns = (x_column, y_column)
+        self.points = ScatterPoints(mode, **options)
+
+    def update(self, batch: dict, count: int) -> None:
+        pairs = [(x, y) for x, y in zip(batch[self.columns[0]], batch[self.columns[1]])
+                 if type(x) in (float, int) and x == x and type(y) in (float, int) and y == y]
+        if pairs:
+            self.points.push_many(array('d', [x for x, _ in pairs]), array('d', [y for _, y in pairs]))
+
+    def result(self) -> ScatterPoints:
+        return self.points
+
+
+class Difference(ReportTask):
+    """
+    Summary of a column minus another per row (e.g. MaxTemp - MinTemp), rows missing either are skipped
+    - keep=True also keeps the differences in an array('d') for plotting
+    - histogram=True bins them instead, in constant memory
+    """
+
+    def __init__(self, minuend: str, subtrahend: str, keep: bool = False, histogram: bool = False):
+        self.columns = (minuend, subtrahend)
+        self.accumulator = StreamingAccumulator()
+        self.values = array('d') if keep else None
+        self.histogram = Histogram(FINE_BINS) if histogram else None
+
+    def update(self, batch: dict, count: int) -> None:
+        differences = [a - b for a, b in zip(batch[self.columns[0]], batch[self.columns[1]])
+                       if a is not None and b is not None]
+        self.accumulator.push_many(differences)
+        if self.values is not None:
+            self.values.extend(differences)
+        if self.histogram is not None:
+            self.histogram.push_many(differences)
+
+    def result(self) -> StreamingAccumulator:
+        return self.accumulator
+
+
+def _column_batches(data, columns: list, batch_size: int):
+    """Turn a WeatherDataset, ColumnarTable or iterable of row dicts into batches of column values"""
+    if hasattr(data, 'column_batches'):
+        yield from data.column_batches(columns)
+        return
+    rows = iter(data)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            return
+        yield columns, [[row.get(name) for row in chunk] for name in columns]
+
+
+class WeatherReport:
+    """
+    Fused single pass report engine
+    - Register named ReportTasks (counters, summaries, plot inputs), then run() them all in one scan
+    - Only the columns some task reads are converted
+    - Tasks fold each batch and drop it, so memory is bounded by the batch size plus what tasks keep
+    - Tasks keep their state, build a new report for each run
+    """
+
+    def __init__(self, tasks: Optional[dict] = None):
+        """
+        Initialize the report
+        Args:
+            tasks: Optional dict of name -> ReportTask
+        """
+        self.tasks = dict(tasks or {})
+
+    def add(self, name: str, task: ReportTask) -> 'WeatherReport':
+        """
+        Register a task
+        Args:
+            name: Key of the task's result in run()
+            task: ReportTask
+        Returns:
+            self, so adds can be chained
+        """
+        self.tasks[name] = task
+        return self
+
+    @property
+    def columns(self) -> list[str]:
+        """Every column some task reads, in first seen order"""
+        return list(dict.fromkeys(column for task in self.tasks.values() for column in task.columns))
+
+    def run(self, data, batch_size: int = BATCH_SIZE) -> dict:
+        """
+        Evaluate every task in one pass over the data
+        Args:
+            data: WeatherDataset (streams lazy files, slices loaded columns), ColumnarTable or iterable of row dicts
+            batch_size: Rows per batch for row dict input
+        Returns:
+            Dict of task name -> result
+        Raises:
+            ValueError: A task reads a column the dataset doesn't have
+        """
+        try:
+            columns = self.columns
+            logger.info(f"Running report with {len(self.tasks)} tasks over columns {columns}")
+            tasks = list(self.tasks.values())
+            rows = 0
+            for task in tasks:
+                task.prepare(data)
+            for names, values_by_column in _column_batches(data, columns, batch_size):
+                batch = dict(zip(names, values_by_column))
+                count = len(values_by_column[0]) if values_by_column else 0
+                rows += count
+                for task in tasks:
+                    task.update(batch, count)
+            logger.info(f"Report pass finished over {rows} rows")
+            return {name: task.result() for name, task in self.tasks.items()}
+        except Exception as e:
+            logger.error(f"Error running report: {e}")
+            raise
+
+
+def weather_report() -> WeatherReport:
+    """
+    Build the standard analysis report printed by main.py, including the inputs of its six plots
+    (histogram plots are binned during the pass, the scatter plot becomes a density grid on big data)
+    Returns:
+        WeatherReport
+    """
+    return WeatherReport({
+        'row_count': RowCount(),
+        'rain_patterns': RainPatterns(),
+        'max_temp': NumericSummary('MaxTemp'),
+        'min_temp': NumericSummary('MinTemp'),
+        'rainfall': NumericSummary('Rainfall'),
+        'hot_days': CountWhere(ColumnPredicate('MaxTemp', '>=', 35.0)),
+        'heavy_rain_days': CountWhere(ColumnPredicate('Rainfall', '>=', 10.0)),
+        'windy_days': CountWhere(ColumnPredicate('WindGustSpeed', '>=', 60.0)),
+        'temp_range': Difference('MaxTemp', 'MinTemp', histogram=True),
+        'max_temps': ColumnHistogram('MaxTemp'),
+        'rainfall_amounts': ColumnHistogram('Rainfall', ColumnPredicate('Rainfall', '>', 0)),
+        'temp_humidity': PairPoints('MaxTemp', 'Humidity3pm'),
+        'wind_speeds': ColumnHistogram('WindGustSpeed'),
+        'rainy_pressure': Collect('Pressure9am', ColumnPredicate('RainToday', '==', 'Yes')),
+        'dry_pressure': Collect('Pressure9am', ColumnPredicate('RainToday', '==', 'No')),
+    })
+
+
+def render_report_plots(report: WeatherReport, output_dir: str = '.', workers: int = 1,
+                        cache: Optional[PlotCache] = None) -> list[str]:
+    """
+    Save the six standard plots from the inputs a weather_report() run collected, no second pass over the data
+    - Histograms are drawn from the counts binned during the pass
+    - With workers > 1 the figures render concurrently in worker processes, each gets only its
+      Histogram / arrays, never the dataset
+    Args:
+        report: WeatherReport from weather_report() that has been run
+        output_dir: Directory to save the plots in
+        workers: Number of worker processes to render in (1 = one after another in this process)
+        cache: Optional PlotCache, plots whose collected inputs didn't change are copied from it
+    Returns:
+        List of saved file paths (plots without data are skipped and failed plots left out, both with a warning)
+    """
+    tasks = report.tasks
+    jobs = []
+
+    def add(name, function, *args, **kwargs):
+        jobs.append(PlotJob(os.path.join(output_dir, name), function, *args, **kwargs))
+
+    max_temps = tasks['max_temps'].result()
+    if max_temps:
+        add('temperature_distribution.png', save_histogram, max_temps, xlabel='Maximum Temperature (°C)',
+            title='Distribution of Maximum Temperatures')
+    else:
+        logger.warning("No valid temperature data to plot")
+
+    rainfall_amounts = tasks['rainfall_amounts'].result()
+    if rainfall_amounts:
+        add('rainfall_patterns.png', save_histogram, rainfall_amounts, xlabel='Rainfall Amount (mm)',
+            title='Distribution of Rainfall on Rainy Days', color='blue')
+    else:
+        logger.warning("No rainfall data to plot")
+
+    temp_humidity = tasks['temp_humidity'].result()
+    if temp_humidity:
+        add('temp_vs_humidity.png', save_points, temp_humidity, xlabel='Maximum Temperature (°C)',
+            ylabel='Humidity at 3pm (%)', title='Temperature vs Humidity Relationship')
+    else:
+        logger.warning("Insufficient data for temperature vs humidity plot")
+
+    wind_speeds = tasks['wind_speeds'].result()
+    if wind_speeds:
+        add('wind_speed_distribution.png', save_histogram, wind_speeds, xlabel='Wind Gust Speed (km/h)',
+            title='Distribution of Wind Gust Speeds', color='green')
+    else:
+        logger.warning("No valid wind speed data to plot")
+
+    rainy_pressure, dry_pressure = tasks['rainy_pressure'].result(), tasks['dry_pressure'].result()
+    if rainy_pressure and dry_pressure:
+        add('pressure_vs_rain.png', save_boxplot, [dry_pressure, rainy_pressure], ['No Rain', 'Rain'],
+            ylabel='Pressure at 9am (hPa)', title='Atmospheric Pressure: Rainy vs Non-Rainy Days')
+    else:
+        logger.warning("Insufficient pressure data for comparison")
+
+    temp_ranges = tasks['temp_range'].histogram
+    if temp_ranges:
+        add('temperature_range_trends.png', save_histogram, temp_ranges, xlabel='Daily Temperature Range (°C)',
+            title='Distribution of Daily Temperature Ranges (MaxTemp - MinTemp)', color='orange')
+    else:
+        logger.warning("No valid temperature range data to plot")
+
+    saved = []
+    for result in render_plots(jobs, workers=workers, cache=cache):
+        if result['error']:
+            logger.warning(f"Skipping {result['output_path']}: {result['error']}")
+        else:
+            saved.append(result['output_path'])
+    logger.info(f"Saved {len(saved)} report plots to {output_dir}")
+    return saved
@@ -0,0 +1,154 @@
+from typing import Callable, Iterable, Optional
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# column types
+NUMERIC = 'numeric'
+CATEGORICAL = 'categorical'
+
+# rows read to guess column types when no schema is given
+DEFAULT_SAMPLE_SIZE = 1000
+
+# weather columns that only ever hold a few dozen distinct strings, always read as categorical
+# (a sample where they happen to be empty would otherwise guess numeric)
+CATEGORICAL_COLUMNS = ('Location', 'WindGustDir', 'WindDir9am', 'WindDir3pm', 'RainToday', 'RainTomorrow')
+
+# distinct strings shared per categorical column in the row path, past this new strings aren't pooled
+INTERN_LIMIT = 10000
+
+
+def convert_value(value):
+    """
+    Generic cell conversion, used for columns without a declared type and as the fallback for bad cells
+    Args:
+        value: Raw cell text (or None for short rows)
+    Returns:
+        None for empty cells, float if it parses, otherwise the original value
+    """
+    if value == '' or value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        # keep as string if not number
+        return value
+
+
+def _to_float(value):
+    # no exception handling here, a bad cell fails the whole row over to convert_value
+    return float(value) if value else None
+
+
+class _StringPool(dict):
+    """
+    Shared str per distinct categorical value, so rows don't each hold their own copy of 'Yes' or 'Albury'
+    (and == on them hits the identity fast path). Looking up a pooled value is a plain dict lookup
+    """
+
+    def __init__(self):
+        # empty cells are missing
+        super().__init__({'': None})
+
+    def __missing__(self, value):
+        if len(self) <= INTERN_LIMIT:
+            self[value] = value
+        return value
+
+
+def _interned_text():
+    """Build a categorical converter with its own string pool"""
+    return _StringPool().__getitem__
+
+
+def _to_floats(cells):
+    # no exception handling here, a bad cell fails the batch over to convert_value
+    return [float(value) if value else None for value in cells]
+
+
+def _to_texts(cells):
+    return [value if value else None for value in cells]
+
+
+def _guess_values(cells):
+    return [convert_value(value) for value in cells]
+
+
+_CONVERTER_FACTORIES = {
+    NUMERIC: lambda: _to_float,
+    # a fresh string pool per column per read
+    CATEGORICAL: _interned_text,
+}
+
+# same conversions over a whole column batch, no call per cell
+_COLUMN_CONVERTERS = {
+    NUMERIC: _to_floats,
+    CATEGORICAL: _to_texts,
+}
+
+
+def infer_schema(fieldnames: list[str], sample_rows: Iterable[list[str]]) -> dict:
+    """
+    Guess the type of every column from a sample of raw CSV records
+    Args:
+        fieldnames: Header names
+        sample_rows: Iterable of raw records (lists of strings) from csv.reader
+    Returns:
+        Dict of column name -> NUMERIC or CATEGORICAL
+    """
+    numeric = [True] * len(fieldnames)
+    for record in sample_rows:
+        for i, value in enumerate(record[:len(fieldnames)]):
+            if numeric[i] and value != '':
+                try:
+                    float(value)
+                except ValueError:
+                    numeric[i] = False
+
+    schema = {name: NUMERIC if is_numeric and name not in CATEGORICAL_COLUMNS else CATEGORICAL
+              for name, is_numeric in zip(fieldnames, numeric)}
+    logger.debug(f"Inferred schema: {schema}")
+    return schema
+
+
+def validate_schema(schema: dict) -> None:
+    """
+    Check a declared schema only uses known column types
+    Args:
+        schema: Dict of column name -> column type
+    Raises:
+        ValueError: Unknown column type
+    """
+    for name, column_type in schema.items():
+        if column_type not in _CONVERTER_FACTORIES:
+            logger.error(f"Unknown type '{column_type}' for column '{name}'")
+            raise ValueError(f"Unknown type '{column_type}' for column '{name}', expected '{NUMERIC}' or '{CATEGORICAL}'")
+
+
+def build_converters(fieldnames: list[str], schema: Optional[dict]) -> list[Callable]:
+    """
+    Build one converter per column up front so cells don't have to guess their type one by one
+    - Categorical converters intern their strings, repeated values share one str object
+    Args:
+        fieldnames: Column names in order
+        schema: Dict of column name -> NUMERIC or CATEGORICAL, columns not listed use convert_value
+    Returns:
+        List of converter functions taking one raw cell, same order as fieldnames
+    """
+    schema = schema or {}
+    validate_schema(schema)
+    return [_CONVERTER_FACTORIES[schema[name]]() if name in schema else convert_value for name in fieldnames]
+
+
+def build_column_converters(fieldnames: list[str], schema: Optional[dict]) -> list[Callable]:
+    """
+    Like build_converters, but each converter takes a whole batch of cells from one column
+    Args:
+        fieldnames: Column names in order
+        schema: Dict of column name -> NUMERIC or CATEGORICAL, columns not listed use convert_value
+    Returns:
+        List of converter functions taking a sequence of raw cells and returning a list of values
+    """
+    schema = schema or {}
+    validate_schema(schema)
+    return [_COLUMN_CONVERTERS.get(schema.get(name), _guess_values) for name in fieldnames]
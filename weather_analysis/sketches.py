@@ -0,0 +1,211 @@
+import math
+import random
+from itertools import islice
+from typing import Iterable, Optional
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# k=200 keeps under a thousand values and gives about 1.65% normalized rank error (99% confidence)
+DEFAULT_K = 200
+# each compactor below the top is this fraction of the size of the one above it
+_SHRINK = 2 / 3
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang, Liberty "KLL") for streams too big to sort
+    - Fixed memory: a few times k values, no matter how many are pushed
+    - Error bound: a returned quantile's rank is within about 1.65% of n of the requested rank
+      with 99% confidence at k=200 (error shrinks roughly as 1/k)
+    - Sketches built on different chunks, files or processes can be merged
+    - count, min and max are exact, and so are quantiles until the first compaction (about k values),
+      interpolated between neighbours like analytics.calculate_quantiles
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        """
+        Initialize the sketch
+        Args:
+            k: Accuracy parameter, bigger is more accurate and uses more memory (min 8)
+            seed: Optional seed for the coin flips in compaction, for reproducible results
+        Raises:
+            ValueError: k is too small
+        """
+        if k < 8:
+            logger.error(f"KLL sketch k too small: {k}")
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        # compactors[h] holds values standing for 2**h original values each
+        self.compactors = [[]]
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _capacity(self, level: int) -> int:
+        if level == 0:
+            # the bottom level takes raw pushes, keeping it at k means compaction runs once per ~k/2 values
+            return self.k
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * _SHRINK ** depth)))
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _size(self) -> int:
+        return sum(len(compactor) for compactor in self.compactors)
+
+    def _compress(self) -> None:
+        """Compact full levels until the sketch fits its memory budget again"""
+        while self._size() >= self._max_size():
+            for level, compactor in enumerate(self.compactors):
+                if len(compactor) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    compactor.sort()
+                    # an odd value out stays at this level so the total weight is preserved
+                    leftover = [compactor.pop()] if len(compactor) % 2 else []
+                    # keep every other value (random start) at twice the weight
+                    self.compactors[level + 1].extend(compactor[self._random.randint(0, 1)::2])
+                    self.compactors[level] = leftover
+                    break
+
+    def push(self, value: float) -> None:
+        """
+        Add one value
+        Args:
+            value: Numeric value
+        """
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.compactors[0].append(value)
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def push_many(self, values: Iterable[float]) -> None:
+        """
+        Add a batch of values (faster than calling push for each)
+        Args:
+            values: Iterable of numeric values
+        """
+        values = iter(values)
+        while True:
+            room = max(1, self._capacity(0) - len(self.compactors[0]))
+            batch = list(islice(values, room))
+            if not batch:
+                return
+            self.count += len(batch)
+            self.min = min(self.min, min(batch))
+            self.max = max(self.max, max(batch))
+            self.compactors[0].extend(batch)
+            if len(self.compactors[0]) >= self._capacity(0):
+                self._compress()
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """
+        Fold another sketch into this one
+        Args:
+            other: KLLSketch built on other values
+        Returns:
+            self, so merges can be chained
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, compactor in enumerate(other.compactors):
+            self.compactors[level].extend(compactor)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _sorted_weights(self) -> list[tuple]:
+        weighted = [(value, 1 << level) for level, compactor in enumerate(self.compactors) for value in compactor]
+        weighted.sort()
+        return weighted
+
+    def quantiles(self, qs: Iterable[float]) -> list[float]:
+        """
+        Estimate several quantiles from one sort of the retained values
+        Args:
+            qs: Quantiles between 0 and 1, e.g. [0.05, 0.5, 0.95]
+        Returns:
+            List of estimates in the same order (q=0 and q=1 give the exact min and max)
+        Raises:
+            ValueError: Sketch is empty or a quantile is outside [0, 1]
+        """
+        qs = list(qs)
+        if self.count == 0:
+            logger.error("Cannot estimate quantiles of empty sketch")
+            raise ValueError("Can't estimate quantiles of an empty sketch")
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        if not any(self.compactors[1:]):
+            # nothing was compacted, every value is still here: interpolate like the exact path does
+            values = sorted(self.compactors[0])
+            last = len(values) - 1
+            results = []
+            for q in qs:
+                position = q * last
+                low = int(position)
+                fraction = position - low
+                low_value = values[low]
+                results.append(low_value if fraction == 0 else
+                               low_value + (values[min(low + 1, last)] - low_value) * fraction)
+            return results
+
+        weighted = self._sorted_weights()
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for q in qs:
+            if q == 0:
+                results.append(self.min)
+                continue
+            if q == 1:
+                results.append(self.max)
+                continue
+            target = q * total
+            cumulative = 0
+            estimate = weighted[-1][0]
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    estimate = value
+                    break
+            results.append(estimate)
+        return results
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate one quantile
+        Args:
+            q: Quantile between 0 and 1 (0.5 = median)
+        Returns:
+            Estimated value
+        Raises:
+            ValueError: Sketch is empty or q is outside [0, 1]
+        """
+        return self.quantiles([q])[0]
+
+
+def feed_sketch(values: Iterable[float], sketch: KLLSketch):
+    """
+    Pass values through unchanged while pushing each into a sketch, so one pass can feed other statistics too
+    Args:
+        values: Iterable of numeric values
+        sketch: KLLSketch to fill
+    Yields:
+        Each value
+    """
+    push = sketch.push
+    for value in values:
+        push(value)
+        yield value
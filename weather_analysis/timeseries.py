@@ -0,0 +1,169 @@
+from array import array
+from collections import deque
+from datetime import date
+from typing import Iterable, Optional
+from .logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+ROLLING_FUNCTIONS = ('sum', 'mean', 'count', 'min', 'max')
+
+
+def parse_day(value) -> Optional[int]:
+    """Turn an ISO date like '2016-03-01' (or a datetime.date) into a day number, None if it isn't a date"""
+    if isinstance(value, date):
+        return value.toordinal()
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+class TimeIndex:
+    """
+    Rows of each station in date order, the base for rolling and windowed statistics
+    - Dates are parsed once per distinct value, not once per row
+    - days[key] holds the day numbers (date ordinals) of a station ascending, rows[key] the matching row indexes
+    - Rows without a parsable date or without a key are left out, rows on the same day keep their file order
+    """
+
+    kind = 'time'
+
+    def __init__(self, date_column, key_column=None):
+        """
+        Build the index
+        Args:
+            date_column: Column of ISO date strings
+            key_column: Optional column to split series by, e.g. the Location column (None = one series)
+        """
+        parsed = {}
+        days = []
+        for value in date_column:
+            day = parsed.get(value, False)
+            if day is False:
+                day = parsed[value] = parse_day(value)
+            days.append(day)
+
+        groups = {}
+        keys = key_column if key_column is not None else [None] * len(days)
+        for row, (day, key) in enumerate(zip(days, keys)):
+            if day is None or (key is None and key_column is not None):
+                continue
+            rows = groups.get(key)
+            if rows is None:
+                groups[key] = rows = []
+            rows.append(row)
+
+        self.column = date_column
+        self.key_column = key_column
+        self.row_count = len(days)
+        self.rows = {}
+        self.days = {}
+        for key, rows in groups.items():
+            rows.sort(key=days.__getitem__)
+            self.rows[key] = array('i', rows)
+            self.days[key] = array('i', [days[row] for row in rows])
+        logger.debug(f"Built time index over {sum(len(rows) for rows in self.rows.values())} rows "
+                     f"in {len(self.rows)} series")
+
+    def dates(self, key) -> list[str]:
+        """Return the dates of a series as ISO strings, in index order"""
+        return [date.fromordinal(day).isoformat() for day in self.days[key]]
+
+
+def rolling(days: Iterable[int], values: Iterable, window: int, how: str = 'mean', min_periods: int = 1) -> list:
+    """
+    Rolling statistic over a time window in one pass, O(1) amortized per step
+    - The window at each row covers the days (day - window, day], so gaps in the dates shrink it
+      (e.g. window=7 with days 1..7 missing day 4 holds six values)
+    - sum / mean / count keep a running total of a deque, min / max a monotonic deque
+    - Pass days=range(n) for a window of the last n rows
+    Args:
+        days: Ascending day numbers, one per value
+        values: Values, None or NaN for missing (skipped but still a row of output)
+        window: Window length in days
+        how: One of sum, mean, count, min, max
+        min_periods: Valid values needed in the window for a result, else None
+    Returns:
+        List with the statistic at every row
+    Raises:
+        ValueError: Unknown function or window < 1
+    """
+    if how not in ROLLING_FUNCTIONS:
+        logger.error(f"Unknown rolling function: {how}")
+        raise ValueError(f"Unknown rolling function '{how}', expected one of {', '.join(ROLLING_FUNCTIONS)}")
+    if window < 1:
+        logger.error(f"Invalid rolling window: {window}")
+        raise ValueError("Window must be at least 1 day")
+
+    result = []
+    # every valid value in the window, and for min / max the ones that can still be the answer
+    in_window = deque()
+    candidates = deque()
+    total = 0.0
+    for day, value in zip(days, values):
+        start = day - window
+        while in_window and in_window[0][0] <= start:
+            total -= in_window.popleft()[1]
+        while candidates and candidates[0][0] <= start:
+            candidates.popleft()
+        if not in_window:
+            # avoid drift from adding and removing the same values
+            total = 0.0
+
+        if value is not None and value == value:
+            in_window.append((day, value))
+            total += value
+            if how == 'max':
+                while candidates and candidates[-1][1] <= value:
+                    candidates.pop()
+                candidates.append((day, value))
+            elif how == 'min':
+                while candidates and candidates[-1][1] >= value:
+                    candidates.pop()
+                candidates.append((day, value))
+
+        if not in_window or len(in_window) < min_periods:
+            result.append(None)
+        elif how == 'count':
+            result.append(len(in_window))
+        elif how == 'sum':
+            result.append(total)
+        elif how == 'mean':
+            result.append(total / len(in_window))
+        else:
+            result.append(candidates[0][1])
+    return result
+
+
+def ewma(days: Iterable[int], values: Iterable, alpha: float) -> list:
+    """
+    Exponentially weighted moving average in one pass, gaps in the dates decay the old average further
+    - Each day the old average keeps a (1 - alpha) share, so a gap of g days keeps (1 - alpha) ** g
+    Args:
+        days: Ascending day numbers, one per value
+        values: Values, None or NaN for missing (the average carries over)
+        alpha: Smoothing factor between 0 and 1, e.g. 2 / (span + 1)
+    Returns:
+        List with the average at every row, None until the first valid value
+    Raises:
+        ValueError: alpha is outside (0, 1]
+    """
+    if not 0 < alpha <= 1:
+        logger.error(f"Invalid EWMA alpha: {alpha}")
+        raise ValueError("alpha must be between 0 and 1")
+    result = []
+    average = None
+    last_day = None
+    for day, value in zip(days, values):
+        if value is not None and value == value:
+            if average is None:
+                average = value
+            else:
+                keep = (1 - alpha) ** max(day - last_day, 1)
+                average = keep * average + (1 - keep) * value
+            last_day = day
+        result.append(average)
+    return result
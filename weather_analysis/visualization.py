@@ -1,6 +1,12 @@
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from functools import reduce
-from typing import Iterable, Callable, List, Dict, Tuple
-import matplotlib.pyplot as plt
+from itertools import islice
+from typing import Iterable, Iterator, Callable, List, Dict, Optional, Tuple
+from .plot_cache import PlotCache
+from .histogram import DEFAULT_BINS, DENSITY_THRESHOLD, FINE_BINS, SAMPLE_SIZE, Histogram, ScatterPoints
+from .predicates import ColumnPredicate
 from .logger_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -8,16 +14,25 @@ logger = setup_logger(__name__)
 
 # -- Data Filtering Lambda and Filter --
 
+def _filter_dataset(data, predicate: ColumnPredicate) -> List[dict]:
+    """Push a filter down into a WeatherDataset so the check runs on raw text / column buffers instead of row dicts"""
+    result = data.filter_rows(predicate)
+    logger.info(f"Found {len(result)} rows where {predicate.column} {predicate.op} {predicate.value}")
+    return result
+
+
 def filter_by_rainfall_threshold(data: Iterable[dict], threshold: float) -> List[dict]:
     """
     Filter rows where rainfall exceeds threshold using filter and lambda
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset to filter while reading
         threshold: Min rainfall value
     Returns:
         List of rows with rainfall >= threshold
     """
     logger.info(f"Filtering data for rainfall >= {threshold}")
+    if hasattr(data, 'filter_rows'):
+        return _filter_dataset(data, ColumnPredicate('Rainfall', '>=', threshold))
     result = list(filter(
         lambda row: row.get('Rainfall') is not None
                     and isinstance(row['Rainfall'], (int, float))
@@ -32,12 +47,14 @@ def filter_high_temperature_days(data: Iterable[dict], temp_threshold: float) ->
     """
     Filter days with high max temp using filter and lambda
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset to filter while reading
         temp_threshold: Min MaxTemp value
     Returns:
         List of rows with MaxTemp >= temp_threshold
     """
     logger.info(f"Filtering data for MaxTemp >= {temp_threshold}")
+    if hasattr(data, 'filter_rows'):
+        return _filter_dataset(data, ColumnPredicate('MaxTemp', '>=', temp_threshold))
     result = list(filter(
         lambda row: row.get('MaxTemp') is not None
                     and isinstance(row['MaxTemp'], (int, float))
@@ -52,12 +69,14 @@ def filter_windy_days(data: Iterable[dict], wind_speed_threshold: float) -> List
     """
     Filter days with high wind gusts using filter and lambda
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset to filter while reading
         wind_speed_threshold: Min WindGustSpeed value
     Returns:
         List of rows with WindGustSpeed >= wind_speed_threshold
     """
     logger.info(f"Filtering data for WindGustSpeed >= {wind_speed_threshold}")
+    if hasattr(data, 'filter_rows'):
+        return _filter_dataset(data, ColumnPredicate('WindGustSpeed', '>=', wind_speed_threshold))
     result = list(filter(
         lambda row: row.get('WindGustSpeed') is not None
                     and isinstance(row['WindGustSpeed'], (int, float))
@@ -72,12 +91,14 @@ def filter_by_location(data: Iterable[dict], location: str) -> List[dict]:
     """
     Filter data for specific location using filter and lambda
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset to filter while reading
         location: Location name to filter
     Returns:
         List of rows for specified location
     """
     logger.info(f"Filtering data for location: {location}")
+    if hasattr(data, 'filter_rows'):
+        return _filter_dataset(data, ColumnPredicate('Location', '==', location))
     result = list(filter(lambda row: row.get('Location') == location, data))
     logger.info(f"Found {len(result)} rows for location: {location}")
     return result
@@ -224,15 +245,64 @@ def find_min_temperature(data: Iterable[dict]) -> float:
 
 # -- Pattern Analysis --
 
+def _category_codes(dataset, column_name: str, value) -> Tuple[list, int]:
+    """
+    Return a loaded dataset column's category codes and the code for value, so equality checks become integer compares
+    Args:
+        dataset: WeatherDataset already in memory
+        column_name: Name of the column
+        value: Value to look for
+    Returns:
+        Tuple of (list of codes, code of value), the code is -2 if the value never appears so nothing matches.
+        A column the dataset doesn't have gives missing codes, like row.get() on row dicts
+    """
+    if column_name not in dataset.column_names:
+        return [-1] * dataset.get_row_count(), -2
+    column = dataset.get_column(column_name)
+    if column.kind != 'categorical':
+        column = column.to_categorical()
+    code = column.code_of(value)
+    return column.codes.tolist(), (-2 if code is None else code)
+
+
+def _streamed_columns(dataset, column_names: List[str]) -> Iterator[list]:
+    """
+    Read some columns of a dataset that isn't loaded batch by batch, without loading it
+    Args:
+        dataset: WeatherDataset
+        column_names: Columns to read, a column the dataset doesn't have reads as None like row.get()
+    Yields:
+        List with one list of values per column, for each batch of rows
+    """
+    available = dataset.column_names
+    present = [name for name in column_names if name in available]
+    if not present:
+        yield [[None] * dataset.get_row_count() for _ in column_names]
+        return
+    for names, values_by_column in dataset.column_batches(present):
+        by_name = dict(zip(names, values_by_column))
+        count = len(values_by_column[0])
+        yield [by_name[name] if name in by_name else [None] * count for name in column_names]
+
+
 def count_rainy_days(data: Iterable[dict]) -> int:
     """
     Count days where it rained using filter and lambda
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset (counts RainToday codes directly when it is
+              loaded, a lazy one streams just that column)
     Returns:
         Num of rainy days
     """
     logger.info("Counting rainy days")
+    if hasattr(data, 'is_loaded'):
+        if data.is_loaded():
+            codes, yes = _category_codes(data, 'RainToday', 'Yes')
+            count = codes.count(yes)
+        else:
+            count = sum(today.count('Yes') for today, in _streamed_columns(data, ['RainToday']))
+        logger.info(f"Found {count} rainy days")
+        return count
     rainy = list(filter(lambda row: row.get('RainToday') == 'Yes', data))
     count = len(rainy)
     logger.info(f"Found {count} rainy days")
@@ -243,11 +313,32 @@ def analyze_rain_patterns(data: Iterable[dict]) -> Dict[str, int]:
     """
     Analyze rain patterns using functional programming
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset (compares category codes instead of strings
+              when it is loaded, a lazy one streams just the two columns)
     Returns:
         Dict with rain pattern statistics
     """
     logger.info("Analyzing rain patterns")
+    if hasattr(data, 'is_loaded'):
+        if data.is_loaded():
+            today, yes_today = _category_codes(data, 'RainToday', 'Yes')
+            tomorrow, yes_tomorrow = _category_codes(data, 'RainTomorrow', 'Yes')
+            result = {
+                'rain_today': today.count(yes_today),
+                'rain_tomorrow': tomorrow.count(yes_tomorrow),
+                'consecutive_rain': sum(1 for a, b in zip(today, tomorrow) if a == yes_today and b == yes_tomorrow),
+                'total_days': len(today)
+            }
+        else:
+            result = {'rain_today': 0, 'rain_tomorrow': 0, 'consecutive_rain': 0, 'total_days': 0}
+            for today, tomorrow in _streamed_columns(data, ['RainToday', 'RainTomorrow']):
+                result['rain_today'] += today.count('Yes')
+                result['rain_tomorrow'] += tomorrow.count('Yes')
+                result['consecutive_rain'] += sum(1 for a, b in zip(today, tomorrow) if a == 'Yes' and b == 'Yes')
+                result['total_days'] += len(today)
+        logger.info(f"Rain pattern analysis: {result}")
+        return result
+
     data_list = list(data)
 
     # count rain today
@@ -275,143 +366,303 @@ def analyze_rain_patterns(data: Iterable[dict]) -> Dict[str, int]:
 
 # -- Visualization --
 
-def plot_temperature_distribution(data: Iterable[dict], output_path: str = 'temperature_distribution.png'):
+def save_histogram(values, output_path: str, xlabel: str, title: str, color: Optional[str] = None,
+                   bins: int = DEFAULT_BINS):
+    """
+    Draw and save a histogram from pre-binned counts (shared by the plot functions and the report engine)
+    Args:
+        values: Histogram, or a sequence of numbers (e.g. list or array('d')) binned over its min and max
+        output_path: Path to save the plot
+        xlabel: X axis label
+        title: Plot title
+        color: Optional bar color
+        bins: Number of bins, at most this many are drawn for a Histogram
+    """
+    # pyplot loads on the first plot drawn, not when the package is imported
+    import matplotlib.pyplot as plt
+
+    if isinstance(values, Histogram):
+        histogram = values
+    else:
+        histogram = Histogram(bins, (min(values), max(values))) if max(values) > min(values) else Histogram(bins)
+        histogram.push_many(values)
+    lefts, counts, width = histogram.trimmed(bins)
+
+    style = {'edgecolor': 'black', 'alpha': 0.7}
+    if color is not None:
+        style['color'] = color
+    plt.figure(figsize=(10, 6))
+    # counts are already binned, matplotlib only draws the bars
+    plt.bar(lefts, counts, width=width, align='edge', **style)
+    plt.xlabel(xlabel)
+    plt.ylabel('Frequency')
+    plt.title(title)
+    plt.grid(True, alpha=0.3)
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def _numeric_rows(data, columns: List[str], batch_size: int = 65536) -> Iterator[tuple]:
+    """
+    Yield a tuple per row where every column holds a number, without building a list of the data
+    - WeatherDatasets and ColumnarTables are read a column batch at a time (lazy datasets stream the file)
+    - Other iterables of row dicts are read in chunks
+    """
+    if hasattr(data, 'column_batches'):
+        batches = (values_by_column for _, values_by_column in data.column_batches(list(columns)))
+    else:
+        rows = iter(data)
+        chunks = iter(lambda: list(islice(rows, batch_size)), [])
+        batches = ([[row.get(column) for row in chunk] for column in columns] for chunk in chunks)
+    for values_by_column in batches:
+        yield from (values for values in zip(*values_by_column)
+                    if all(isinstance(value, (int, float)) for value in values))
+
+
+def stream_histogram(values: Iterable[float]) -> Histogram:
+    """
+    Bin a stream of numbers for plotting in constant memory
+    Args:
+        values: Iterable of numbers, e.g. a generator over a lazy dataset
+    Returns:
+        Adaptive Histogram with FINE_BINS bins (save_histogram draws it with DEFAULT_BINS)
+    """
+    histogram = Histogram(FINE_BINS)
+    histogram.push_many(values)
+    return histogram
+
+
+def save_scatter(x_values, y_values, output_path: str, xlabel: str, ylabel: str, title: str):
+    """
+    Draw and save a scatter plot
+    Args:
+        x_values: Sequence of x values
+        y_values: Sequence of y values, same length
+        output_path: Path to save the plot
+        xlabel: X axis label
+        ylabel: Y axis label
+        title: Plot title
+    """
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.scatter(x_values, y_values, alpha=0.3, s=10)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.grid(True, alpha=0.3)
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def save_density(grid, output_path: str, xlabel: str, ylabel: str, title: str):
+    """
+    Draw and save a density grid as an image, render time depends on the grid size, not the number of points
+    Args:
+        grid: Histogram2D
+        output_path: Path to save the plot
+        xlabel: X axis label
+        ylabel: Y axis label
+        title: Plot title
+    """
+    import matplotlib.pyplot as plt
+    import numpy as np
+    from matplotlib.colors import LogNorm
+
+    counts = np.ma.masked_equal(np.array(grid.grid()), 0)
+    plt.figure(figsize=(10, 6))
+    # empty cells stay blank, a log scale keeps sparse edges visible next to the dense middle
+    mesh = plt.pcolormesh(grid.x_edges, grid.y_edges, counts, cmap='viridis', norm=LogNorm())
+    plt.colorbar(mesh, label='Days')
+    plt.xlim(grid.x_axis[2], grid.x_axis[3])
+    plt.ylim(grid.y_axis[2], grid.y_axis[3])
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.grid(True, alpha=0.3)
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def save_points(points: ScatterPoints, output_path: str, xlabel: str, ylabel: str, title: str):
+    """
+    Draw and save what a ScatterPoints collected: a density grid, a sample or every point
+    Args:
+        points: ScatterPoints
+        output_path: Path to save the plot
+        xlabel: X axis label
+        ylabel: Y axis label
+        title: Plot title
+    """
+    if points.kind == 'density':
+        save_density(points.density, output_path, xlabel, ylabel, f"{title} (density of {len(points):,} days)")
+    elif points.kind == 'sample' and len(points) > len(points.x_values):
+        save_scatter(points.x_values, points.y_values, output_path, xlabel, ylabel,
+                     f"{title} (sample of {len(points.x_values):,} of {len(points):,} days)")
+    else:
+        save_scatter(points.x_values, points.y_values, output_path, xlabel, ylabel, title)
+
+
+def save_boxplot(groups: list, labels: List[str], output_path: str, ylabel: str, title: str):
+    """
+    Draw and save a box plot with one box per group
+    Args:
+        groups: List of sequences of numbers
+        labels: Label for each group
+        output_path: Path to save the plot
+        ylabel: Y axis label
+        title: Plot title
+    """
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.boxplot(groups)
+    # set through xticks, boxplot's labels keyword was renamed in newer matplotlib
+    plt.xticks(range(1, len(labels) + 1), labels)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.grid(True, alpha=0.3)
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def plot_temperature_distribution(data: Iterable[dict], output_path: str = 'temperature_distribution.png',
+                                  cache: Optional[PlotCache] = None):
     """
     Create histogram of temp distribution using filtered data
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset (read a column batch at a time)
         output_path: Path to save the plot
+        cache: Optional PlotCache, an unchanged dataset and arguments copy the cached figure instead of drawing
     """
+    if cache is not None:
+        cache.render(data, output_path, 'plot_temperature_distribution', {},
+                     lambda: plot_temperature_distribution(data, output_path))
+        return
+
     logger.info("Creating temperature distribution plot")
 
-    # use map and filter to extract valid temp values
-    max_temps = list(filter(
-        lambda x: x is not None,
-        map(lambda row: row.get('MaxTemp') if isinstance(row.get('MaxTemp'), (int, float)) else None, data)
-    ))
+    # bin the valid temps as they stream past, no list of values
+    max_temps = stream_histogram(temp for (temp,) in _numeric_rows(data, ['MaxTemp']))
 
     if not max_temps:
         logger.warning("No valid temperature data to plot")
         return
 
-    plt.figure(figsize=(10, 6))
-    plt.hist(max_temps, bins=50, edgecolor='black', alpha=0.7)
-    plt.xlabel('Maximum Temperature (°C)')
-    plt.ylabel('Frequency')
-    plt.title('Distribution of Maximum Temperatures')
-    plt.grid(True, alpha=0.3)
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    save_histogram(max_temps, output_path, 'Maximum Temperature (°C)', 'Distribution of Maximum Temperatures')
     logger.info(f"Temperature distribution plot saved to {output_path}")
 
 
-def plot_rainfall_patterns(data: Iterable[dict], output_path: str = 'rainfall_patterns.png'):
+def plot_rainfall_patterns(data: Iterable[dict], output_path: str = 'rainfall_patterns.png',
+                           cache: Optional[PlotCache] = None):
     """
     Create visualization of rainfall patterns using filtered data
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset (read a column batch at a time)
         output_path: Path to save the plot
+        cache: Optional PlotCache, an unchanged dataset and arguments copy the cached figure instead of drawing
     """
-    logger.info("Creating rainfall patterns plot")
+    if cache is not None:
+        cache.render(data, output_path, 'plot_rainfall_patterns', {},
+                     lambda: plot_rainfall_patterns(data, output_path))
+        return
 
-    # filter for rainy days only
-    rainy_days = list(filter(
-        lambda row: row.get('Rainfall') is not None
-                    and isinstance(row['Rainfall'], (int, float))
-                    and row['Rainfall'] > 0,
-        data
-    ))
+    logger.info("Creating rainfall patterns plot")
 
-    # extract rainfall amounts
-    rainfall_amounts = list(map(lambda row: row['Rainfall'], rainy_days))
+    # bin the rainfall of rainy days only
+    rainfall_amounts = stream_histogram(rain for (rain,) in _numeric_rows(data, ['Rainfall']) if rain > 0)
 
     if not rainfall_amounts:
         logger.warning("No rainfall data to plot")
         return
 
-    plt.figure(figsize=(10, 6))
-    plt.hist(rainfall_amounts, bins=50, edgecolor='black', alpha=0.7, color='blue')
-    plt.xlabel('Rainfall Amount (mm)')
-    plt.ylabel('Frequency')
-    plt.title('Distribution of Rainfall on Rainy Days')
-    plt.grid(True, alpha=0.3)
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    save_histogram(rainfall_amounts, output_path, 'Rainfall Amount (mm)', 'Distribution of Rainfall on Rainy Days',
+                   color='blue')
     logger.info(f"Rainfall patterns plot saved to {output_path}")
 
 
-def plot_temperature_vs_humidity(data: Iterable[dict], output_path: str = 'temp_vs_humidity.png'):
+def plot_temperature_vs_humidity(data: Iterable[dict], output_path: str = 'temp_vs_humidity.png', mode: str = 'auto',
+                                 threshold: int = DENSITY_THRESHOLD, sample_size: int = SAMPLE_SIZE,
+                                 cache: Optional[PlotCache] = None):
     """
     Create scatter plot of temp vs humidity using filtered data
+    - Above threshold points the auto mode draws a density grid instead of one marker per day
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset (read a column batch at a time)
         output_path: Path to save the plot
-    """
-    logger.info("Creating temperature vs humidity scatter plot")
+        mode: auto, scatter (every point), density (MaxTemp x Humidity3pm grid) or sample (at most sample_size points)
+        threshold: Points above which auto switches to the density grid
+        sample_size: Points drawn by the sample mode
+        cache: Optional PlotCache, an unchanged dataset and arguments copy the cached figure instead of drawing
+    Raises:
+        ValueError: Unknown mode
+    """
+    if cache is not None:
+        cache.render(data, output_path, 'plot_temperature_vs_humidity',
+                     {'mode': mode, 'threshold': threshold, 'sample_size': sample_size},
+                     lambda: plot_temperature_vs_humidity(data, output_path, mode, threshold, sample_size))
+        return
 
-    # filter for valid data points
-    valid_data = list(filter(
-        lambda row: (row.get('MaxTemp') is not None and isinstance(row['MaxTemp'], (int, float)) and
-                     row.get('Humidity3pm') is not None and isinstance(row['Humidity3pm'], (int, float))),
-        data
-    ))
+    logger.info("Creating temperature vs humidity scatter plot")
 
-    # extract values using map
-    temps = list(map(lambda row: row['MaxTemp'], valid_data))
-    humidity = list(map(lambda row: row['Humidity3pm'], valid_data))
+    # valid pairs stream into the collector a chunk at a time
+    points = ScatterPoints(mode, threshold=threshold, sample_size=sample_size)
+    pairs = _numeric_rows(data, ['MaxTemp', 'Humidity3pm'])
+    for chunk in iter(lambda: list(islice(pairs, 65536)), []):
+        temps, humidity = zip(*chunk)
+        points.push_many(array('d', temps), array('d', humidity))
 
-    if not temps or not humidity:
+    if not points:
         logger.warning("Insufficient data for temperature vs humidity plot")
         return
 
-    plt.figure(figsize=(10, 6))
-    plt.scatter(temps, humidity, alpha=0.3, s=10)
-    plt.xlabel('Maximum Temperature (°C)')
-    plt.ylabel('Humidity at 3pm (%)')
-    plt.title('Temperature vs Humidity Relationship')
-    plt.grid(True, alpha=0.3)
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    logger.info(f"Temperature vs humidity plot saved to {output_path}")
+    save_points(points, output_path, 'Maximum Temperature (°C)', 'Humidity at 3pm (%)',
+                'Temperature vs Humidity Relationship')
+    logger.info(f"Temperature vs humidity plot ({points.kind}) saved to {output_path}")
 
 
-def plot_wind_speed_distribution(data: Iterable[dict], output_path: str = 'wind_speed_distribution.png'):
+def plot_wind_speed_distribution(data: Iterable[dict], output_path: str = 'wind_speed_distribution.png',
+                                 cache: Optional[PlotCache] = None):
     """
     Create histogram of wind gust speeds using filtered data
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset (read a column batch at a time)
         output_path: Path to save the plot
+        cache: Optional PlotCache, an unchanged dataset and arguments copy the cached figure instead of drawing
     """
+    if cache is not None:
+        cache.render(data, output_path, 'plot_wind_speed_distribution', {},
+                     lambda: plot_wind_speed_distribution(data, output_path))
+        return
+
     logger.info("Creating wind speed distribution plot")
 
-    # use filter and map to extract valid wind speeds
-    wind_speeds = list(filter(
-        lambda x: x is not None,
-        map(lambda row: row.get('WindGustSpeed') if isinstance(row.get('WindGustSpeed'), (int, float)) else None, data)
-    ))
+    # bin the valid wind speeds as they stream past
+    wind_speeds = stream_histogram(speed for (speed,) in _numeric_rows(data, ['WindGustSpeed']))
 
     if not wind_speeds:
         logger.warning("No valid wind speed data to plot")
         return
 
-    plt.figure(figsize=(10, 6))
-    plt.hist(wind_speeds, bins=50, edgecolor='black', alpha=0.7, color='green')
-    plt.xlabel('Wind Gust Speed (km/h)')
-    plt.ylabel('Frequency')
-    plt.title('Distribution of Wind Gust Speeds')
-    plt.grid(True, alpha=0.3)
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    save_histogram(wind_speeds, output_path, 'Wind Gust Speed (km/h)', 'Distribution of Wind Gust Speeds',
+                   color='green')
     logger.info(f"Wind speed distribution plot saved to {output_path}")
 
 
-def plot_pressure_vs_rain(data: Iterable[dict], output_path: str = 'pressure_vs_rain.png'):
+def plot_pressure_vs_rain(data: Iterable[dict], output_path: str = 'pressure_vs_rain.png',
+                          cache: Optional[PlotCache] = None):
     """
     Create box plot comparing pressure on rainy vs non rainy days
     Args:
         data: Iterable of weather data dicts
         output_path: Path to save the plot
+        cache: Optional PlotCache, an unchanged dataset and arguments copy the cached figure instead of drawing
     """
+    if cache is not None:
+        cache.render(data, output_path, 'plot_pressure_vs_rain', {},
+                     lambda: plot_pressure_vs_rain(data, output_path))
+        return
+
     logger.info("Creating pressure vs rain plot")
 
     data_list = list(data)
@@ -435,38 +686,137 @@ def plot_pressure_vs_rain(data: Iterable[dict], output_path: str = 'pressure_vs_
         logger.warning("Insufficient pressure data for comparison")
         return
 
-    plt.figure(figsize=(10, 6))
-    plt.boxplot([non_rainy_pressure, rainy_pressure], labels=['No Rain', 'Rain'])
-    plt.ylabel('Pressure at 9am (hPa)')
-    plt.title('Atmospheric Pressure: Rainy vs Non-Rainy Days')
-    plt.grid(True, alpha=0.3)
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    save_boxplot([non_rainy_pressure, rainy_pressure], ['No Rain', 'Rain'], output_path, 'Pressure at 9am (hPa)',
+                 'Atmospheric Pressure: Rainy vs Non-Rainy Days')
     logger.info(f"Pressure vs rain plot saved to {output_path}")
 
 
-def plot_temperature_range_trends(data: Iterable[dict], output_path: str = 'temperature_range_trends.png'):
+def plot_temperature_range_trends(data: Iterable[dict], output_path: str = 'temperature_range_trends.png',
+                                  cache: Optional[PlotCache] = None):
     """
     Create histogram of daily temp ranges
     Args:
-        data: Iterable of weather data dicts
+        data: Iterable of weather data dicts, or a WeatherDataset (read a column batch at a time)
         output_path: Path to save the plot
+        cache: Optional PlotCache, an unchanged dataset and arguments copy the cached figure instead of drawing
     """
+    if cache is not None:
+        cache.render(data, output_path, 'plot_temperature_range_trends', {},
+                     lambda: plot_temperature_range_trends(data, output_path))
+        return
+
     logger.info("Creating temperature range trends plot")
 
-    # calculate temp ranges using map and filter
-    temp_ranges = extract_temperature_range(data)
+    # bin each day's range as it streams past
+    temp_ranges = stream_histogram(high - low for high, low in _numeric_rows(data, ['MaxTemp', 'MinTemp']))
 
     if not temp_ranges:
         logger.warning("No valid temperature range data to plot")
         return
 
-    plt.figure(figsize=(10, 6))
-    plt.hist(temp_ranges, bins=50, edgecolor='black', alpha=0.7, color='orange')
-    plt.xlabel('Daily Temperature Range (°C)')
-    plt.ylabel('Frequency')
-    plt.title('Distribution of Daily Temperature Ranges (MaxTemp - MinTemp)')
-    plt.grid(True, alpha=0.3)
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    save_histogram(temp_ranges, output_path, 'Daily Temperature Range (°C)',
+                   'Distribution of Daily Temperature Ranges (MaxTemp - MinTemp)', color='orange')
     logger.info(f"Temperature range trends plot saved to {output_path}")
+
+
+# -- Batch Rendering --
+
+class PlotJob:
+    """
+    One figure to render: a module level save_* function, the compact data it draws and the output path
+    - Holds arrays / Histograms, not rows, so sending it to a worker process is cheap
+    - The call is function(*args, output_path=output_path, **kwargs), so pass labels by keyword
+    - e.g. PlotJob('wind.png', save_histogram, histogram, xlabel='Wind Gust Speed (km/h)', title='Wind')
+    """
+
+    def __init__(self, output_path: str, function: Callable, *args, **kwargs):
+        """
+        Initialize the job
+        Args:
+            output_path: Path to save the plot, passed to function as output_path
+            function: Picklable drawing function taking output_path, e.g. save_histogram
+            args: Positional arguments before output_path (the data, e.g. a Histogram)
+            kwargs: Other keyword arguments (labels, title, color)
+        """
+        self.output_path = output_path
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self) -> dict:
+        """
+        Render the figure, catching errors so one bad plot doesn't stop the others
+        Returns:
+            Dict with output_path, function name, seconds, error (None when the plot was saved) and cached (False)
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            self.function(*self.args, output_path=self.output_path, **self.kwargs)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {
+            'output_path': self.output_path,
+            'function': self.function.__name__,
+            'seconds': time.perf_counter() - start,
+            'error': error,
+            'cached': False,
+        }
+
+
+def _use_agg() -> None:
+    # workers only write files, the non interactive backend skips any GUI setup
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _run_job(job: PlotJob) -> dict:
+    return job.run()
+
+
+def render_plots(jobs: List[PlotJob], workers: int = 1, cache: Optional[PlotCache] = None) -> List[dict]:
+    """
+    Render independent figures, concurrently in worker processes when workers > 1
+    - savefig at 300 dpi is CPU bound, so separate processes (Agg backend) render in parallel,
+      the wall time drops towards the slowest single plot
+    - With a cache, jobs whose data and options were drawn before are copied from it and only the rest render
+    Args:
+        jobs: List of PlotJob
+        workers: Number of worker processes (1 = render here, one after another)
+        cache: Optional PlotCache, keyed on the content of each job
+    Returns:
+        List with one result dict per job, in job order (see PlotJob.run), failed plots have an error message
+        and cached is True for plots copied from the cache
+    """
+    jobs = list(jobs)
+    start = time.perf_counter()
+    results = [None] * len(jobs)
+    keys = {}
+    if cache is not None:
+        for i, job in enumerate(jobs):
+            keys[i] = cache.job_key(job)
+            if cache.fetch(keys[i], job.output_path):
+                results[i] = {'output_path': job.output_path, 'function': job.function.__name__,
+                              'seconds': 0.0, 'error': None, 'cached': True}
+            else:
+                cache.detach(job.output_path)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if workers > 1 and len(pending) > 1:
+        logger.info(f"Rendering {len(pending)} plots across {min(workers, len(pending))} worker processes")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_use_agg) as executor:
+            rendered = list(executor.map(_run_job, [jobs[i] for i in pending]))
+    else:
+        rendered = [jobs[i].run() for i in pending]
+
+    for i, result in zip(pending, rendered):
+        results[i] = result
+        if result['error']:
+            logger.error(f"Failed to render {result['output_path']}: {result['error']}")
+            continue
+        logger.debug(f"Rendered {result['output_path']} in {result['seconds']:.2f}s")
+        if cache is not None:
+            cache.store(keys[i], result['output_path'])
+    logger.info(f"Rendered {len(pending)} plots ({len(jobs) - len(pending)} from cache) "
+                f"in {time.perf_counter() - start:.2f}s")
+    return results
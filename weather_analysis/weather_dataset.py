@@ -1,7 +1,23 @@
+import os
+from array import array
+from itertools import chain, compress
 from typing import Optional
-from .data_loader import load_weather_data, csv_row_generator
-from .data_cleaning import extract_valid_numeric_values, valid_numeric_values_generator
-from .analytics import calculate_mean, calculate_median, calculate_range, calculate_statistics_streaming
+from .data_loader import (load_weather_columns, csv_row_generator, csv_column_batches, detect_compression,
+                          initial_checkpoint, checkpoint_matches, read_appended_rows, accumulate_column,
+                          accumulate_columns, aggregate_groups, infer_csv_schema, read_csv_header)
+from .columnar import ColumnarTable
+from .cache import append_cache, csv_fingerprint, load_cache, load_follow_cache, write_cache
+from .partitions import PartitionManifest, is_partitioned_path
+from .schema import NUMERIC
+from .query import Query
+from .groupby import GroupAggregator
+from .indexes import build_index, index_is_current
+from .timeseries import TimeIndex, rolling, ewma
+from .data_cleaning import valid_numeric_values_generator
+from .analytics import (calculate_mean, calculate_median, calculate_range, calculate_statistics_streaming,
+                        calculate_percentiles, calculate_quantiles, calculate_exceedance, StreamingAccumulator,
+                        DEFAULT_PERCENTILES)
+from .sketches import KLLSketch, feed_sketch
 from .logger_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -12,26 +28,62 @@ class WeatherDataset:
     Class to represent the weather data and do analysis
     - Encapsulate data loading and statistical calculations
     - Provide eager and lazy loading options for memory efficiency
+    - Loaded data is kept in a columnar table (typed arrays, dictionary encoded strings)
+    - Follow mode keeps up with a CSV file that is still being appended to (see refresh)
+    - A directory or glob of CSV files is read as one dataset, skipping files a filter can't match
     """
 
-    def __init__(self, file_path: str, lazy_load: bool = False):
+    def __init__(self, file_path: str, lazy_load: bool = False, schema: Optional[dict] = None, workers: int = 1,
+                 cache: bool = False, cache_dir: Optional[str] = None, cache_content_hash: bool = False,
+                 columns: Optional[list] = None, predicates: Optional[list] = None, follow: bool = False):
         """
         Initialize the WeatherDataset
         Args:
-            file_path: Path to the CSV file
+            file_path: Path to the CSV file, or a directory / glob pattern of CSV files (e.g. one per Location)
             lazy_load: If True, data is loaded on demand. If False, loaded immediately
+            schema: Optional dict of column name -> 'numeric' or 'categorical', inferred from the file if not given
+            workers: Number of processes used to parse the file when loading (1 = parse in this process)
+            cache: If True, keep a binary columnar cache of the parsed file and memory map it on later loads
+            cache_dir: Directory for the cache, defaults to a hidden sidecar next to the CSV
+            cache_content_hash: Also check a sha256 of the CSV before trusting the cache (slower, reads the file)
+            columns: Optional list of columns to load, other columns are skipped while parsing
+            predicates: Optional list of ColumnPredicate, only matching rows are kept (checked on the raw CSV text)
+            follow: If True, remember how far the file was read so refresh() only parses rows appended later.
+                    With cache=True the position is saved too, so a new dataset resumes from it
         Raises:
             FileNotFoundError: File doesn't exist
-            ValueError: File is empty or messed up
+            ValueError: File is empty or messed up, or follow mode on a compressed file or several files
         """
         self._file_path = file_path
         self._lazy_load = lazy_load
+        self._schema = schema
+        self._workers = workers
+        self._cache = cache
+        self._cache_dir = cache_dir
+        self._cache_content_hash = cache_content_hash
+        self._columns = list(columns) if columns is not None else None
+        self._predicates = list(predicates) if predicates else []
+        self._follow = follow
+        self._checkpoint = None
+        self._running_stats = {}
+        self._manifest = None
+        self._indexes = {}
+        self._time_indexes = {}
+        self._sources = None
         self._data = None
 
         try:
+            if is_partitioned_path(file_path):
+                if follow:
+                    logger.error(f"Follow mode needs a single CSV file: {file_path}")
+                    raise ValueError("Follow mode needs a single CSV file")
+                self._manifest = PartitionManifest.build(file_path, cache_dir)
+            elif follow and detect_compression(file_path):
+                logger.error(f"Follow mode needs an uncompressed CSV file: {file_path}")
+                raise ValueError("Follow mode needs an uncompressed CSV file")
             if not lazy_load:
                 logger.info(f"Eagerly loading dataset from: {file_path}")
-                self._data = load_weather_data(file_path)
+                self._data = self._load_table()
                 logger.info(f"Dataset loaded with {len(self._data)} rows")
             else:
                 logger.info(f"Dataset iniitialized for lazy loading: {file_path}")
@@ -44,9 +96,212 @@ class WeatherDataset:
         """Ensure data is loaded if lazy loading"""
         if self._lazy_load and self._data is None:
             logger.info(f"Lazy loading data from: {self._file_path}")
-            self._data = load_weather_data(self._file_path)
+            self._data = self._load_table()
             logger.info(f"Lazy loaded {len(self._data)} rows")
 
+    def _source_files(self, predicates=()) -> list[str]:
+        """
+        Return the CSV files that can hold matching rows
+        Args:
+            predicates: Extra ColumnPredicates on top of the dataset's own
+        Returns:
+            List of file paths, partitions ruled out by the manifest are left out
+        """
+        if self._manifest is None:
+            return [self._file_path]
+        return self._manifest.prune(self._predicates + list(predicates))
+
+    def _load_table(self):
+        """
+        Load the columnar table, file by file for partitioned datasets
+        Returns:
+            ColumnarTable
+        """
+        if self._follow:
+            return self._load_followed_table()
+
+        files = self._source_files()
+        # what the loaded rows came from, later edits to the files don't change them
+        self._sources = [csv_fingerprint(file_path, content_hash=self._cache_content_hash) for file_path in files]
+        table = self._load_file_table(files[0]) if files else ColumnarTable()
+        for file_path in files[1:]:
+            table.extend(self._load_file_table(file_path))
+        return table
+
+    def _load_file_table(self, file_path):
+        """
+        Load one CSV file into a columnar table, from the binary cache when it is current
+        Args:
+            file_path: Path to the CSV file
+        Returns:
+            ColumnarTable
+        """
+        fingerprint = None
+        if self._cache:
+            table = load_cache(file_path, self._cache_dir, content_hash=self._cache_content_hash,
+                               schema=self._schema, columns=self._columns, predicates=self._predicates)
+            if table is not None:
+                return table
+            # fingerprint before parsing so edits made while we parse make the cache stale
+            fingerprint = csv_fingerprint(file_path, content_hash=self._cache_content_hash)
+
+        table = load_weather_columns(file_path, schema=self._schema, workers=self._workers, columns=self._columns,
+                                     predicates=self._predicates)
+
+        if self._cache:
+            try:
+                write_cache(table, file_path, self._cache_dir, schema=self._schema, fingerprint=fingerprint,
+                            columns=self._columns, predicates=self._predicates)
+            except OSError as e:
+                # cache is an optimization, keep going without it
+                logger.warning(f"Could not write cache for {file_path}: {e}")
+        return table
+
+    def _load_followed_table(self):
+        """
+        Load the columnar table in follow mode, resuming from the cached checkpoint when the file only grew
+        Returns:
+            ColumnarTable
+        """
+        table = None
+        if self._cache:
+            cached = load_follow_cache(self._file_path, self._cache_dir, schema=self._schema, columns=self._columns,
+                                       predicates=self._predicates)
+            if cached is not None:
+                table, self._checkpoint = cached
+
+        if table is None:
+            # the first read is just an append onto an empty table
+            self._checkpoint = None
+            table = ColumnarTable()
+
+        # a first load reads an unterminated last line too, like a plain load
+        self._append_new_rows(table, flush=True)
+        return table
+
+    def _append_new_rows(self, table, flush: bool = False) -> int:
+        """
+        Parse rows appended after the checkpoint into table, update running stats and save the checkpoint
+        Args:
+            table: ColumnarTable read up to self._checkpoint (or empty when there is no checkpoint yet)
+            flush: Read a last line without its newline as a row right away (see read_appended_rows)
+        Returns:
+            Number of new rows added
+        """
+        previous = self._checkpoint
+        start = previous if previous is not None else initial_checkpoint(self._file_path, self._schema)
+        fingerprint = csv_fingerprint(self._file_path) if self._cache else None
+
+        new_rows, self._checkpoint = read_appended_rows(self._file_path, start, columns=self._columns,
+                                                        predicates=self._predicates, flush=flush)
+        if new_rows.row_count:
+            table.extend(new_rows)
+            # only the new rows are folded into the running aggregates
+            for column_name, (accumulator, sketch) in self._running_stats.items():
+                if new_rows.has_column(column_name):
+                    valid_values = new_rows.get_column(column_name).valid_array()
+                    accumulator.push_many(valid_values)
+                    sketch.push_many(valid_values)
+
+        if self._cache and self._checkpoint != previous:
+            try:
+                append_cache(table, self._file_path, previous, self._checkpoint, self._cache_dir,
+                             fingerprint=fingerprint, columns=self._columns, predicates=self._predicates)
+            except OSError as e:
+                logger.warning(f"Could not save follow checkpoint for {self._file_path}: {e}")
+        return new_rows.row_count
+
+    def refresh(self, flush: bool = False) -> int:
+        """
+        Read rows appended to the CSV file since the last load or refresh (follow mode)
+        - Only complete new lines are parsed, a line still being written is picked up next time
+          (or once the file stops changing, a finished file doesn't need a final newline)
+        - If the file was truncated or replaced, or a last line read without its newline was continued,
+          it is loaded again from the start
+        Args:
+            flush: Read a last line without its newline as a row now instead of waiting
+        Returns:
+            Number of new rows
+        Raises:
+            ValueError: Dataset wasn't created with follow=True
+        """
+        try:
+            if not self._follow:
+                logger.error("refresh() called on a dataset not in follow mode")
+                raise ValueError("refresh() needs a dataset created with follow=True")
+
+            if self._data is None:
+                self._ensure_data_loaded()
+                return len(self._data)
+
+            if not checkpoint_matches(self._file_path, self._checkpoint):
+                logger.warning(f"{self._file_path} was truncated, replaced or its last line continued, reloading it")
+                self._checkpoint = None
+                self._running_stats = {}
+                self._data = self._load_followed_table()
+                return len(self._data)
+
+            count = self._append_new_rows(self._data, flush=flush)
+            logger.info(f"Refresh added {count} rows, dataset has {len(self._data)} rows")
+            return count
+
+        except Exception as e:
+            logger.error(f"Error refreshing dataset: {e}")
+            raise
+
+    def fingerprint(self) -> dict:
+        """
+        Identify the data this dataset holds or reads, e.g. to key cached plots
+        - Loaded data keeps the fingerprint of its files from load time (follow mode: the read checkpoint),
+          lazy datasets describe the files as they are now
+        Returns:
+            JSON friendly dict with the source files (path, size, mtime_ns), columns, predicates and schema
+        """
+        if self._follow and self._data is not None:
+            sources = [{'path': os.path.abspath(self._file_path), 'checkpoint': self._checkpoint}]
+        elif self._data is not None and self._sources is not None:
+            sources = self._sources
+        else:
+            sources = [csv_fingerprint(file_path, content_hash=self._cache_content_hash)
+                       for file_path in self._source_files()]
+        return {
+            'sources': sources,
+            'columns': self._columns,
+            'predicates': [[predicate.column, predicate.op, predicate.value] for predicate in self._predicates],
+            'schema': self._schema,
+        }
+
+    @property
+    def column_names(self) -> list[str]:
+        """Column names of the dataset (loaded, projected, or from the first file's header without loading it)"""
+        if self._data is not None:
+            return self._data.column_names
+        if self._columns is not None:
+            return list(self._columns)
+        files = self._source_files()
+        return read_csv_header(files[0]) if files else []
+
+    def is_loaded(self) -> bool:
+        """Return True when the rows are in memory, so get_column doesn't read the files"""
+        return self._data is not None
+
+    def get_column(self, column_name: str):
+        """
+        Return a single column of the loaded data
+        Args:
+            column_name: Name of the column
+        Returns:
+            NumericColumn (array('d') values plus validity mask) or CategoricalColumn (codes plus categories)
+        Raises:
+            ValueError: Column doesn't exist
+        """
+        try:
+            self._ensure_data_loaded()
+            return self._data.get_column(column_name)
+        except Exception as e:
+            logger.error(f"Error getting column {column_name}: {e}")
+            raise
+
     def get_row_count(self) -> int:
         """
         Return the number of rows in the dataset
@@ -54,6 +309,11 @@ class WeatherDataset:
             Number of rows
         """
         try:
+            if self._data is None and self._manifest is not None and not self._predicates:
+                # the manifest already knows every file's row count
+                count = self._manifest.row_count
+                logger.debug(f"Row count from partition manifest: {count}")
+                return count
             self._ensure_data_loaded()
             count = len(self._data)
             logger.debug(f"Row count: {count}")
@@ -76,8 +336,8 @@ class WeatherDataset:
             logger.info(f"Calculating statistics for column: {column_name}")
             self._ensure_data_loaded()
 
-            # cleaning function
-            valid_values = extract_valid_numeric_values(self._data, column_name)
+            # read straight from the column buffer, no per row dict lookups
+            valid_values = self._data.get_column(column_name).valid_array()
 
             if not valid_values:
                 logger.warning(f"No valid values found for column: {column_name}")
@@ -86,7 +346,7 @@ class WeatherDataset:
             # calculate all stats and return as a package
             result = {
                 'mean': calculate_mean(valid_values),
-                'median': calculate_median(valid_values),
+                'median': calculate_median(valid_values, inplace=True),
                 'range': calculate_range(valid_values)
             }
 
@@ -97,40 +357,187 @@ class WeatherDataset:
             logger.error(f"Error calculating statistics for column {column_name}: {e}")
             raise
 
+    def get_column_quantiles(self, column_name: str, qs=(0.25, 0.5, 0.75)) -> Optional[dict]:
+        """
+        Calculate several exact quantiles of a column with one selection pass (no full sort)
+        Args:
+            column_name: Name of the column to analyze
+            qs: Quantiles between 0 and 1, e.g. deciles [0.1, 0.2, ..., 0.9]
+        Returns:
+            Dict of quantile -> value, or None if no valid data
+        Raises:
+            ValueError: Column doesn't exist or a quantile is outside [0, 1]
+        """
+        try:
+            self._ensure_data_loaded()
+            valid_values = self._data.get_column(column_name).valid_array()
+            if not valid_values:
+                logger.warning(f"No valid values found for column: {column_name}")
+                return None
+            qs = list(qs)
+            result = dict(zip(qs, calculate_quantiles(valid_values, qs, inplace=True)))
+            logger.info(f"Quantiles calculated for {column_name}: {result}")
+            return result
+        except Exception as e:
+            logger.error(f"Error calculating quantiles for column {column_name}: {e}")
+            raise
+
+    def _grouped_values(self, column_name: str, by: Optional[str]) -> dict:
+        """Stream a column into one array('d') of valid values per group key (None when not grouping)"""
+        groups = {}
+        columns = [column_name] if by is None else [column_name, by]
+        for _, values_by_column in self.column_batches(columns):
+            keys = values_by_column[1] if by is not None else [None] * len(values_by_column[0])
+            for value, key in zip(values_by_column[0], keys):
+                if type(value) not in (float, int) or value != value or (by is not None and key is None):
+                    continue
+                values = groups.get(key)
+                if values is None:
+                    groups[key] = values = array('d')
+                values.append(value)
+        return groups
+
+    def _grouped_rows(self, column, by: Optional[str]) -> dict:
+        """Split the loaded rows with a valid value in column into row lists per group key (None when not grouping)"""
+        rows = compress(range(len(column)), column.valid)
+        if by is None:
+            return {None: list(rows)}
+        groups = {}
+        keys = self._data.get_column(by)
+        for row in rows:
+            key = keys[row]
+            if key is not None:
+                groups.setdefault(key, []).append(row)
+        return groups
+
+    def exceedance(self, column_name: str, thresholds, by: Optional[str] = None, inclusive: bool = True,
+                   row_ids: bool = False) -> dict:
+        """
+        Count the rows at or above many thresholds of a column at once (exceedance curve), e.g. days with MaxTemp >= t
+        - Each column / group is sorted once and every threshold is a binary search, instead of one scan per threshold
+        - Lazy datasets stream the column (and the by column) without loading the table
+        - row_ids=True loads the data and reuses the column's sorted index when one was created
+        Args:
+            column_name: Numeric column to count
+            thresholds: Thresholds to count against
+            by: Optional column to split the counts by, e.g. 'Location' (rows missing the key are left out)
+            inclusive: Count values >= threshold (True) or > threshold (False)
+            row_ids: Also return the matching row indexes of each threshold, in row order
+        Returns:
+            Dict with 'thresholds', 'counts', 'fractions' (of the valid values) and 'total' (valid values),
+            plus 'row_ids' (one list per threshold) when asked for. With by, a dict of group value -> that dict
+        Raises:
+            ValueError: Column doesn't exist or isn't numeric
+        """
+        try:
+            thresholds = list(thresholds)
+            logger.info(f"Counting {column_name} exceedance for {len(thresholds)} thresholds"
+                        + (f" by {by}" if by else ""))
+            results = {}
+            if not row_ids and self._lazy_load and self._data is None:
+                for key, values in self._grouped_values(column_name, by).items():
+                    results[key] = calculate_exceedance(values, thresholds, inclusive=inclusive)
+            else:
+                self._ensure_data_loaded()
+                column = self._data.get_column(column_name)
+                if column.kind != NUMERIC:
+                    logger.error(f"Column {column_name} is not numeric")
+                    raise ValueError(f"Column '{column_name}' is not numeric")
+                values = column.values
+                if by is None and column_name in self._indexes:
+                    # the sorted index already holds the values in order
+                    index = self._current_index(column_name)
+                    ordered = {None: (index.keys, index.rows)}
+                elif by is None and not row_ids:
+                    ordered = {None: (column.valid_array(), None)}
+                else:
+                    ordered = {}
+                    for key, rows in self._grouped_rows(column, by).items():
+                        if row_ids:
+                            rows.sort(key=values.__getitem__)
+                            ordered[key] = (array('d', [values[row] for row in rows]), rows)
+                        else:
+                            ordered[key] = (array('d', [values[row] for row in rows]), None)
+                for key, (group_values, rows) in ordered.items():
+                    result = calculate_exceedance(group_values, thresholds, inclusive=inclusive,
+                                                  presorted=rows is not None)
+                    if row_ids:
+                        total = result['total']
+                        # the rows past a threshold are the last count entries in sorted order
+                        result['row_ids'] = [sorted(rows[total - count:]) for count in result['counts']]
+                    results[key] = result
+
+            if by is None:
+                return results.get(None) or calculate_exceedance([], thresholds, inclusive=inclusive)
+            logger.info(f"Exceedance counted for {len(results)} groups of {by}")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error counting exceedance for column {column_name}: {e}")
+            raise
+
     def get_column_statistics_streaming(self, column_name: str) -> Optional[dict]:
         """
         Calculate stats for a specific column using streaming for more memory efficiency
+        - Lazy datasets estimate median and percentiles with a KLL sketch in the same pass, in fixed memory
+          (rank error about 1.65% of the count, see sketches.KLLSketch)
+        - Lazy datasets with workers > 1 summarize byte ranges / partition files in parallel and merge the results
+        - Followed datasets keep running totals and a KLL sketch per column, refresh() feeds them only the new rows
+        - Loaded datasets give exact median and percentiles
         Args:
             column_name: Name of the column to analyze
         Returns:
-            Dict with mean, min, max, range, count, or None if no valid data
+            Dict with mean, min, max, range, count, variance, std, median and percentiles
+            (dict of percentile -> value)
         Raises:
             ValueError: Column doesn't exist
         """
         try:
             logger.info(f"Calculating streaming statistics for column: {column_name}")
 
-            # use generator to process data like streaming
-            if self._lazy_load or self._data is None:
-                # use CSV generator directly for true streaming
-                data_generator = csv_row_generator(self._file_path)
-            else:
-                # use loaded data
-                data_generator = iter(self._data)
-
+            sketch = None
+            if self._follow:
+                # followed data stays in memory, keep running totals and a sketch that refresh() updates
+                # with new rows only, so the column is scanned once and not again after every refresh
+                self._ensure_data_loaded()
+                if column_name not in self._running_stats:
+                    valid_values = self._data.get_column(column_name).valid_array()
+                    accumulator = StreamingAccumulator()
+                    accumulator.push_many(valid_values)
+                    sketch = KLLSketch()
+                    sketch.push_many(valid_values)
+                    self._running_stats[column_name] = (accumulator, sketch)
+                accumulator, sketch = self._running_stats[column_name]
+                result = accumulator.result()
             # get valid values as generator
-            valid_values_gen = valid_numeric_values_generator(data_generator, column_name)
-
-            # calculate statistics in streaming mode
-            result = calculate_statistics_streaming(valid_values_gen)
+            elif (self._lazy_load or self._data is None) and self._workers > 1:
+                # every byte range / file is summarized in a worker and the partial states merged here
+                accumulator, sketch = accumulate_column(self._source_files(), column_name, schema=self._schema,
+                                                        workers=self._workers, predicates=self._predicates)
+                result = accumulator.result()
+            elif self._lazy_load or self._data is None:
+                # use CSV generator directly for true streaming, only converting the one column
+                data_generator = chain.from_iterable(
+                    csv_row_generator(file_path, schema=self._schema, columns=[column_name], predicates=self._predicates)
+                    for file_path in self._source_files())
+                # the sketch sees every value on the way through, no second pass over the file
+                sketch = KLLSketch()
+                valid_values_gen = feed_sketch(valid_numeric_values_generator(data_generator, column_name), sketch)
+                result = calculate_statistics_streaming(valid_values_gen)
+            else:
+                # use loaded column buffer, calculate statistics in streaming mode
+                result = calculate_statistics_streaming(self._data.get_column(column_name).valid_array())
 
-            # add median (have to second pass to store value)
-            if not self._lazy_load and self._data:
-                valid_values = extract_valid_numeric_values(self._data, column_name)
-                result['median'] = calculate_median(valid_values)
+            if sketch is not None:
+                estimates = sketch.quantiles([0.5] + [percentile / 100 for percentile in DEFAULT_PERCENTILES])
+                result['median'] = estimates[0]
+                result['percentiles'] = dict(zip(DEFAULT_PERCENTILES, estimates[1:]))
+                logger.info("Median and percentiles estimated from a quantile sketch")
             else:
-                logger.info("Median calculation skipped in pure streaming mode")
-                result['median'] = None
+                # add median (have to second pass to store value)
+                valid_values = self._data.get_column(column_name).valid_array()
+                result['median'] = calculate_median(valid_values, inplace=True)
+                result['percentiles'] = calculate_percentiles(valid_values, DEFAULT_PERCENTILES, inplace=True)
 
             logger.info(f"Streaming statistics calculated for {column_name}")
             return result
@@ -139,33 +546,361 @@ class WeatherDataset:
             logger.error(f"Error calculating streaming statistics for column {column_name}: {e}")
             raise
 
+    def describe(self, percentiles=(25, 50, 75)) -> dict:
+        """
+        Profile every numeric column in a single scan
+        - Numeric columns hold only numbers and missing values, a column with any text is left out in both modes
+        - Loaded datasets read each column buffer once, percentiles are exact
+        - Lazy datasets read the files once for all columns (across workers when workers > 1),
+          percentiles are estimated with KLL sketches (rank error about 1.65% of the count,
+          exact below about 200 values per column)
+        Args:
+            percentiles: Percentiles between 0 and 100 to report for each column
+        Returns:
+            Dict of column name -> dict with count, nulls, mean, std, min, max and percentiles
+            (dict of percentile -> value). Columns without valid values get None statistics
+        """
+        try:
+            percentiles = list(percentiles)
+            summaries = {}
+            if self._lazy_load and self._data is None:
+                logger.info("Describing numeric columns in one streaming pass")
+                files = self._source_files()
+                if not files:
+                    return {}
+                schema = self._schema if self._schema is not None else infer_csv_schema(files[0])
+                names = [name for name, kind in schema.items()
+                         if kind == NUMERIC and (self._columns is None or name in self._columns)]
+                for name, (accumulator, sketch, missing, text) in accumulate_columns(
+                        files, names, schema=self._schema, workers=self._workers, predicates=self._predicates).items():
+                    if text:
+                        # a loaded dataset would hold this column as categorical, leave it out the same way
+                        continue
+                    estimates = sketch.quantiles([percentile / 100 for percentile in percentiles]) if len(sketch) else []
+                    summaries[name] = (accumulator, missing, dict(zip(percentiles, estimates)))
+            else:
+                logger.info("Describing numeric columns from the loaded column buffers")
+                self._ensure_data_loaded()
+                for name in self._data.column_names:
+                    column = self._data.get_column(name)
+                    if column.kind != NUMERIC:
+                        continue
+                    valid_values = column.valid_array()
+                    accumulator = StreamingAccumulator()
+                    accumulator.push_many(valid_values)
+                    exact = calculate_percentiles(valid_values, percentiles, inplace=True) if valid_values else {}
+                    summaries[name] = (accumulator, column.null_count(), exact)
+
+            result = {}
+            for name, (accumulator, missing, values) in summaries.items():
+                stats = accumulator.result() if accumulator.count else {}
+                result[name] = {
+                    'count': accumulator.count,
+                    'nulls': missing,
+                    'mean': stats.get('mean'),
+                    'std': stats.get('std'),
+                    'min': stats.get('min'),
+                    'max': stats.get('max'),
+                    'percentiles': values,
+                }
+            logger.info(f"Described {len(result)} numeric columns")
+            return result
+
+        except Exception as e:
+            logger.error(f"Error describing dataset: {e}")
+            raise
+
     def get_data(self) -> list[dict]:
         """
-        Return the loaded data
+        Return the loaded data as a list of dicts (compatibility view built from the columns on each call)
         Returns:
             List of dicts containing weather data
         """
         try:
             self._ensure_data_loaded()
             logger.debug("Returning dataset")
-            return self._data
+            return self._data.to_rows()
         except Exception as e:
             logger.error(f"Error getting data: {e}")
             raise
 
-    def iter_rows(self):
+    def column_batches(self, columns: Optional[list] = None, predicates: Optional[list] = None):
+        """
+        Return an iterator over batches of column values, the cheapest way to feed one pass aggregations
+        Args:
+            columns: Columns to include, defaults to every loaded / projected column
+            predicates: Optional list of ColumnPredicate, only rows matching all of them are included
+        Yields:
+            Tuple of (column names, list with one list of values per column), missing values are None
+        Raises:
+            ValueError: Column doesn't exist
+        """
+        try:
+            columns = self._columns if columns is None else list(columns)
+            predicates = list(predicates or [])
+            if self._lazy_load and self._data is None:
+                logger.debug("Streaming column batches from the CSV files")
+                # only the requested columns are converted, partitions the predicates can't match are skipped
+                # and failing rows are dropped on the raw text
+                for file_path in self._source_files(predicates):
+                    yield from csv_column_batches(file_path, schema=self._schema, columns=columns,
+                                                  predicates=self._predicates + predicates)
+            else:
+                logger.debug("Slicing column batches from the loaded table")
+                self._ensure_data_loaded()
+                indexes = self._matching_rows(predicates) if predicates else None
+                yield from self._data.column_batches(columns, indexes=indexes)
+        except Exception as e:
+            logger.error(f"Error iterating column batches: {e}")
+            raise
+
+    def query(self) -> Query:
+        """
+        Start a lazy query, e.g. dataset.query().where('Rainfall', '>=', 10.0).select('Location').rows()
+        Returns:
+            Query over this dataset (see query.Query)
+        """
+        return Query(self)
+
+    def group_by(self, keys, predicates: Optional[list] = None, **aggregates) -> dict:
+        """
+        Aggregate every group of one or more key columns in a single hash aggregation pass,
+        e.g. dataset.group_by('Location', rain=('Rainfall', 'sum'), hottest=('MaxTemp', 'max'))
+        - Lazy datasets with workers > 1 aggregate byte ranges / partition files in worker processes
+          and merge the partial aggregates, no rows are sent between processes
+        - Derived keys (month, year) go through query().map(...).group_by(...)
+        Args:
+            keys: Key column name or list of names, e.g. ['Location', 'WindGustDir']
+            predicates: Optional list of ColumnPredicate, only matching rows are aggregated
+            aggregates: result name -> 'count' (rows in the group), (column, function) or (column, 'quantile', q),
+                        function one of count, sum, mean, min, max, var, std, median
+        Returns:
+            Dict of group key -> dict of result name -> value (see groupby.GroupAggregator.result)
+        Raises:
+            ValueError: Column doesn't exist or unknown aggregate function
+        """
+        try:
+            keys = [keys] if isinstance(keys, str) else list(keys)
+            predicates = list(predicates or [])
+            aggregator = GroupAggregator(keys, aggregates)
+            logger.info(f"Aggregating {len(aggregates)} values by {keys}")
+            if self._lazy_load and self._data is None and self._workers > 1:
+                aggregate_groups(self._source_files(predicates), aggregator, schema=self._schema,
+                                 workers=self._workers, predicates=self._predicates + predicates)
+            else:
+                for names, values_by_column in self.column_batches(aggregator.columns, predicates=predicates):
+                    aggregator.update(dict(zip(names, values_by_column)))
+            result = aggregator.result()
+            logger.info(f"Aggregated {len(result)} groups of {keys}")
+            return result
+        except Exception as e:
+            logger.error(f"Error aggregating groups of {keys}: {e}")
+            raise
+
+    def create_index(self, column_name: str):
+        """
+        Build and keep an index on a column so filters on it skip the full scan
+        - Numeric columns get a sorted permutation index (range and equality lookups with bisect)
+        - Categorical columns get a hash index (value -> rows)
+        - Loads the data if it isn't loaded yet, the index is rebuilt on first use after rows are appended
+        Args:
+            column_name: Name of the column to index
+        Returns:
+            SortedIndex or HashIndex
+        Raises:
+            ValueError: Column doesn't exist
+        """
+        try:
+            self._ensure_data_loaded()
+            index = build_index(self._data.get_column(column_name))
+            self._indexes[column_name] = index
+            logger.info(f"Built {index.kind} index on column: {column_name}")
+            return index
+        except Exception as e:
+            logger.error(f"Error building index on column {column_name}: {e}")
+            raise
+
+    def drop_index(self, column_name: str) -> None:
+        """
+        Forget the index on a column
+        Args:
+            column_name: Name of the indexed column
+        """
+        self._indexes.pop(column_name, None)
+
+    def _current_index(self, column_name: str):
+        """Return the index on a column, rebuilt first if rows were appended or the column was replaced"""
+        column = self._data.get_column(column_name)
+        index = self._indexes[column_name]
+        if not index_is_current(index, column):
+            logger.debug(f"Index on {column_name} is stale, rebuilding")
+            index = self._indexes[column_name] = build_index(column)
+        return index
+
+    def _matching_rows(self, predicates) -> list[int]:
+        """
+        Return the loaded rows matching every predicate
+        - Indexed predicates are answered by their index, the smallest result becomes the candidate list
+        - The other predicates only check the candidates
+        """
+        predicates = list(predicates)
+        indexed = [predicate for predicate in predicates if predicate.column in self._indexes]
+        if not indexed:
+            return self._data.matching_rows(predicates)
+
+        lookups = sorted((self._current_index(predicate.column).lookup(predicate) for predicate in indexed), key=len)
+        candidates = lookups[0]
+        for rows in lookups[1:]:
+            if not candidates:
+                break
+            keep = set(rows)
+            candidates = [row for row in candidates if row in keep]
+        for predicate in predicates:
+            if predicate.column not in self._indexes and candidates:
+                candidates = self._data.get_column(predicate.column).matching_rows(predicate, candidates)
+        logger.debug(f"Index lookups left {len(candidates)} candidate rows")
+        return candidates
+
+    def time_index(self, by: Optional[str] = 'Location', date_column: str = 'Date') -> TimeIndex:
+        """
+        Return the rows of each station sorted by date, built once and kept until rows are appended
+        Args:
+            by: Column to split series by, None for a single series
+            date_column: Column holding ISO dates
+        Returns:
+            TimeIndex
+        Raises:
+            ValueError: The date or by column doesn't exist
+        """
+        try:
+            self._ensure_data_loaded()
+            dates = self._data.get_column(date_column)
+            keys = self._data.get_column(by) if by is not None else None
+            index = self._time_indexes.get((date_column, by))
+            if index is None or not index_is_current(index, dates) or index.key_column is not keys:
+                index = self._time_indexes[(date_column, by)] = TimeIndex(dates, keys)
+                logger.info(f"Built time index on {date_column} with {len(index.rows)} series")
+            return index
+        except Exception as e:
+            logger.error(f"Error building time index on {date_column}: {e}")
+            raise
+
+    def _time_series(self, column_name: str, by: Optional[str], date_column: str, operator) -> dict:
+        """Run operator(days, values) over every series of the time index, returning dates and results per key"""
+        index = self.time_index(by, date_column)
+        column = self._data.get_column(column_name)
+        if column.kind != NUMERIC:
+            logger.error(f"Column {column_name} is not numeric")
+            raise ValueError(f"Column '{column_name}' is not numeric")
+        values = column.values
+        dates = self._data.get_column(date_column)
+        result = {}
+        for key, rows in index.rows.items():
+            # missing values are NaN in the buffer, the operators skip them
+            result[key] = {
+                'dates': [dates[row] for row in rows],
+                'values': operator(index.days[key], [values[row] for row in rows]),
+            }
+        if by is None:
+            return result.get(None, {'dates': [], 'values': []})
+        return result
+
+    def rolling(self, column_name: str, window: int, how: str = 'mean', by: Optional[str] = 'Location',
+                min_periods: int = 1, date_column: str = 'Date') -> dict:
+        """
+        Rolling statistic over a window of days for every station in one pass, e.g. 7 day rainfall totals
+        with rolling('Rainfall', 7, 'sum') or 30 day MaxTemp means with rolling('MaxTemp', 30)
+        - Each step is O(1) amortized (running total / monotonic deque), see timeseries.rolling
+        - The window covers calendar days, so missing dates shrink it instead of stretching it
+        Args:
+            column_name: Numeric column
+            window: Window length in days
+            how: One of sum, mean, count, min, max
+            by: Column to split series by, None for a single series
+            min_periods: Valid values needed in the window for a result, else None
+            date_column: Column holding ISO dates
+        Returns:
+            Dict of station -> {'dates': [...], 'values': [...]} in date order, or one such dict when by is None
+        Raises:
+            ValueError: Column doesn't exist or isn't numeric, unknown function or window < 1
+        """
+        try:
+            logger.info(f"Calculating {window} day rolling {how} of {column_name}")
+            return self._time_series(column_name, by, date_column,
+                                     lambda days, values: rolling(days, values, window, how, min_periods))
+        except Exception as e:
+            logger.error(f"Error calculating rolling {how} of {column_name}: {e}")
+            raise
+
+    def ewma(self, column_name: str, alpha: Optional[float] = None, span: Optional[float] = None,
+             by: Optional[str] = 'Location', date_column: str = 'Date') -> dict:
+        """
+        Exponentially weighted moving average for every station in one pass (see timeseries.ewma)
+        Args:
+            column_name: Numeric column
+            alpha: Smoothing factor between 0 and 1
+            span: Alternative to alpha, in days (alpha = 2 / (span + 1))
+            by: Column to split series by, None for a single series
+            date_column: Column holding ISO dates
+        Returns:
+            Dict of station -> {'dates': [...], 'values': [...]} in date order, or one such dict when by is None
+        Raises:
+            ValueError: Column doesn't exist or isn't numeric, or neither / both of alpha and span are given
+        """
+        try:
+            if (alpha is None) == (span is None):
+                logger.error("EWMA needs exactly one of alpha and span")
+                raise ValueError("Give exactly one of alpha and span")
+            if alpha is None:
+                alpha = 2 / (span + 1)
+            logger.info(f"Calculating EWMA of {column_name} with alpha {alpha:.4f}")
+            return self._time_series(column_name, by, date_column, lambda days, values: ewma(days, values, alpha))
+        except Exception as e:
+            logger.error(f"Error calculating EWMA of {column_name}: {e}")
+            raise
+
+    def iter_rows(self, predicates: Optional[list] = None):
         """
         Return an iterator over the rows for memory efficient processing
+        Args:
+            predicates: Optional list of ColumnPredicate, only rows matching all of them are yielded
         Yields:
             Dict for each row
         """
         try:
-            if self._lazy_load or self._data is None:
+            if self._data is None or (self._lazy_load and not self._indexes):
                 logger.debug("Using generator for row iteration")
-                yield from csv_row_generator(self._file_path)
+                # predicates run on the raw text, failing rows are never converted
+                # partitions the predicates can't match are never opened
+                for file_path in self._source_files(predicates or []):
+                    yield from csv_row_generator(file_path, schema=self._schema, columns=self._columns,
+                                                 predicates=self._predicates + list(predicates or []))
+            elif predicates:
+                logger.debug("Using loaded columns to filter rows")
+                yield from self._data.iter_rows(self._matching_rows(predicates))
             else:
                 logger.debug("Using loaded data for row iteration")
-                yield from iter(self._data)
+                yield from self._data.iter_rows()
         except Exception as e:
             logger.error(f"Error iterating rows: {e}")
+            raise
+
+    def filter_rows(self, *predicates) -> list[dict]:
+        """
+        Return the rows matching every predicate
+        - Lazy datasets check the raw CSV text while reading, so other rows are never converted
+        - Loaded datasets test the column buffers (categoricals test each distinct value once)
+        Args:
+            predicates: ColumnPredicate objects, e.g. ColumnPredicate('Location', '==', 'Albury')
+        Returns:
+            List of dicts for the matching rows
+        Raises:
+            ValueError: A predicate names a column that doesn't exist
+        """
+        try:
+            rows = list(self.iter_rows(predicates=list(predicates)))
+            logger.info(f"Filtered dataset to {len(rows)} rows with {len(predicates)} predicates")
+            return rows
+        except Exception as e:
+            logger.error(f"Error filtering rows: {e}")
             raise
\ No newline at end of file